@@ -8,6 +8,7 @@ This is a bot that helps you to copy trade whales, swap tokens, and more.
 /about - About the bot
 /start_copytrade watcher_private_key target_wallet_address - Start a copy trade watcher
 /stop_copytrade - Stop an active copy trade task
+/mempool_copy on|off - Mirror copy trades from the mempool, before they are mined
 /faq - Frequently Asked Questions
 /cancel - Cancel the current operation
 
@@ -0,0 +1,203 @@
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Union
+
+from lib.ChainHead import ChainHeads
+from lib.LatencyMetrics import LatencyTrace
+from lib.Logger import LOGGER
+from lib.RpcBatch import JsonRpcBatch, to_int
+from lib.RpcRouter import RpcRouters
+from lib.Types import BlockHeader
+
+TransactionListener = Callable[[Dict[str, Any], LatencyTrace], Union[Awaitable[None], None]]
+ProgressListener = Callable[[int], Union[Awaitable[None], None]]
+
+
+class BlockScanner:
+    """
+    Matches every transaction of every new block on one chain against a set of watched senders.
+
+    Each block is fetched once with its full transactions, `eth_getBlockByNumber(n, true)`,
+    and each transaction costs two hash lookups: its `from` in the watched set and its `to`
+    in the router set. Matching is therefore linear in the transactions of a block and does
+    not depend on how many addresses are watched. The receipts of the few matches are read
+    in one batch so reverted trades are not passed on. Blocks missed while the scanner was
+    behind, or since a `from_block` checkpoint, are fetched in batches before new ones,
+    at most `max_backlog` of them so a long outage does not replay stale trades.
+    Each match is passed on with a LatencyTrace started when its head was seen, and
+    `progress` is told every block whose matches have all been passed on.
+    """
+
+    def __init__(
+        self,
+        network: str,
+        listener: TransactionListener,
+        routers: Optional[FrozenSet[str]] = None,
+        from_block: Optional[int] = None,
+        batch_size: int = 10,
+        progress: Optional[ProgressListener] = None,
+        max_backlog: Optional[int] = None,
+    ) -> None:
+        """
+        Initializes a scanner, nothing runs until `start` is called.
+
+        Args:
+            network (str): The short name of the network.
+            listener (TransactionListener): Called, sync or async, with every matching successful transaction
+                and its latency trace.
+            routers (Optional[FrozenSet[str]], optional): Lower case addresses a transaction must be sent to,
+                None matches any recipient. Defaults to None.
+            from_block (Optional[int], optional): Scan from this block on start, e.g. a saved checkpoint.
+                Defaults to None.
+            batch_size (int, optional): Blocks fetched per batch request while catching up. Defaults to 10.
+            progress (Optional[ProgressListener], optional): Called, sync or async, with the last fully
+                scanned block after each batch, e.g. to save a checkpoint. Defaults to None.
+            max_backlog (Optional[int], optional): Blocks behind the head that are still scanned, older ones
+                are skipped. Defaults to None, no limit.
+        """
+        self.network = network
+        self.listener = listener
+        self.routers = routers
+        self.batch_size = batch_size
+        self.progress = progress
+        self.max_backlog = max_backlog
+        self.watched: Set[str] = set()
+        # the last block whose transactions have all been matched
+        self.last_block: Optional[int] = from_block - 1 if from_block is not None else None
+        self._head: Optional[int] = None
+        self._head_seen_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def set_watched(self, addresses: Iterable[str]) -> None:
+        """
+        Replaces the watched senders, taking effect from the next transaction matched.
+
+        Args:
+            addresses (Iterable[str]): The addresses, in any case.
+        """
+        self.watched = {address.lower() for address in addresses}
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts scanning on the running event loop, a no-op when already running.
+
+        Returns:
+            asyncio.Task: The background scanning task.
+        """
+        if self._task is None or self._task.done():
+            tracker = ChainHeads.get(self.network)
+            tracker.add_listener(self._on_head)
+            tracker.start()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        Stops scanning.
+        """
+        ChainHeads.get(self.network).remove_listener(self._on_head)
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def _on_head(self, header: BlockHeader) -> None:
+        if self._head is None or header.number > self._head:
+            self._head = header.number
+            self._head_seen_at = header.seen_at
+            self._wakeup.set()
+
+    def match(self, block: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Picks the transactions of a block sent by a watched address to a router.
+
+        Args:
+            block (Dict[str, Any]): A block fetched with full transactions.
+
+        Returns:
+            List[Dict[str, Any]]: The matching transactions, in block order.
+        """
+        watched, routers = self.watched, self.routers
+        matches = []
+        for tx in block["transactions"]:
+            if tx["from"].lower() not in watched:
+                continue
+            to = tx.get("to")
+            if to is None or (routers is not None and to.lower() not in routers):
+                continue
+            matches.append(tx)
+        return matches
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self._catch_up(self._head, self._head_seen_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # the failed blocks are retried with the next head
+                LOGGER.error(f"Block scan on {self.network} failed: {e}")
+
+    async def _catch_up(self, head: int, seen_at: Optional[float] = None) -> None:
+        if self.last_block is None:
+            # first start without a checkpoint, only new blocks matter
+            self.last_block = head - 1
+        elif self.max_backlog is not None and head - self.last_block > self.max_backlog:
+            LOGGER.warning(
+                f"Block scan on {self.network} is {head - self.last_block} blocks behind, "
+                f"skipping to the last {self.max_backlog}"
+            )
+            self.last_block = head - self.max_backlog
+
+        router = RpcRouters.get(self.network)
+        while self.last_block < head:
+            numbers = range(self.last_block + 1, min(head, self.last_block + self.batch_size) + 1)
+            batch = JsonRpcBatch(self.network)
+            for number in numbers:
+                batch.add("eth_getBlockByNumber", [hex(number), True])
+            blocks = await router.batch(batch)
+            if any(block is None for block in blocks):
+                # the node has not imported the head yet, try again with the next one
+                return
+
+            matches = [tx for block in blocks for tx in self.match(block)]
+            if matches:
+                await self._deliver(matches, seen_at)
+            self.last_block = numbers[-1]
+            await self._report(self.last_block)
+
+    async def _report(self, block: int) -> None:
+        if self.progress is None:
+            return
+        try:
+            result = self.progress(block)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            LOGGER.error(f"Block scan progress listener failed on {self.network}: {e}")
+
+    async def _deliver(self, matches: List[Dict[str, Any]], seen_at: Optional[float] = None) -> None:
+        traces = [LatencyTrace(self.network, seen_at) for _ in matches]
+        for trace in traces:
+            trace.mark("matched")
+        batch = JsonRpcBatch(self.network)
+        for tx in matches:
+            batch.add("eth_getTransactionReceipt", [tx["hash"]])
+        receipts = await RpcRouters.get(self.network).batch(batch)
+
+        for tx, receipt, trace in zip(matches, receipts, traces):
+            if receipt is None or to_int(receipt.get("status")) != 1:
+                continue
+            trace.mark("receipt")
+            try:
+                result = self.listener(tx, trace)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                LOGGER.error(f"Transaction listener failed on {self.network}: {e}")
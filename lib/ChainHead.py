@@ -0,0 +1,186 @@
+import asyncio
+import inspect
+import json
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+import websockets
+
+from lib.Logger import LOGGER
+from lib.ProviderPool import WS_URLS
+from lib.RpcRouter import RpcRouters
+from lib.Types import BlockHeader
+
+HeadListener = Callable[[BlockHeader], Union[Awaitable[None], None]]
+
+
+class ChainHeadTracker:
+    """
+    Keeps the newest block header of one chain in memory and notifies listeners on every new block.
+
+    Heads are streamed with `eth_subscribe("newHeads")` when the chain has a websocket endpoint
+    and polled over HTTP otherwise, or while the websocket is down. Transaction builders read
+    `latest()` instead of making their own `get_block("latest")` round-trip.
+    """
+
+    def __init__(
+        self,
+        network: str = "ETH",
+        ws_url: Optional[str] = None,
+        poll_interval: float = 2.0,
+        max_age: float = 15.0,
+    ) -> None:
+        """
+        Initializes a tracker for a network, nothing runs until `start` or `latest` is called.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            ws_url (Optional[str], optional): Overrides the websocket endpoint for the network. Defaults to None.
+            poll_interval (float, optional): Seconds between HTTP polls when no websocket is available.
+                Defaults to 2.0.
+            max_age (float, optional): Seconds after which the cached header is refetched on demand. Defaults to 15.0.
+        """
+        self.network = network
+        self.ws_url = ws_url or WS_URLS.get(network)
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.header: Optional[BlockHeader] = None
+        self.listeners: List[HeadListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: HeadListener) -> None:
+        """
+        Registers a callback, sync or async, called with every new BlockHeader.
+
+        Args:
+            listener (HeadListener): The callback.
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: HeadListener) -> None:
+        """
+        Unregisters a callback previously added with `add_listener`.
+
+        Args:
+            listener (HeadListener): The callback.
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts tracking on the running event loop, a no-op when already running there.
+
+        Returns:
+            asyncio.Task: The background tracking task.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        Stops the background tracking task.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def latest(self) -> BlockHeader:
+        """
+        Returns the newest known header, fetching it only when nothing recent is in memory.
+
+        Returns:
+            BlockHeader: The newest block header.
+        """
+        self.start()
+        if self.header is not None and time.monotonic() - self.header.seen_at < self.max_age:
+            return self.header
+        await self.refresh()
+        return self.header
+
+    async def refresh(self) -> None:
+        """
+        Fetches the latest block over HTTP and publishes it if it is new.
+        """
+        raw = await RpcRouters.get(self.network).request(
+            "eth_getBlockByNumber", ["latest", False]
+        )
+        await self._publish(raw)
+
+    async def _publish(self, raw: dict) -> None:
+        header = BlockHeader.from_rpc(raw, seen_at=time.monotonic())
+        if self.header is not None and header.number < self.header.number:
+            return
+        is_new = self.header is None or header.number > self.header.number
+        self.header = header
+        if not is_new:
+            return
+
+        for listener in list(self.listeners):
+            try:
+                result = listener(header)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                LOGGER.error(f"Head listener failed on {self.network} block {header.number}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            if self.ws_url:
+                try:
+                    await self._subscribe()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    LOGGER.error(f"Head subscription for {self.network} dropped: {e}")
+            # poll over http until the websocket can be retried
+            deadline = time.monotonic() + (30.0 if self.ws_url else float("inf"))
+            while time.monotonic() < deadline:
+                try:
+                    await self.refresh()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    LOGGER.error(f"Head poll for {self.network} failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _subscribe(self) -> None:
+        async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+            await ws.send(
+                json.dumps(
+                    {"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}
+                )
+            )
+            LOGGER.debug(f"Subscribed to new heads on {self.network}")
+            async for message in ws:
+                payload = json.loads(message)
+                if payload.get("method") == "eth_subscription":
+                    await self._publish(payload["params"]["result"])
+                elif "error" in payload:
+                    raise ConnectionError(f"newHeads subscription rejected: {payload['error']}")
+
+
+class ChainHeadRegistry:
+    """
+    Holds one ChainHeadTracker per network.
+    """
+
+    def __init__(self) -> None:
+        self._trackers: Dict[str, ChainHeadTracker] = {}
+
+    def get(self, network: str = "ETH") -> ChainHeadTracker:
+        tracker = self._trackers.get(network)
+        if tracker is None:
+            tracker = ChainHeadTracker(network)
+            self._trackers[network] = tracker
+        return tracker
+
+
+ChainHeads = ChainHeadRegistry()
@@ -0,0 +1,136 @@
+import time
+from typing import Iterable, List, Optional
+
+from lib.RedisClient import get_redis
+
+
+class CheckpointStore:
+    """
+    Keeps copy trade watchers restartable and idempotent through Redis.
+
+    Each watcher saves the last block it fully processed, so after a restart it picks up
+    from there instead of from the latest block. Each watcher also claims every target
+    transaction before mirroring it, so a transaction seen twice (several logs, a mempool
+    copy mined later, a replayed block) is mirrored once.
+
+    A claim is a lease that expires after `lease` seconds. Once the mirror is broadcast,
+    `settle` moves the transaction into a sorted set scored by time, where it stays for
+    `ttl` seconds; a mirror that failed before it was sent gives its lease back instead,
+    and a lease left behind by a crash runs out, so in both cases a replay tries again.
+    """
+
+    def __init__(self, ttl: int = 24 * 60 * 60, lease: int = 120) -> None:
+        """
+        Initializes the store.
+
+        Args:
+            ttl (int, optional): Seconds a processed transaction hash is remembered. Defaults to one day.
+            lease (int, optional): Seconds a claim holds before its mirror must be settled. Defaults to 120.
+        """
+        self.ttl = ttl
+        self.lease = lease
+
+    @staticmethod
+    def _block_key(watcher: str) -> str:
+        return f"copytrade:checkpoint:{watcher}"
+
+    @staticmethod
+    def _seen_key(watcher: str) -> str:
+        return f"copytrade:seen:{watcher}"
+
+    @staticmethod
+    def _lease_key(watcher: str, tx_hash: str) -> str:
+        return f"copytrade:claim:{watcher}:{tx_hash}"
+
+    @staticmethod
+    def _normalize(tx_hash: str) -> str:
+        # evm hashes arrive in either case, solana signatures are case sensitive base58
+        return tx_hash.lower() if tx_hash.startswith("0x") else tx_hash
+
+    async def load(self, watcher: str) -> Optional[int]:
+        """
+        Reads a watcher's checkpoint.
+
+        Args:
+            watcher (str): The watcher name, e.g. the network of a hub scanner.
+
+        Returns:
+            Optional[int]: The last fully processed block, None when the watcher never saved one.
+        """
+        block = await get_redis().get(self._block_key(watcher))
+        return int(block) if block is not None else None
+
+    async def save(self, watcher: str, block: int) -> None:
+        """
+        Saves a watcher's checkpoint, a lower block than the saved one is ignored.
+
+        Args:
+            watcher (str): The watcher name.
+            block (int): The last fully processed block.
+        """
+        redis = get_redis()
+        key = self._block_key(watcher)
+        saved = await redis.get(key)
+        if saved is None or int(saved) < block:
+            await redis.set(key, block, ex=self.ttl * 7)
+
+    async def claim(self, watchers: Iterable[str], tx_hash: str) -> List[bool]:
+        """
+        Leases a transaction for several watchers in one round-trip, see `settle`.
+
+        Args:
+            watchers (Iterable[str]): The watcher names, e.g. the watch ids of a trade's followers.
+            tx_hash (str): The target transaction hash, or signature on Solana.
+
+        Returns:
+            List[bool]: Per watcher, True when this call claimed the transaction and it should be processed.
+        """
+        watchers = list(watchers)
+        if not watchers:
+            return []
+        tx_hash = self._normalize(tx_hash)
+        async with get_redis().pipeline(transaction=True) as pipe:
+            for watcher in watchers:
+                pipe.set(self._lease_key(watcher, tx_hash), 1, nx=True, ex=self.lease)
+                pipe.zscore(self._seen_key(watcher), tx_hash)
+            results = await pipe.execute()
+        # the lease of a settled transaction may have run out, the seen set still has it
+        return [bool(leased) and seen is None for leased, seen in zip(results[::2], results[1::2])]
+
+    async def settle(self, watchers: Iterable[str], tx_hash: str, done: Iterable[bool]) -> None:
+        """
+        Ends the claims of several watchers on a transaction in one round-trip.
+
+        A settled transaction is remembered for `ttl` seconds. Its lease is left to run
+        out rather than deleted, so a claim racing this call still finds one of the two.
+
+        Args:
+            watchers (Iterable[str]): The watcher names passed to `claim`.
+            tx_hash (str): The target transaction hash, or signature on Solana.
+            done (Iterable[bool]): Per watcher, True once its mirror was broadcast or there was nothing
+                to mirror, False to give the claim back so the transaction is tried again.
+        """
+        tx_hash = self._normalize(tx_hash)
+        now = time.time()
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for watcher, is_done in zip(watchers, done):
+                if not is_done:
+                    pipe.delete(self._lease_key(watcher, tx_hash))
+                    continue
+                key = self._seen_key(watcher)
+                pipe.zadd(key, {tx_hash: now})
+                pipe.zremrangebyscore(key, "-inf", now - self.ttl)
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def forget(self, watcher: str) -> None:
+        """
+        Deletes a stopped watcher's checkpoint and claims.
+
+        Args:
+            watcher (str): The watcher name.
+        """
+        await get_redis().delete(self._block_key(watcher), self._seen_key(watcher))
+
+
+Checkpoints = CheckpointStore()
@@ -0,0 +1,452 @@
+import asyncio
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Union
+
+from eth_account import Account
+from hexbytes import HexBytes
+
+from data.Networks import Network, Networks
+from data.Queries import PresetsData, UserCopyTradesTasksData, WalletData
+from lib.CryptoWatcher import SolanaCopyTrader, WsCryptoCopyTrader
+from lib.LatencyMetrics import LatencyTrace
+from lib.Logger import LOGGER
+from lib.BlockScanner import BlockScanner
+from lib.Checkpoint import Checkpoints
+from lib.MempoolStream import PendingTransactionStream
+from lib.SolanaLogStream import SolanaLogStream
+from lib.SolanaSignatures import SolanaSignatures
+from lib.SwapDecoder import SOLANA_SWAP_PROGRAMS, SolanaSwaps
+from models.CopyTradeModel import UserCopyTradesTasks
+from models.Presets import Presets
+from models.UserModel import UserWallet
+
+# blocks a scanner replays from its checkpoint after a restart, older trades are too stale to mirror
+MAX_REPLAY_BLOCKS = 300
+
+
+def watch_key(network: str, address: str) -> str:
+    """
+    Normalizes a target address for the hub's index, EVM addresses are case insensitive and Solana ones are not.
+
+    Args:
+        network (str): The short name of the network.
+        address (str): The address.
+
+    Returns:
+        str: The index key.
+    """
+    return address if network == "SOL" else address.lower()
+
+
+class CopyTradeWatch:
+    """
+    Represents one user following one target address on one network.
+    """
+
+    def __init__(
+        self,
+        watch_id: str,
+        chat_id: int,
+        network: str,
+        target_address: str,
+        private_key: str,
+        mempool: bool = False,
+    ):
+        """
+        Initializes a CopyTradeWatch object.
+
+        Args:
+            watch_id (str): The identifier the user stops the watch with.
+            chat_id (int): The follower's chat id.
+            network (str): The short name of the network.
+            target_address (str): The address being copied.
+            private_key (str): The follower's private key, base58 encoded on Solana.
+            mempool (bool, optional): Mirror the target's pending transactions instead of waiting for them to be mined.
+        """
+
+        self.watch_id = watch_id
+        self.mempool = mempool
+        self.chat_id = chat_id
+        self.network = network
+        self.target_address = watch_key(network, target_address)
+        self.trader: Union[WsCryptoCopyTrader, SolanaCopyTrader]
+        if network == "SOL":
+            # Jupiter signs from the encoded key, the hub passes it through as is
+            self.trader = SolanaCopyTrader(chat_id)
+            self.account = private_key
+        else:
+            self.trader = WsCryptoCopyTrader(chat_id, network)
+            self.account = Account.from_key(private_key)
+
+
+class CopyTradeHub:
+    """
+    Watches every followed address of every user from the bot process.
+
+    An in-memory index maps each network's target addresses to their followers. Each
+    network has one BlockScanner matching the senders of every new block against all
+    targets at once, so a block is fetched and matched once however many addresses are
+    followed, and a matching trade is mirrored for all of its followers as one batch.
+    Watches are added and removed at runtime from the Telegram handlers and restored
+    from Redis when the bot starts.
+
+    Followers who opted into mempool copying are mirrored from a pending transaction
+    stream as soon as the target's swap reaches the mempool, and skipped when the same
+    transaction later shows up mined.
+
+    Every follower claims a trade in Redis before mirroring it, so a trade is mirrored
+    once per follower across mempool copies, replays and restarts. A claim is settled once
+    the mirror is broadcast and given back when it fails before that. Each scanner saves
+    the last block it scanned, held back behind blocks whose mirrors are still being sent,
+    and resumes after it when the bot restarts, so trades mined while the bot was down
+    are still mirrored.
+
+    Solana targets are followed through one SolanaLogStream instead. Their swap signatures
+    are resolved in batches and decoded once per trade, before being fanned out the same way.
+    """
+
+    def __init__(self) -> None:
+        self.watches: Dict[str, CopyTradeWatch] = {}
+        # network -> target address -> watch id -> watch
+        self.index: Dict[str, Dict[str, Dict[str, CopyTradeWatch]]] = {}
+        self.streams: Dict[str, Union[BlockScanner, SolanaLogStream]] = {}
+        self.pending_streams: Dict[str, PendingTransactionStream] = {}
+        self.checkpoints = Checkpoints
+        # network -> block number -> mirror batches of that block not finished yet
+        self._in_flight: Dict[str, Counter] = {}
+
+    async def start(self, application: Any = None) -> None:
+        """
+        Restores the active watches saved in Redis, meant for the Application `post_init` hook.
+
+        Args:
+            application (Any, optional): The telegram Application, unused. Defaults to None.
+        """
+        tasks: List[UserCopyTradesTasks] = await UserCopyTradesTasksData.get_all_copy_trade_tasks() or []
+        for task in tasks:
+            if task.status != 1:
+                continue
+            wallet: Optional[UserWallet] = await WalletData.get_wallet_by_id(task.user_id)
+            if wallet is None:
+                continue
+            network = self.network_for(wallet)
+            preset: Optional[Presets] = await PresetsData.get_presets_by_id(f"{task.user_id}-{wallet.chain_id}")
+            self._add(
+                CopyTradeWatch(
+                    task.copy_trade_id,
+                    task.user_id,
+                    network.sn,
+                    task.watcher_address,
+                    wallet.sol_sec_key if network.sn == "SOL" else wallet.sec_key,
+                    mempool=bool(preset is not None and preset.mempool_copy),
+                )
+            )
+        for network in list(self.index):
+            await self._refresh_stream(network)
+            await self._refresh_pending_stream(network)
+        LOGGER.info(f"Copy trade hub watching {len(self.watches)} follows on {len(self.streams)} networks")
+
+    @staticmethod
+    def network_for(wallet: UserWallet) -> Network:
+        return [network for network in Networks if network.id == wallet.chain_id][0]
+
+    def _add(self, watch: CopyTradeWatch) -> None:
+        self.watches[watch.watch_id] = watch
+        self.index.setdefault(watch.network, {}).setdefault(watch.target_address, {})[watch.watch_id] = watch
+
+    async def add_watch(
+        self, chat_id: int, private_key: str, target_address: str, network: str, mempool: bool = False
+    ) -> str:
+        """
+        Starts copying a target for a user, a user already following the target keeps their watch.
+
+        Args:
+            chat_id (int): The follower's chat id.
+            private_key (str): The follower's private key.
+            target_address (str): The address to copy.
+            network (str): The short name of the network.
+            mempool (bool, optional): Mirror from the mempool, see `set_mempool`. Defaults to False.
+
+        Returns:
+            str: The watch id.
+        """
+        for watch in self.index.get(network, {}).get(watch_key(network, target_address), {}).values():
+            if watch.chat_id == chat_id:
+                return watch.watch_id
+
+        watch = CopyTradeWatch(uuid.uuid4().hex[:16], chat_id, network, target_address, private_key, mempool)
+        is_new_target = watch.target_address not in self.index.get(network, {})
+        self._add(watch)
+        if is_new_target or network not in self.streams:
+            await self._refresh_stream(network)
+        await self._refresh_pending_stream(network)
+        return watch.watch_id
+
+    async def set_mempool(self, chat_id: int, network: str, enabled: bool) -> int:
+        """
+        Switches mempool copying on or off for every watch of a user on a network.
+
+        Args:
+            chat_id (int): The follower's chat id.
+            network (str): The short name of the network.
+            enabled (bool): Whether to mirror pending transactions.
+
+        Returns:
+            int: How many watches were switched.
+        """
+        switched = 0
+        for watch in self.watches.values():
+            if watch.chat_id == chat_id and watch.network == network:
+                watch.mempool = enabled
+                switched += 1
+        await self._refresh_pending_stream(network)
+        return switched
+
+    async def remove_watch(self, watch_id: str, chat_id: Optional[int] = None) -> bool:
+        """
+        Stops a watch.
+
+        Args:
+            watch_id (str): The watch id.
+            chat_id (Optional[int], optional): When given, only a watch owned by this chat is removed.
+                Defaults to None.
+
+        Returns:
+            bool: True when the watch existed and was removed.
+        """
+        watch = self.watches.get(watch_id)
+        if watch is None or (chat_id is not None and watch.chat_id != chat_id):
+            return False
+
+        del self.watches[watch_id]
+        await self.checkpoints.forget(watch_id)
+        followers = self.index[watch.network][watch.target_address]
+        followers.pop(watch_id, None)
+        if not followers:
+            del self.index[watch.network][watch.target_address]
+            await self._refresh_stream(watch.network)
+        await self._refresh_pending_stream(watch.network)
+        return True
+
+    async def _refresh_stream(self, network: str) -> None:
+        stream = self.streams.get(network)
+        if not self.index.get(network):
+            if stream is not None:
+                await stream.stop()
+                del self.streams[network]
+            self.index.pop(network, None)
+            return
+
+        if network == "SOL":
+            if stream is None:
+                stream = SolanaLogStream(self._on_solana_signature, SOLANA_SWAP_PROGRAMS)
+                self.streams[network] = stream
+                stream.start()
+            await stream.set_watched(self.index[network])
+            return
+
+        if stream is None:
+            checkpoint = await self.checkpoints.load(f"hub:{network}")
+            stream = BlockScanner(
+                network,
+                lambda tx, trace, network=network: self._on_transaction(network, tx, trace),
+                routers=WsCryptoCopyTrader.KNOWN_ETH_ROUTERS,
+                from_block=checkpoint + 1 if checkpoint is not None else None,
+                progress=lambda block, network=network: self._save_progress(network, block),
+                max_backlog=MAX_REPLAY_BLOCKS,
+            )
+            self.streams[network] = stream
+            stream.start()
+        stream.set_watched(self.index[network])
+
+    async def _save_progress(self, network: str, block: int) -> None:
+        in_flight = self._in_flight.get(network)
+        if in_flight:
+            # a block whose mirrors are still being sent is scanned again after a restart
+            block = min(block, min(in_flight) - 1)
+        await self.checkpoints.save(f"hub:{network}", block)
+
+    def _has_mempool_follower(self, network: str, sender: str) -> bool:
+        return any(watch.mempool for watch in self.index.get(network, {}).get(sender, {}).values())
+
+    async def _refresh_pending_stream(self, network: str) -> None:
+        # solana swaps are already streamed as soon as they are confirmed, there is no mempool
+        wanted = network != "SOL" and any(
+            watch.mempool for watch in self.watches.values() if watch.network == network
+        )
+        stream = self.pending_streams.get(network)
+        if wanted and stream is None:
+            stream = PendingTransactionStream(
+                network,
+                lambda tx, network=network: self._on_pending(network, tx),
+                lambda sender, network=network: self._has_mempool_follower(network, sender),
+            )
+            self.pending_streams[network] = stream
+            stream.start()
+        elif not wanted and stream is not None:
+            await stream.stop()
+            del self.pending_streams[network]
+
+    async def _on_pending(self, network: str, tx_details: Dict[str, Any]) -> None:
+        trace = LatencyTrace(network)
+        tx_hash = tx_details["hash"]
+        if not WsCryptoCopyTrader.is_router_trade(tx_details):
+            return
+        followers = [
+            watch
+            for watch in self.index.get(network, {}).get(tx_details["from"].lower(), {}).values()
+            if watch.mempool
+        ]
+        # claimed so the mined confirmation of the same transaction is not mirrored twice
+        followers = await self._claim(tx_hash, followers)
+        if not followers:
+            return
+        trace.mark("matched")
+        self._fan_out(network, tx_hash, tx_details, followers, trace)
+
+    async def _on_transaction(self, network: str, tx_details: Dict[str, Any], trace: LatencyTrace) -> None:
+        # the scanner only passes successful router trades sent by a target
+        tx_hash = tx_details["hash"]
+        followers = list(self.index.get(network, {}).get(tx_details["from"].lower(), {}).values())
+        # mempool followers already claimed the transaction when it was pending
+        followers = await self._claim(tx_hash, followers)
+        if not followers:
+            return
+        block = int(tx_details["blockNumber"], 16) if tx_details.get("blockNumber") else None
+        self._fan_out(network, tx_hash, tx_details, followers, trace, block)
+
+    async def _on_solana_signature(self, wallet: str, signature: str, trace: LatencyTrace) -> None:
+        followers = await self._claim(signature, list(self.index.get("SOL", {}).get(wallet, {}).values()))
+        if not followers:
+            return
+        watchers = [watch.watch_id for watch in followers]
+        try:
+            # signatures streamed together are fetched with one batch
+            transaction = await SolanaSignatures.transaction(signature)
+        except Exception:
+            await self.checkpoints.settle(watchers, signature, [False] * len(watchers))
+            raise
+        trace.mark("receipt")
+        swap = SolanaSwaps.decode(transaction, wallet)
+        if swap is None:
+            LOGGER.debug(f"Solana transaction {signature} is not a swap we can copy")
+            await self.checkpoints.settle(watchers, signature, [True] * len(watchers))
+            return
+        self._fan_out("SOL", signature, swap, followers, trace)
+
+    async def _claim(self, tx_hash: str, followers: List[CopyTradeWatch]) -> List[CopyTradeWatch]:
+        """
+        Claims a trade for its followers, keeping the ones that have not mirrored it yet.
+
+        Args:
+            tx_hash (str): The target's transaction hash or signature.
+            followers (List[CopyTradeWatch]): The target's followers.
+
+        Returns:
+            List[CopyTradeWatch]: The followers that should mirror the trade.
+        """
+        if not followers:
+            return []
+        claimed = await self.checkpoints.claim([watch.watch_id for watch in followers], tx_hash)
+        return [watch for watch, is_new in zip(followers, claimed) if is_new]
+
+    def _fan_out(
+        self,
+        network: str,
+        tx_hash: str,
+        tx_details: Any,
+        followers: List[CopyTradeWatch],
+        trace: LatencyTrace,
+        block: Optional[int] = None,
+    ) -> None:
+        LOGGER.info(f"Mirroring {tx_hash} on {network} for {len(followers)} followers")
+        if network == "SOL":
+            # solana traders take the signature and the decoded swap, each sends its own swap
+            mirrors = asyncio.gather(
+                *[
+                    watch.trader.mirror_trade(
+                        tx_hash,
+                        watch.account,
+                        tx_details,
+                        trace.fork(),
+                        settle=lambda done, watch_id=watch.watch_id: self.checkpoints.settle(
+                            [watch_id], tx_hash, done
+                        ),
+                    )
+                    for watch in followers
+                ],
+                return_exceptions=True,
+            )
+        else:
+            # evm followers are sized, signed and broadcast together as one batch
+            watchers = [watch.watch_id for watch in followers]
+            mirrors = asyncio.ensure_future(
+                WsCryptoCopyTrader.mirror_trades(
+                    HexBytes(tx_hash),
+                    tx_details,
+                    [(watch.trader, watch.account) for watch in followers],
+                    [trace.fork() for _ in followers],
+                    settle=lambda done: self.checkpoints.settle(watchers, tx_hash, done),
+                )
+            )
+        if block is not None:
+            self._in_flight.setdefault(network, Counter())[block] += 1
+        # mirrors wait for their own receipts, keep them off the streams so the next block is not held up
+        mirrors.add_done_callback(
+            lambda finished: self._mirrors_done(network, tx_hash, followers, block, finished)
+        )
+
+    def _mirrors_done(
+        self,
+        network: str,
+        tx_hash: str,
+        followers: List[CopyTradeWatch],
+        block: Optional[int],
+        finished: asyncio.Future,
+    ) -> None:
+        """
+        Releases the block a mirror task held and reports the followers whose mirror died with an error.
+
+        The claims of those followers are given back, a follower whose mirror was already
+        broadcast keeps it since settled transactions stay remembered.
+
+        Args:
+            network (str): The short name of the network.
+            tx_hash (str): The target's transaction hash or signature.
+            followers (List[CopyTradeWatch]): The followers the trade was fanned out to.
+            block (Optional[int]): The block of the target's trade, None for pending and Solana trades.
+            finished (asyncio.Future): The finished mirror task.
+        """
+        if block is not None:
+            in_flight = self._in_flight[network]
+            in_flight[block] -= 1
+            if in_flight[block] <= 0:
+                del in_flight[block]
+        if finished.cancelled():
+            # stopped with the bot, the trade is mirrored again when its block is replayed
+            releases = self.checkpoints.settle(
+                [watch.watch_id for watch in followers], tx_hash, [False] * len(followers)
+            )
+            asyncio.ensure_future(releases).add_done_callback(
+                lambda finished: finished.cancelled() or finished.exception()
+            )
+            return
+        if network == "SOL":
+            # gathered with return_exceptions, one result per follower
+            errors = [result if isinstance(result, BaseException) else None for result in finished.result()]
+        else:
+            errors = [finished.exception()] * len(followers)
+        failed = [(watch, error) for watch, error in zip(followers, errors) if error is not None]
+        if not failed:
+            return
+        LOGGER.error(f"Mirroring {tx_hash} on {network} failed for {len(failed)} followers: {failed[0][1]}")
+        reports = asyncio.gather(
+            self.checkpoints.settle([watch.watch_id for watch, _ in failed], tx_hash, [False] * len(failed)),
+            *[watch.trader.report_failure(tx_hash, error) for watch, error in failed],
+            return_exceptions=True,
+        )
+        reports.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+
+CopyTradeWatcher = CopyTradeHub()
@@ -0,0 +1,535 @@
+"""
+Replays recorded blocks through the copy trade pipeline offline, to measure throughput and catch
+missed or duplicated mirrors.
+
+Usage:
+    python -m lib.CopyTradeReplay record --network ETH --start 19000000 --end 19000100 blocks.json
+    python -m lib.CopyTradeReplay run blocks.json --followers 50 --rpc-latency 20
+
+A fixture holds the network, the recorded blocks with their full transactions and,
+optionally, the receipts of the router trades and the targets to follow. It is stored
+as JSON, or as msgpack when the file name ends in `.msgpack` and msgpack is installed.
+
+The replay drives the bot's own code: the BlockScanner matches each block, the
+CopyTradeHub fans trades out and `WsCryptoCopyTrader.mirror_trades` decodes and sizes
+them and builds and fills the mirrors through `ETHWallet.mirror_swaps`. Only the edges
+are stubbed: the JSON-RPC router and the pooled Web3 providers answer from the fixture
+and never reach a node, the follower wallets have
+fixed balances and a 1:1 quote and record their signed transactions instead of
+broadcasting them, receipts are immediate, the Telegram bot keeps its messages and
+trades are claimed in memory instead of Redis.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from eth_account import Account
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+from web3.datastructures import AttributeDict
+from web3.providers import BaseProvider
+from web3.providers.async_base import AsyncBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from data.Networks import Network, Networks
+from lib.BlockScanner import BlockScanner
+from lib.CopyTradeHub import CopyTradeHub, CopyTradeWatch
+from lib.CryptoWatcher import WsCryptoCopyTrader
+from lib.LatencyMetrics import CopyTradeLatency
+from lib.ProviderPool import ProviderPool
+from lib.ReceiptResolver import ReceiptResolvers
+from lib.RpcBatch import JsonRpcBatch
+from lib.RpcRouter import RpcRouters
+from lib.SwapDecoder import SwapDecoders
+from lib.Types import GasQuote
+from lib.WalletClass import ETHWallet
+from models.Presets import Presets
+
+try:
+    import msgpack
+except ImportError:  # msgpack fixtures are optional
+    msgpack = None
+
+# the target trade a batch of mirrors was started for, read by the stub wallet to attribute its transactions
+_current_target: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar(
+    "copy_trade_replay_target", default=None
+)
+
+
+def load_fixture(path: str) -> Dict[str, Any]:
+    """
+    Reads a fixture from a JSON or msgpack file.
+
+    Args:
+        path (str): The file, `.msgpack` files are decoded with msgpack.
+
+    Returns:
+        Dict[str, Any]: The fixture.
+
+    Raises:
+        RuntimeError: A msgpack fixture was given and msgpack is not installed.
+    """
+    if path.endswith(".msgpack"):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, pip install msgpack or use a JSON fixture")
+        with open(path, "rb") as file:
+            return msgpack.unpackb(file.read(), raw=False)
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_fixture(path: str, fixture: Dict[str, Any]) -> None:
+    """
+    Writes a fixture as JSON, or as msgpack when the file name ends in `.msgpack`.
+
+    Args:
+        path (str): The file.
+        fixture (Dict[str, Any]): The fixture.
+    """
+    if path.endswith(".msgpack"):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, pip install msgpack or use a JSON fixture")
+        with open(path, "wb") as file:
+            file.write(msgpack.packb(fixture, use_bin_type=True))
+        return
+    with open(path, "w") as file:
+        json.dump(fixture, file)
+
+
+async def record(network: str, start: int, end: int, path: str, batch_size: int = 10) -> None:
+    """
+    Records a range of blocks and the receipts of their router trades into a fixture.
+
+    Args:
+        network (str): The short name of the network.
+        start (int): The first block.
+        end (int): The last block, included.
+        path (str): The fixture file to write.
+        batch_size (int, optional): Blocks per batch request. Defaults to 10.
+    """
+    router = RpcRouters.get(network)
+    blocks: List[Dict[str, Any]] = []
+    receipts: Dict[str, Any] = {}
+    for first in range(start, end + 1, batch_size):
+        batch = JsonRpcBatch(network)
+        for number in range(first, min(end, first + batch_size - 1) + 1):
+            batch.add("eth_getBlockByNumber", [hex(number), True])
+        fetched = [block for block in await router.batch(batch) if block is not None]
+        blocks.extend(fetched)
+
+        trades = [
+            tx["hash"]
+            for block in fetched
+            for tx in block["transactions"]
+            if WsCryptoCopyTrader.is_router_trade(tx)
+        ]
+        if trades:
+            batch = JsonRpcBatch(network)
+            for tx_hash in trades:
+                batch.add("eth_getTransactionReceipt", [tx_hash])
+            for tx_hash, receipt in zip(trades, await router.batch(batch)):
+                if receipt is not None:
+                    receipts[tx_hash] = {"status": receipt["status"]}
+        print(f"recorded blocks {first}-{min(end, first + batch_size - 1)}")
+
+    save_fixture(path, {"network": network, "blocks": blocks, "receipts": receipts})
+    print(f"saved {len(blocks)} blocks and {len(receipts)} router trade receipts to {path}")
+
+
+class StubRpc:
+    """
+    Answers the scanner's JSON-RPC calls from a fixture, after an optional simulated round-trip.
+    """
+
+    def __init__(self, fixture: Dict[str, Any], latency: float = 0.0) -> None:
+        self.blocks = {int(block["number"], 16): block for block in fixture["blocks"]}
+        self.receipts = fixture.get("receipts") or {}
+        self.latency = latency
+        self.calls = 0
+
+    def _answer(self, method: str, params: List[Any]) -> Any:
+        self.calls += 1
+        if method == "eth_getBlockByNumber":
+            return self.blocks.get(int(params[0], 16))
+        if method == "eth_getTransactionReceipt":
+            # unrecorded receipts count as successful
+            return self.receipts.get(params[0], {"status": "0x1"})
+        raise ValueError(f"{method} is not recorded in the fixture")
+
+    async def request(self, method: str, params: Optional[List[Any]] = None, hedge: bool = True) -> Any:
+        await asyncio.sleep(self.latency)
+        return self._answer(method, params or [])
+
+    async def batch(self, batch: JsonRpcBatch, hedge: bool = True) -> List[Any]:
+        await asyncio.sleep(self.latency)
+        return [self._answer(call["method"], call["params"]) for call in batch.calls]
+
+
+def _stub_response(rpc: StubRpc, method: RPCEndpoint, params: Any) -> RPCResponse:
+    try:
+        return {"jsonrpc": "2.0", "id": 0, "result": rpc._answer(method, list(params or []))}
+    except ValueError as e:
+        return {"jsonrpc": "2.0", "id": 0, "error": {"code": -32601, "message": str(e)}}
+
+
+class StubProvider(BaseProvider):
+    """
+    A Web3 provider answering from the fixture, so a pooled `Web3` never connects to a node.
+    """
+
+    def __init__(self, rpc: StubRpc) -> None:
+        super().__init__()
+        self.rpc = rpc
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return _stub_response(self.rpc, method, params)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class AsyncStubProvider(AsyncBaseProvider):
+    """
+    The `AsyncWeb3` counterpart of StubProvider.
+    """
+
+    def __init__(self, rpc: StubRpc) -> None:
+        super().__init__()
+        self.rpc = rpc
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        await asyncio.sleep(self.rpc.latency)
+        return _stub_response(self.rpc, method, params)
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+@contextlib.contextmanager
+def _stubbed(registry: Dict[str, Any], key: str, stub: Any) -> Iterator[None]:
+    # swaps a per-network registry entry for the replay, None drops it so it is rebuilt from the stubs
+    missing = object()
+    original = registry.get(key, missing)
+    if stub is None:
+        registry.pop(key, None)
+    else:
+        registry[key] = stub
+    try:
+        yield
+    finally:
+        if original is missing:
+            registry.pop(key, None)
+        else:
+            registry[key] = original
+
+
+class StubBot:
+    """
+    Keeps the messages the traders would have sent to Telegram.
+    """
+
+    def __init__(self) -> None:
+        self.messages: List[Dict[str, Any]] = []
+
+    async def send_message(self, **kwargs: Any) -> None:
+        self.messages.append(kwargs)
+
+
+class StubResolver:
+    """
+    Resolves every mirror receipt straight away as successful.
+    """
+
+    async def wait(self, tx_hash: Any, **kwargs: Any) -> AttributeDict:
+        return AttributeDict({"transactionHash": tx_hash, "status": 1})
+
+
+class StubNonces:
+    async def mark_mined(self, address: str, nonce: int) -> None:
+        pass
+
+    async def release(self, address: str, nonce: int) -> None:
+        pass
+
+
+class StubCheckpoints:
+    """
+    Keeps the claimed trades in memory instead of Redis.
+    """
+
+    def __init__(self) -> None:
+        self.claimed: Set[Tuple[str, str]] = set()
+
+    async def claim(self, watchers: List[str], tx_hash: str) -> List[bool]:
+        claimed = []
+        for watcher in watchers:
+            claimed.append((watcher, tx_hash) not in self.claimed)
+            self.claimed.add((watcher, tx_hash))
+        return claimed
+
+    async def settle(self, watchers: List[str], tx_hash: str, done: List[bool]) -> None:
+        for watcher, is_done in zip(watchers, done):
+            if not is_done:
+                self.claimed.discard((watcher, tx_hash))
+
+
+class StubRouter:
+    """
+    A router with the real address.
+    """
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+
+
+class StubWallet:
+    """
+    The followers' wallet with fixed balances and a one to one quote.
+
+    It signs the mirrors locally and records them instead of sending them.
+
+    `mirror_swaps` is the real `ETHWallet.mirror_swaps`, so templates are built and filled exactly as in production.
+    """
+
+    mirror_swaps = ETHWallet.mirror_swaps
+
+    def __init__(self, network: Network, router: str, balance: int, mirrors: List[Tuple[str, str, str]]) -> None:
+        self.network = network
+        self.chain = network.id
+        self.uniswap_router = StubRouter(router)
+        self.balance = balance
+        self.mirrors = mirrors
+        self.nonces = StubNonces()
+        self._nonces: Counter = Counter()
+
+    async def get_eth_balances(self, addresses: List[str]) -> List[int]:
+        return [self.balance] * len(addresses)
+
+    async def get_amounts_out(self, amounts: List[int], path: List[str]) -> List[int]:
+        return list(amounts)
+
+    async def get_token_balances(self, pairs: List[Tuple[str, str]], spender: Optional[str] = None) -> List[Any]:
+        return [
+            AttributeDict({"owner": owner, "token": token, "balance": self.balance, "allowance": 2**256 - 1})
+            for owner, token in pairs
+        ]
+
+    async def approve_max(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    async def get_signing_context(self, address: str, urgency: str = "normal", presets: Any = None) -> Dict[str, Any]:
+        self._nonces[address] += 1
+        return {
+            "nonce": self._nonces[address],
+            "timestamp": int(time.time()),
+            "gas": GasQuote(max_fee_per_gas=30 * 10**9, max_priority_fee_per_gas=10**9),
+        }
+
+    async def broadcast_many(
+        self, sender_accounts: List[Any], transactions: List[Dict[str, Any]], traces: Optional[List[Any]] = None
+    ) -> List[Any]:
+        hashes = []
+        traces = traces or [None] * len(transactions)
+        for sender_account, transaction, trace in zip(sender_accounts, transactions, traces):
+            signed = Account.sign_transaction(transaction, sender_account.key)
+            if trace is not None:
+                trace.mark("signed")
+                trace.mark("broadcast")
+            self.mirrors.append((_current_target.get() or "", sender_account.address, signed.hash.hex()))
+            hashes.append(signed.hash)
+        return hashes
+
+
+async def replay(
+    fixture: Dict[str, Any],
+    followers_per_target: int = 10,
+    targets: Optional[List[str]] = None,
+    rpc_latency: float = 0.0,
+    balance: int = 10**18,
+) -> Dict[str, Any]:
+    """
+    Replays a fixture's blocks through the copy trade pipeline and checks every expected mirror happened once.
+
+    The network's RPC router, receipt resolver and pooled Web3 providers are swapped for
+    stubs answering from the fixture while the replay runs and put back afterwards, so a
+    replay needs no node.
+
+    Args:
+        fixture (Dict[str, Any]): The fixture, see `load_fixture`.
+        followers_per_target (int, optional): Generated followers per target. Defaults to 10.
+        targets (Optional[List[str]], optional): The addresses to follow. Defaults to the fixture's
+            `targets`, or every sender of a router trade in the blocks.
+        rpc_latency (float, optional): Seconds each stubbed RPC round-trip takes. Defaults to 0.0.
+        balance (int, optional): Each follower's balance of every token, in its smallest unit. Defaults to 10**18.
+
+    Returns:
+        Dict[str, Any]: The report: counts, duration, trades per second, missed and duplicated mirrors.
+    """
+    network_sn = fixture["network"]
+    stub_rpc = StubRpc(fixture, rpc_latency)
+    with contextlib.ExitStack() as stubs:
+        for registry, stub in [
+            (RpcRouters._routers, stub_rpc),
+            (ReceiptResolvers._resolvers, StubResolver()),
+            (ProviderPool._providers, Web3(StubProvider(stub_rpc))),
+            (ProviderPool._async_providers, AsyncWeb3(AsyncStubProvider(stub_rpc))),
+            (ProviderPool._routers, None),
+            (ProviderPool._async_routers, None),
+        ]:
+            stubs.enter_context(_stubbed(registry, network_sn, stub))
+        return await _replay(fixture, stub_rpc, followers_per_target, targets, balance)
+
+
+async def _replay(
+    fixture: Dict[str, Any],
+    stub_rpc: StubRpc,
+    followers_per_target: int,
+    targets: Optional[List[str]],
+    balance: int,
+) -> Dict[str, Any]:
+    network_sn = fixture["network"]
+    network = [network for network in Networks if network.sn == network_sn][0]
+    router_trades = [
+        tx for block in fixture["blocks"] for tx in block["transactions"] if WsCryptoCopyTrader.is_router_trade(tx)
+    ]
+    targets = [target.lower() for target in targets or fixture.get("targets") or {tx["from"] for tx in router_trades}]
+
+    hub = CopyTradeHub()
+    hub.checkpoints = StubCheckpoints()
+    bot = StubBot()
+    mirrors: List[Tuple[str, str, str]] = []
+    router_address = ETHWallet(network_sn).uniswap_router.address
+    preset = Presets(id="replay", chain_id=str(network.id), chain_name=network.name, balance_tradable=0.25)
+
+    wallet = StubWallet(network, router_address, balance, mirrors)
+
+    async def get_presets() -> Presets:
+        return preset
+
+    for target in targets:
+        for _ in range(followers_per_target):
+            account = Account.create()
+            watch = CopyTradeWatch(account.address, 0, network_sn, target, account.key.hex())
+            trader = watch.trader
+            trader.bot = bot
+            trader.get_presets = get_presets
+            trader.eth_wallet = wallet
+            hub._add(watch)
+
+    fan_out = hub._fan_out
+
+    def attributed(network: str, tx_hash: str, *args: Any) -> None:
+        # the mirror task copies the current context when it is created
+        _current_target.set(HexBytes(tx_hash).hex())
+        fan_out(network, tx_hash, *args)
+
+    hub._fan_out = attributed
+
+    # every follower of a target should mirror each of its successful, decodable router trades once
+    decoder = SwapDecoders.get(network_sn)
+    expected: Set[Tuple[str, str]] = {
+        (HexBytes(tx["hash"]).hex(), watch.account.address)
+        for tx in router_trades
+        if tx["from"].lower() in hub.index.get(network_sn, {})
+        and int(stub_rpc.receipts.get(tx["hash"], {"status": "0x1"})["status"], 16) == 1
+        and decoder.decode(tx) is not None
+        for watch in hub.index[network_sn][tx["from"].lower()].values()
+    }
+
+    scanner = BlockScanner(
+        network_sn,
+        lambda tx, trace: hub._on_transaction(network_sn, tx, trace),
+        routers=WsCryptoCopyTrader.KNOWN_ETH_ROUTERS,
+        from_block=min(stub_rpc.blocks),
+    )
+    scanner.set_watched(hub.index.get(network_sn, {}))
+
+    started = time.perf_counter()
+    for number in sorted(stub_rpc.blocks):
+        await scanner._catch_up(number, time.monotonic())
+    current = asyncio.current_task()
+    await asyncio.gather(*[task for task in asyncio.all_tasks() if task is not current], return_exceptions=True)
+    duration = time.perf_counter() - started
+
+    counts = Counter((target, follower) for target, follower, _ in mirrors)
+    mirrored = set(counts)
+    failures = [message for message in bot.messages if "error copying" in message.get("text", "")]
+    return {
+        "blocks": len(stub_rpc.blocks),
+        "transactions": sum(len(block["transactions"]) for block in fixture["blocks"]),
+        "targets": len(targets),
+        "followers": len(hub.watches),
+        "expected_mirrors": len(expected),
+        "mirrors": len(mirrors),
+        "failed_mirrors": len(failures),
+        "rpc_calls": stub_rpc.calls,
+        "duration": duration,
+        "trades_per_second": len(mirrors) / duration if duration else 0.0,
+        "missed": sorted(expected - mirrored),
+        "duplicated": sorted(key for key, count in counts.items() if count > 1),
+        "unexpected": sorted(mirrored - expected),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """
+    Prints a replay report with the stage latencies recorded during the replay.
+
+    Args:
+        report (Dict[str, Any]): The report returned by `replay`.
+    """
+    print(f"blocks            {report['blocks']}")
+    print(f"transactions      {report['transactions']}")
+    print(f"targets           {report['targets']}")
+    print(f"followers         {report['followers']}")
+    print(f"rpc calls         {report['rpc_calls']}")
+    print(f"expected mirrors  {report['expected_mirrors']}")
+    print(f"mirrors           {report['mirrors']}")
+    print(f"failed mirrors    {report['failed_mirrors']}")
+    print(f"duration          {report['duration']:.3f}s")
+    print(f"trades per second {report['trades_per_second']:.1f}")
+    for name in ["missed", "duplicated", "unexpected"]:
+        print(f"{name:<17} {len(report[name])}")
+        for tx_hash, follower in report[name][:10]:
+            print(f"  {tx_hash} {follower}")
+    print()
+    print(CopyTradeLatency.summary())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record blocks and replay them through the copy trade pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record blocks from the network's RPC into a fixture")
+    record_parser.add_argument("--network", default="ETH")
+    record_parser.add_argument("--start", type=int, required=True)
+    record_parser.add_argument("--end", type=int, required=True)
+    record_parser.add_argument("fixture")
+
+    run_parser = commands.add_parser("run", help="replay a fixture and report throughput and correctness")
+    run_parser.add_argument("fixture")
+    run_parser.add_argument("--followers", type=int, default=10, help="followers generated per target")
+    run_parser.add_argument("--target", action="append", help="address to follow, repeatable")
+    run_parser.add_argument("--rpc-latency", type=float, default=0.0, help="simulated RPC round-trip in milliseconds")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(record(args.network, args.start, args.end, args.fixture))
+        return
+
+    report = asyncio.run(
+        replay(load_fixture(args.fixture), args.followers, args.target, args.rpc_latency / 1000)
+    )
+    print_report(report)
+    if report["missed"] or report["duplicated"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,49 @@
 import asyncio
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from eth_account import Account
+from hexbytes import HexBytes
 from telegram import Bot
 from web3 import Web3
 from solders.pubkey import Pubkey  # type: ignore
-from web3.middleware import geth_poa_middleware
 from data.Networks import Network, Networks
-from data.Queries import PresetsData, WalletData
-from lib.GetDotEnv import (
-    AVALANCHE_HTTP_URL,
-    BSC_HTTP_URL,
-    INFURA_HTTP_URL,
-    INFURA_WS_URL,
-    POLYGON_HTTP_URL,
-    TOKEN,
-)
+from data.Queries import PresetsData
+from lib.Checkpoint import Checkpoints
+from lib.GetDotEnv import TOKEN
+from lib.LatencyMetrics import LatencyTrace
 from lib.Logger import LOGGER
-from lib.TokenMetadata import TokenMetadata
+from lib.ProviderPool import ProviderPool, SolanaPool
+from lib.LogStream import TRANSFER_TOPIC, LogStream, address_topic
+from lib.ReceiptResolver import ReceiptResolvers
+from lib.RpcRouter import RpcRouters
+from lib.SolanaSignatures import SolanaSignatures
+from lib.SwapDecoder import SOL_MINT, SwapDecoders
+from lib.Types import DecodedSwap
 from lib.WalletClass import ETHWallet, SolanaWallet
 from models.Presets import Presets
-from models.UserModel import UserWallet
 from telegram_commands.commands.Buttons import setKeyboard, auth_start_buttons
 
+# told per follower whether a claimed trade is done with, see `Checkpoints.settle`
+ClaimSettler = Callable[[List[bool]], Awaitable[None]]
+
+
+async def settle_claims(settle: Optional[ClaimSettler], done: List[bool]) -> None:
+    """
+    Hands the outcome of claimed mirrors to the claimant, logging instead of raising.
+
+    Args:
+        settle (Optional[ClaimSettler]): The claimant's callback, None when nothing was claimed.
+        done (List[bool]): Per follower, True once the mirror was broadcast or there was nothing
+            to mirror, False when it failed before it was sent.
+    """
+    if settle is None:
+        return
+    try:
+        await settle(done)
+    except Exception as e:
+        LOGGER.error(f"Could not settle copy trade claims: {e}")
+
 bot = Bot(TOKEN)
 
 
@@ -29,12 +52,12 @@ class HttpCryptoCopyTrader:
     Class to watch and copy trades from a target address using HTTP connection.
     """
 
-    def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(INFURA_HTTP_URL))
-        self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        if not self.w3.is_connected():
-            LOGGER.error("Connection Error")
-            raise Exception("Unable to connect to the RPC network")
+    @property
+    def w3(self) -> Web3:
+        """
+        The pooled Ethereum provider, connected the first time a trade is watched rather than on import.
+        """
+        return ProviderPool.get_web3("ETH")
 
     async def watch_trades(
         self, watcher_private_key: str, target_address: str, poll_interval: int = 10
@@ -54,7 +77,9 @@ class HttpCryptoCopyTrader:
                 async for tx in self.w3.eth.filter(
                     {"from": target_address}
                 ).get_new_entries():
-                    tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx["hash"])
+                    tx_receipt = await ReceiptResolvers.get("ETH").wait(
+                        tx["hash"], check_now=True
+                    )
                     if (
                         tx_receipt.status == 1
                     ):  # Check if the transaction was successful
@@ -102,20 +127,16 @@ class HttpCryptoCopyTrader:
 
     async def wait_for_receipt(self, tx_hash: str) -> None:
         """
-        Wait for the transaction receipt.
+        Wait for the transaction receipt, resolved by the chain's shared receipt resolver.
 
         Args:
             tx_hash (str): The transaction hash.
         """
-        while True:
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-            if receipt:
-                if receipt.status == 1:
-                    LOGGER.info(f"Transaction {tx_hash.hex()} confirmed successfully.")
-                else:
-                    LOGGER.error(f"Transaction {tx_hash.hex()} failed.")
-                break
-            await asyncio.sleep(1)
+        receipt = await ReceiptResolvers.get("ETH").wait(tx_hash)
+        if receipt.status == 1:
+            LOGGER.info(f"Transaction {tx_hash.hex()} confirmed successfully.")
+        else:
+            LOGGER.error(f"Transaction {tx_hash.hex()} failed.")
 
 
 class WsCryptoCopyTrader:
@@ -125,20 +146,26 @@ class WsCryptoCopyTrader:
 
     UNISWAP_ROUTER_ADDRESS = "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D"
     PANCAKESWAP_ROUTER_ADDRESS = "0xEfF92A263d31888d860bD50809A8D171709b7b1c"
-    KNOWN_ETH_ROUTERS = [
-        UNISWAP_ROUTER_ADDRESS,
-        PANCAKESWAP_ROUTER_ADDRESS,
-        "0x4752ba5DBc23f44D87826276BF6Fd6b1C372aD24",
-        "0xedf6066a2b290C185783862C7F4776A2C8077AD1",
-        "0x10ED43C718714eb63d5aA57B78B54704E256024E",
-        "0x8cFe327CEc66d1C090Dd72bd0FF11d690C33a2Eb",
-        "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506",
-        "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F",
-        "0x6BDED42c6DA8FBf0d2bA55B2fa120C5e0c8D7891",
-        "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506",
-        "0x60aE616a2155Ee3d9A68541Ba4544862310933d4",
-        "0x89Fa1974120d2a7F83a0cb80df3654721c6a38Cd",
-    ]
+    # lower case so a transaction's `to` is checked with one hash lookup, no checksumming
+    KNOWN_ETH_ROUTERS = frozenset(
+        address.lower()
+        for address in (
+            UNISWAP_ROUTER_ADDRESS,
+            PANCAKESWAP_ROUTER_ADDRESS,
+            "0x4752ba5DBc23f44D87826276BF6Fd6b1C372aD24",
+            "0xedf6066a2b290C185783862C7F4776A2C8077AD1",
+            "0x10ED43C718714eb63d5aA57B78B54704E256024E",
+            "0x8cFe327CEc66d1C090Dd72bd0FF11d690C33a2Eb",
+            "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506",
+            "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F",
+            "0x6BDED42c6DA8FBf0d2bA55B2fa120C5e0c8D7891",
+            "0x60aE616a2155Ee3d9A68541Ba4544862310933d4",
+            "0x89Fa1974120d2a7F83a0cb80df3654721c6a38Cd",
+            # uniswap universal routers
+            "0x3fC91A3afd70395Cd496C647d5a6CC9D4B2b7FAD",
+            "0xEf1c6E67703c7BD7107eed8303Fbe6EC2554BF6B",
+        )
+    )
     """
     uniswap: for ethereum main net and polygon
     pancakeswap: for binance smart chain
@@ -146,191 +173,521 @@ class WsCryptoCopyTrader:
     jupiter sdk: for solana
     """
 
+    @classmethod
+    def is_router_trade(cls, tx_details: dict) -> bool:
+        """
+        Checks whether a transaction was sent to one of the known DEX routers.
+
+        Args:
+            tx_details (dict): The transaction as returned by `eth_getTransactionByHash`.
+
+        Returns:
+            bool: True for router trades.
+        """
+        if tx_details.get("to") is None:
+            return False
+        return tx_details["to"].lower() in cls.KNOWN_ETH_ROUTERS
+
+    # seconds a follower's presets are reused between mirrors
+    PRESETS_TTL = 60.0
+
     def __init__(self, chat_id: int, network: str = "ETH"):
-        provider = INFURA_HTTP_URL
-        if network == "ETH":
-            provider = INFURA_HTTP_URL
-        elif network == "BSC":
-            provider = BSC_HTTP_URL
-        elif network == "POL":
-            provider = POLYGON_HTTP_URL
-        elif network == "AVL":
-            provider = AVALANCHE_HTTP_URL
-        self.w3 = Web3(Web3.HTTPProvider(f"{provider}"))
-        self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
         self.bot = bot
         self.network_sn = network
         self.chat_id = chat_id
-        if not self.w3.is_connected():
-            LOGGER.error("Connection Error")
-            raise Exception("Unable to connect to the RPC network")
+        self.network: Network = [
+            network for network in Networks if network.sn == self.network_sn
+        ][0]
+        self.eth_wallet = ETHWallet(network)
+        self._presets: Optional[Presets] = None
+        self._presets_loaded_at: Optional[float] = None
+
+    async def get_presets(self) -> Optional[Presets]:
+        """
+        Returns the follower's presets for this network, read from Redis at most once per PRESETS_TTL.
+
+        Returns:
+            Optional[Presets]: The presets, None when the follower has not saved any.
+        """
+        now = time.monotonic()
+        if self._presets_loaded_at is None or now - self._presets_loaded_at > self.PRESETS_TTL:
+            self._presets = await PresetsData.get_presets_by_id(
+                f"{self.chat_id}-{self.network.id}"
+            )
+            self._presets_loaded_at = now
+        return self._presets
 
     async def copytrade(
         self,
         watcher_private_key: str,
         target_address: str,
         chain_id: int = 1,
-        poll_interval: float = 10.0,
     ) -> None:
         """
         Watch for trades from the target_address and mirror them in the watcher wallet.
 
+        The target's token transfers are streamed with `eth_subscribe("logs")`, so a trade is
+        seen as soon as its block propagates. Blocks missed while reconnecting are backfilled,
+        and the last streamed block is saved in Redis so a restarted task resumes after it.
+        Each trade is claimed in Redis before it is mirrored, so it is mirrored once even
+        when its blocks are streamed again.
+
         Args:
             watcher_private_key (str): The private key of the watcher wallet.
             target_address (str): The address to watch for trades.
-            poll_interval (float): Polling interval in seconds. Default is 10 seconds.
         """
         LOGGER.debug(f"Private Key: {watcher_private_key}")
         LOGGER.debug(f"Address: {target_address}")
-        LOGGER.debug(f"Poll Interval: {poll_interval}")
 
-        watcher_account = self.w3.eth.account.from_key(watcher_private_key)
+        watcher_account = Account.from_key(watcher_private_key)
         LOGGER.debug(f"Watcher Account: {watcher_account.address}")
+        checkpoint_name = f"{self.network_sn}:{target_address.lower()}:{watcher_account.address.lower()}"
+        checkpoint = await Checkpoints.load(checkpoint_name)
+        seen_tx_hashes: "OrderedDict[str, None]" = OrderedDict()
 
         async def handle_event(event: dict) -> None:
+            trace = LatencyTrace(self.network_sn)
             tx_hash = event["transactionHash"]
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            # a swap moves several tokens, mirror the transaction once
+            if tx_hash in seen_tx_hashes:
+                return
+            seen_tx_hashes[tx_hash] = None
+            if len(seen_tx_hashes) > 1000:
+                seen_tx_hashes.popitem(last=False)
+
+            # logs are only emitted by successful transactions, no receipt is needed
             LOGGER.debug(f"Transaction Hash: {tx_hash}")
-            LOGGER.debug(f"Transaction Receipt Status: {tx_receipt.status}")
-            if tx_receipt.status == 1:  # Check if the transaction was successful
-                tx_details = self.w3.eth.get_transaction(tx_hash)
-                LOGGER.debug(f"Transaction Details: {tx_details}")
-                if tx_details["to"] in self.KNOWN_ETH_ROUTERS:
-                    LOGGER.debug("Transaction is to a known router")
-                    await self.mirror_trade(tx_hash, watcher_account)
-
-        event_filter = self.w3.eth.filter(
-            {"fromBlock": "latest", "address": target_address}
-        )
-        LOGGER.debug("Event filter created")
+            tx_details = await RpcRouters.get(self.network_sn).request(
+                "eth_getTransactionByHash", [tx_hash]
+            )
+            LOGGER.debug(f"Transaction Details: {tx_details}")
+            if (
+                tx_details is not None
+                and tx_details["from"].lower() == target_address.lower()
+                and self.is_router_trade(tx_details)
+            ):
+                LOGGER.debug("Transaction is to a known router")
+                if not (await Checkpoints.claim([checkpoint_name], tx_hash))[0]:
+                    LOGGER.debug(f"Transaction {tx_hash} was already mirrored")
+                    return
+                trace.mark("matched")
+                await self.mirror_trade(
+                    HexBytes(tx_hash),
+                    watcher_account,
+                    tx_details,
+                    trace,
+                    settle=lambda done: Checkpoints.settle([checkpoint_name], tx_hash, done),
+                )
 
-        while True:
-            LOGGER.debug("Polling for new events")
-            for event in event_filter.get_new_entries():
-                LOGGER.debug(f"New event found: {event}")
-                await handle_event(event)
-            await asyncio.sleep(poll_interval)
+        # tokens leaving the target (sells) and arriving at it (buys)
+        target_topic = address_topic(target_address)
+        stream = LogStream(
+            self.network_sn,
+            [
+                {"topics": [TRANSFER_TOPIC, target_topic]},
+                {"topics": [TRANSFER_TOPIC, None, target_topic]},
+            ],
+            handle_event,
+            from_block=checkpoint + 1 if checkpoint is not None else None,
+            progress=lambda block: Checkpoints.save(checkpoint_name, block),
+        )
+        LOGGER.debug("Log subscription created")
+        await stream.start()
 
-    async def mirror_trade(self, tx_hash: str, watcher_account: any) -> None:
+    async def mirror_trade(
+        self,
+        tx_hash: str,
+        watcher_account: any,
+        tx_details: Optional[dict] = None,
+        trace: Optional[LatencyTrace] = None,
+        settle: Optional[ClaimSettler] = None,
+    ) -> None:
         """
         Perform the same trade in the watcher wallet.
 
+        The target's router calldata is decoded to find the tokens and direction of the
+        swap, and the watcher sends the same swap sized by its `balance_tradable` preset:
+        that share of the native balance on buys, of the sold token's balance otherwise.
+
         Args:
             tx_hash (str): The transaction hash.
             watcher_account (Web3.eth.account): The watcher account object.
+            tx_details (Optional[dict]): The target transaction when the caller already fetched it.
+            trace (Optional[LatencyTrace]): The latency trace started when the target trade was seen,
+                finished once the mirror confirms or fails.
+            settle (Optional[ClaimSettler]): Told whether the claimed trade is done with once the mirror
+                was sent or abandoned, before its receipt is awaited.
         """
+        trace = trace or LatencyTrace(self.network_sn)
         try:
             # Extract details from the target transaction
-            tx_details = self.w3.eth.get_transaction(tx_hash)
-            token_address = tx_details["to"]
-            amount = tx_details["value"]
-
-            wallet: UserWallet = await WalletData.get_wallet_by_id(self.chat_id)
-            network: Network = [
-                network for network in Networks if network.sn == self.network_sn
-            ][0]
-            preset: Optional[Presets] = await PresetsData.get_presets_by_id(
-                self.chat_id
+            tx_details = tx_details or await RpcRouters.get(self.network_sn).request(
+                "eth_getTransactionByHash", [Web3.to_hex(HexBytes(tx_hash))]
             )
+            if tx_details is None:
+                raise ValueError(f"Transaction {Web3.to_hex(HexBytes(tx_hash))} was not found")
+            swap = SwapDecoders.get(self.network_sn).decode(tx_details)
+            if swap is None:
+                LOGGER.debug(f"Transaction {tx_hash.hex()} is not a swap we can copy")
+                await settle_claims(settle, [True])
+                return
+
+            preset = await self.get_presets()
             tradable_percentage = (
                 preset.balance_tradable if preset is not None else 0.25
             )
 
-            if network.name == "solana":
-                await self.bot.send_message(
-                    chat_id=self.chat_id,
-                    text="We do not copy trade with solana wallet for now",
-                    reply_markup=setKeyboard(auth_start_buttons),
-                    parse_mode="HTML",
+            eth_wallet = self.eth_wallet
+            if swap.native_in:
+                balance = await eth_wallet.w3.eth.get_balance(watcher_account.address)
+            else:
+                # raw balance straight from the token contract in one multicall
+                balance = (
+                    await eth_wallet.get_token_balances(
+                        [(watcher_account.address, swap.token_in)]
+                    )
+                )[0].balance or 0
+            amount = int(balance * tradable_percentage)
+            trace.mark("metadata")
+            if amount == 0:
+                LOGGER.info(
+                    f"Nothing to mirror for {self.chat_id}, no {swap.token_in} balance"
                 )
-                await self.wait_for_receipt("error")
+                await settle_claims(settle, [True])
+                return
 
-
-            balance = await ETHWallet(network.sn).get_token_balance(
-                watcher_account.address, token_address
+            mirror_hash, nonce = await eth_wallet.mirror_swap(
+                watcher_account, swap, amount, preset, urgency="copy", trace=trace
             )
+            LOGGER.info(f"Mirrored transaction sent: {mirror_hash.hex()}")
+        except Exception as e:
+            await settle_claims(settle, [False])
+            await self.report_failure(tx_hash, e)
+            return
+        await settle_claims(settle, [True])
+        await self.confirm_mirror(swap, amount, mirror_hash, nonce, watcher_account, trace)
+
+    @classmethod
+    async def mirror_trades(
+        cls,
+        tx_hash: HexBytes,
+        tx_details: dict,
+        followers: List[Tuple["WsCryptoCopyTrader", Any]],
+        traces: List[LatencyTrace],
+        settle: Optional[ClaimSettler] = None,
+    ) -> None:
+        """
+        Perform the same trade for every follower of a target on one network, as a single batch.
 
-            token_metadata = await TokenMetadata().get_token_symbol_by_contract(
-                token_address
+        The swap is decoded once, every follower's balance of the sold token is read in one
+        multicall and the amounts are sized from the `balance_tradable` presets in one pass.
+        The mirrors are then quoted, signed and broadcast together through
+        `ETHWallet.mirror_swaps`, so the last follower's mirror leaves a few milliseconds after
+        the first instead of one pipeline of round-trips per follower behind it.
+
+        Args:
+            tx_hash (HexBytes): The target's transaction hash.
+            tx_details (dict): The target's transaction.
+            followers (List[Tuple[WsCryptoCopyTrader, Any]]): Each follower's trader and local account.
+            traces (List[LatencyTrace]): Each follower's latency trace.
+            settle (Optional[ClaimSettler]): Told which followers are done with the claimed trade once
+                the mirrors were sent or abandoned, before their receipts are awaited.
+        """
+        traders = [trader for trader, _ in followers]
+        accounts = [account for _, account in followers]
+        network_sn = traders[0].network_sn
+        swap = SwapDecoders.get(network_sn).decode(tx_details)
+        if swap is None:
+            LOGGER.debug(f"Transaction {tx_hash.hex()} is not a swap we can copy")
+            await settle_claims(settle, [True] * len(followers))
+            return
+
+        # one wallet reads and sends for every follower, its providers are shared per chain anyway
+        eth_wallet = traders[0].eth_wallet
+        try:
+            presets = await asyncio.gather(*[trader.get_presets() for trader in traders])
+            addresses = [account.address for account in accounts]
+            if swap.native_in:
+                balances = await eth_wallet.get_eth_balances(addresses)
+            else:
+                balances = [
+                    balance.balance or 0
+                    for balance in await eth_wallet.get_token_balances(
+                        [(address, swap.token_in) for address in addresses]
+                    )
+                ]
+        except Exception as e:
+            await settle_claims(settle, [False] * len(followers))
+            await asyncio.gather(*[trader.report_failure(tx_hash, e) for trader in traders])
+            return
+
+        amounts = [
+            int(balance * (preset.balance_tradable if preset is not None else 0.25))
+            for balance, preset in zip(balances, presets)
+        ]
+        for trace in traces:
+            trace.mark("metadata")
+        active = [index for index, amount in enumerate(amounts) if amount > 0]
+        if len(active) < len(amounts):
+            LOGGER.info(
+                f"Nothing to mirror for {len(amounts) - len(active)} followers, no {swap.token_in} balance"
             )
-            # Build and send the transaction
-            amount = (
-                balance * tradable_percentage
-            ) * 10**token_metadata.decimal.ethereum
-            nonce = self.w3.eth.get_transaction_count(watcher_account.address)
-            gas_price = self.w3.eth.gas_price
+        if not active:
+            await settle_claims(settle, [True] * len(followers))
+            return
+
+        results = await eth_wallet.mirror_swaps(
+            [accounts[index] for index in active],
+            swap,
+            [amounts[index] for index in active],
+            [presets[index] for index in active],
+            urgency="copy",
+            traces=[traces[index] for index in active],
+        )
+        LOGGER.info(f"Mirrored {tx_hash.hex()} for {len(active)} followers on {network_sn}")
+        done = [True] * len(followers)
+        for index, result in zip(active, results):
+            done[index] = not isinstance(result, Exception)
+        await settle_claims(settle, done)
+        outcomes = []
+        for index, result in zip(active, results):
+            trader = traders[index]
+            if isinstance(result, Exception):
+                outcomes.append(trader.report_failure(tx_hash, result))
+                continue
+            mirror_hash, nonce = result
+            outcomes.append(
+                trader.confirm_mirror(swap, amounts[index], mirror_hash, nonce, accounts[index], traces[index])
+            )
+        await asyncio.gather(*outcomes, return_exceptions=True)
 
-            tx_data = {
-                "nonce": nonce,
-                "to": token_address,
-                "value": amount,
-                "gas": 21000,
-                "gasPrice": gas_price,
-                "chainId": self.w3.eth.chain_id,
-            }
+    async def confirm_mirror(
+        self,
+        swap: DecodedSwap,
+        amount: int,
+        mirror_hash: HexBytes,
+        nonce: int,
+        watcher_account: Any,
+        trace: LatencyTrace,
+    ) -> None:
+        """
+        Waits for a sent mirror to be mined and tells the follower how it went.
 
-            signed_tx = self.w3.eth.account.sign_transaction(
-                tx_data, watcher_account.key
+        Args:
+            swap (DecodedSwap): The target's swap.
+            amount (int): The amount the follower sold.
+            mirror_hash (HexBytes): The mirror's transaction hash.
+            nonce (int): The mirror's nonce.
+            watcher_account (Any): The follower's local account.
+            trace (LatencyTrace): The latency trace, finished once the mirror confirms.
+        """
+        try:
+            receipt = await ReceiptResolvers.get(self.network_sn).wait(
+                mirror_hash, sender=watcher_account.address, nonce=nonce
             )
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-
-            LOGGER.info(f"Mirrored transaction sent: {tx_hash.hex()}")
-            await self.wait_for_receipt(tx_hash)
+            trace.mark("confirmed")
+            trace.finish()
+            await self.eth_wallet.nonces.mark_mined(watcher_account.address, nonce)
+            status = "✅" if receipt.status == 1 else "❌"
 
             # send transaction information to user
             copy_message = f"""
-<b>COPY TRADE RESULT</b>
+<b>COPY TRADE RESULT</b> {status}
 ------------------------
 <code>
-AMOUNT      | {amount}
-TO          | {token_address}
+SIDE        | {swap.side.upper()}
+AMOUNT IN   | {amount}
+TOKEN IN    | {swap.token_in}
+TOKEN OUT   | {swap.token_out}
 </code>
-🔗 <a href="https://etherscan.io/tx/{tx_hash.hex()}">Transaction Hash</a>
+🔗 <a href="https://etherscan.io/tx/{mirror_hash.hex()}">Transaction Hash</a>
             """
 
             await self.bot.send_message(
                 chat_id=self.chat_id,
                 text=copy_message,
-                reply_markup=setKeyboard(auth_start_buttons),
+                reply_markup=await setKeyboard(auth_start_buttons),
                 parse_mode="HTML",
             )
         except Exception as e:
-            LOGGER.error(f"Error copying trade: {e}")
-            copy_message = f"""
+            await self.report_failure(mirror_hash, e)
+
+    async def report_failure(self, tx_hash: HexBytes, error: Exception) -> None:
+        """
+        Tells the follower a trade could not be copied.
+
+        Args:
+            tx_hash (HexBytes): The mirror's hash when it was sent, otherwise the target's.
+            error (Exception): What went wrong.
+        """
+        LOGGER.error(f"Error copying trade: {error}")
+        copy_message = f"""
 <b>COPY TRADE RESULT</b>
 ------------------------
-🔗 <a href="https://etherscan.io/tx/{tx_hash.hex()}">Transaction Hash</a>
+🔗 <a href="https://etherscan.io/tx/{HexBytes(tx_hash).hex()}">Transaction Hash</a>
 ------------------------
 There was an error copying similar trade from your whale:
-ℹ Reason: <b>{e}</b>
+ℹ Reason: <b>{error}</b>
             """
+        try:
             await self.bot.send_message(
                 chat_id=self.chat_id,
                 text=copy_message,
-                reply_markup=setKeyboard(auth_start_buttons),
+                reply_markup=await setKeyboard(auth_start_buttons),
                 parse_mode="HTML",
             )
+        except Exception as e:
+            LOGGER.error(f"Could not tell {self.chat_id} about a failed copy trade: {e}")
 
     async def wait_for_receipt(self, tx_hash: str) -> None:
         """
-        Wait for the transaction receipt.
+        Wait for the transaction receipt, resolved by the chain's shared receipt resolver.
 
         Args:
             tx_hash (str): The transaction hash.
         """
-        while True:
-            if tx_hash == "error":
-                break
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-            if receipt:
-                if receipt.status == 1:
-                    LOGGER.info(f"Transaction {tx_hash.hex()} confirmed successfully.")
-                else:
-                    LOGGER.error(f"Transaction {tx_hash.hex()} failed.")
-                break
-            await asyncio.sleep(1)
+        if tx_hash == "error":
+            return
+        receipt = await ReceiptResolvers.get(self.network_sn).wait(tx_hash)
+        if receipt.status == 1:
+            LOGGER.info(f"Transaction {tx_hash.hex()} confirmed successfully.")
+        else:
+            LOGGER.error(f"Transaction {tx_hash.hex()} failed.")
+
+
+class SolanaCopyTrader:
+    """
+    Mirrors a target's Jupiter and Raydium swaps into a follower's Solana wallet.
+
+    The copy trade hub streams the target's transactions, decodes their swaps and hands
+    each one to `mirror_trade`, which sends the same swap through Jupiter sized by the
+    follower's `balance_tradable` preset.
+    """
+
+    # lamports kept back when spending SOL so the follower can still pay fees and rent
+    SOL_FEE_RESERVE = 10_000_000
+
+    def __init__(self, chat_id: int):
+        self.bot = bot
+        self.network_sn = "SOL"
+        self.chat_id = chat_id
+        self.wallet = SolanaWallet()
+
+    async def mirror_trade(
+        self,
+        signature: str,
+        private_key: str,
+        swap: DecodedSwap,
+        trace: Optional[LatencyTrace] = None,
+        settle: Optional[ClaimSettler] = None,
+    ) -> None:
+        """
+        Perform the same swap in the follower wallet.
+
+        Args:
+            signature (str): The target transaction signature.
+            private_key (str): The base58 encoded private key of the follower.
+            swap (DecodedSwap): The target's swap.
+            trace (Optional[LatencyTrace]): The latency trace started when the target trade was seen.
+            settle (Optional[ClaimSettler]): Told whether the claimed trade is done with once the swap
+                was sent or abandoned, before its confirmation is awaited.
+        """
+        trace = trace or LatencyTrace(self.network_sn)
+        mirror_signature = None
+        try:
+            network: Network = [
+                network for network in Networks if network.sn == self.network_sn
+            ][0]
+            preset: Optional[Presets] = await PresetsData.get_presets_by_id(
+                f"{self.chat_id}-{network.id}"
+            )
+            tradable_percentage = (
+                preset.balance_tradable if preset is not None else 0.25
+            )
+            # presets store slippage as a fraction, 5% when the follower has not set one
+            slippage = preset.slippage if preset is not None and preset.slippage else 0.05
+
+            _, keypair = SolanaPool.get_jupiter(self.wallet.async_client, private_key)
+            balance = await self.wallet.get_mint_balance(keypair.pubkey(), swap.token_in)
+            if swap.token_in == SOL_MINT:
+                balance = max(balance - self.SOL_FEE_RESERVE, 0)
+            amount = int(balance * tradable_percentage)
+            trace.mark("metadata")
+            if amount == 0:
+                LOGGER.info(
+                    f"Nothing to mirror for {self.chat_id}, no {swap.token_in} balance"
+                )
+                await settle_claims(settle, [True])
+                return
+
+            mirror_signature = await self.wallet.send_swap(
+                private_key,
+                swap.token_in,
+                swap.token_out,
+                amount,
+                slippage_bps=int(slippage * 10000),
+                trace=trace,
+            )
+            LOGGER.info(f"Mirrored transaction sent: {mirror_signature}")
+            await settle_claims(settle, [True])
+            confirmation = await SolanaSignatures.confirm(mirror_signature)
+            trace.mark("confirmed")
+            trace.finish()
+            status = "✅" if confirmation.get("err") is None else "❌"
+
+            copy_message = f"""
+<b>COPY TRADE RESULT</b> {status}
+------------------------
+<code>
+SIDE        | {swap.side.upper()}
+DEX         | {swap.function.upper()}
+AMOUNT IN   | {amount}
+TOKEN IN    | {swap.token_in}
+TOKEN OUT   | {swap.token_out}
+</code>
+🔗 <a href="https://solscan.io/tx/{mirror_signature}">Transaction Signature</a>
+            """
+
+            await self.bot.send_message(
+                chat_id=self.chat_id,
+                text=copy_message,
+                reply_markup=await setKeyboard(auth_start_buttons),
+                parse_mode="HTML",
+            )
+        except Exception as e:
+            if mirror_signature is None:
+                await settle_claims(settle, [False])
+            await self.report_failure(mirror_signature or signature, e)
+
+    async def report_failure(self, signature: str, error: Exception) -> None:
+        """
+        Tells the follower a trade could not be copied.
+
+        Args:
+            signature (str): The mirror's signature when it was sent, otherwise the target's.
+            error (Exception): What went wrong.
+        """
+        LOGGER.error(f"Error copying solana trade: {error}")
+        copy_message = f"""
+<b>COPY TRADE RESULT</b>
+------------------------
+🔗 <a href="https://solscan.io/tx/{signature}">Transaction Signature</a>
+------------------------
+There was an error copying similar trade from your whale:
+ℹ Reason: <b>{error}</b>
+            """
+        try:
+            await self.bot.send_message(
+                chat_id=self.chat_id,
+                text=copy_message,
+                reply_markup=await setKeyboard(auth_start_buttons),
+                parse_mode="HTML",
+            )
+        except Exception as e:
+            LOGGER.error(f"Could not tell {self.chat_id} about a failed copy trade: {e}")
 
 
+# connects on first use, see HttpCryptoCopyTrader.w3
 CryptoWatcherHttp = HttpCryptoCopyTrader()
 # CryptoWatcherWs = WsCryptoCopyTrader()
 
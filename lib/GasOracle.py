@@ -0,0 +1,203 @@
+import asyncio
+from statistics import median
+from typing import Dict, Optional
+
+from lib.ChainHead import ChainHeads
+from lib.Logger import LOGGER
+from lib.RpcRouter import RpcRouters
+from lib.Types import BlockHeader, GasQuote
+from models.Presets import Presets
+
+# fee history reward percentile used for each urgency tier
+URGENCY_PERCENTILES: Dict[str, int] = {
+    "snipe": 90,
+    "copy": 60,
+    "normal": 25,
+}
+# legacy gas price chains have no tip history, the tiers scale the node's suggestion instead
+LEGACY_MULTIPLIERS: Dict[str, float] = {
+    "snipe": 1.25,
+    "copy": 1.1,
+    "normal": 1.0,
+}
+LEGACY_NETWORKS = ["BSC"]
+# the Gas Delta prompt accepts a percentage from 1 to 1000
+MAX_GAS_DELTA = 1000
+
+
+class GasOracle:
+    """
+    Samples `eth_feeHistory` once per block for a chain and prices transactions from memory.
+
+    Every new head from the chain's ChainHeadTracker triggers one fee history sample covering
+    the last `block_count` blocks. `quote` then derives the tip for an urgency tier from the
+    matching reward percentile and the max fee from the next block's base fee, and applies the
+    user's `gas_delta` and `max_gas_price` presets. Legacy chains (BSC) sample `eth_gasPrice` instead.
+    """
+
+    def __init__(self, network: str = "ETH", block_count: int = 10) -> None:
+        """
+        Initializes an oracle for a network, sampling starts on the first quote.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            block_count (int, optional): How many recent blocks each fee history sample covers. Defaults to 10.
+        """
+        self.network = network
+        self.block_count = block_count
+        self.block_number: Optional[int] = None
+        self.next_base_fee: Optional[int] = None
+        self.tips: Dict[str, int] = {}
+        self.gas_price: Optional[int] = None
+        self._attached = False
+        self._refreshing: Optional[asyncio.Task] = None
+
+    @property
+    def is_legacy(self) -> bool:
+        return self.network in LEGACY_NETWORKS
+
+    def _attach(self) -> None:
+        if not self._attached:
+            ChainHeads.get(self.network).add_listener(self._on_head)
+            self._attached = True
+
+    def _on_head(self, header: BlockHeader) -> None:
+        # sample in the background so other head listeners are not held up,
+        # a failed sample is already logged and the next quote retries it
+        task = asyncio.ensure_future(self.refresh(header))
+        task.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+    async def refresh(self, header: BlockHeader) -> None:
+        """
+        Samples fees for a block, concurrent callers for the same block share one request.
+
+        Args:
+            header (BlockHeader): The head to sample at.
+        """
+        if self.block_number is not None and self.block_number >= header.number:
+            return
+        if self._refreshing is not None and not self._refreshing.done():
+            await asyncio.shield(self._refreshing)
+            if self.block_number is not None and self.block_number >= header.number:
+                return
+        self._refreshing = asyncio.ensure_future(self._sample(header))
+        await asyncio.shield(self._refreshing)
+
+    async def _sample(self, header: BlockHeader) -> None:
+        router = RpcRouters.get(self.network)
+        try:
+            if self.is_legacy or header.base_fee_per_gas is None:
+                self.gas_price = int(await router.request("eth_gasPrice"), 16)
+            else:
+                percentiles = sorted(set(URGENCY_PERCENTILES.values()))
+                history = await router.request(
+                    "eth_feeHistory", [hex(self.block_count), "latest", percentiles]
+                )
+                # the last base fee in the history is the one the next block will charge
+                self.next_base_fee = int(history["baseFeePerGas"][-1], 16)
+                rewards = history.get("reward") or []
+                for urgency, percentile in URGENCY_PERCENTILES.items():
+                    column = percentiles.index(percentile)
+                    samples = [int(block[column], 16) for block in rewards if block]
+                    self.tips[urgency] = int(median(samples)) if samples else 0
+            self.block_number = header.number
+        except Exception as e:
+            LOGGER.error(f"Gas sample for {self.network} block {header.number} failed: {e}")
+            raise
+
+    def _delta(self, presets: Optional[Presets]) -> int:
+        """
+        Reads the user's gas delta as a percentage between 0 and MAX_GAS_DELTA.
+
+        Presets saved before the delta became a percentage hold the typed number converted
+        to wei, those are scaled back to the number the user typed.
+
+        Args:
+            presets (Optional[Presets]): The user's presets.
+
+        Returns:
+            int: The percentage bump on the tip.
+        """
+        delta = (presets.gas_delta or 0) if presets is not None else 0
+        if delta > MAX_GAS_DELTA:
+            delta //= 10**18
+        return min(max(delta, 0), MAX_GAS_DELTA)
+
+    def _usable_cap(self, cap: Optional[int], floor: int) -> bool:
+        """
+        Checks whether a `max_gas_price` preset can cap a fee.
+
+        A cap below what the next block charges could never be mined, e.g. the 10000 wei
+        written by the default presets, so it is treated as no cap at all.
+
+        Args:
+            cap (Optional[int]): The user's max fee per gas in wei.
+            floor (int): The next block's base fee, or the node's gas price on legacy chains.
+
+        Returns:
+            bool: True when the fee should be capped.
+        """
+        if not cap:
+            return False
+        if cap < floor:
+            LOGGER.debug(f"Ignoring max gas price {cap} below the {self.network} floor of {floor} wei")
+            return False
+        return True
+
+    async def quote(self, urgency: str = "normal", presets: Optional[Presets] = None) -> GasQuote:
+        """
+        Prices a transaction for an urgency tier.
+
+        Args:
+            urgency (str, optional): One of "snipe", "copy" or "normal". Defaults to "normal".
+            presets (Optional[Presets], optional): The user's presets, `gas_delta` is a percentage bump on
+                the tip and `max_gas_price` caps the fee per gas in wei (the /presets prompt takes it in
+                ETH), a cap the next block could not include is ignored. Defaults to None.
+
+        Returns:
+            GasQuote: The fee fields for the transaction.
+        """
+        self._attach()
+        header = await ChainHeads.get(self.network).latest()
+        if self.block_number is None or self.block_number < header.number:
+            await self.refresh(header)
+
+        delta = self._delta(presets)
+        cap = presets.max_gas_price if presets is not None else None
+
+        if self.is_legacy or self.next_base_fee is None:
+            gas_price = int(self.gas_price * LEGACY_MULTIPLIERS[urgency] * (100 + delta) / 100)
+            if self._usable_cap(cap, self.gas_price):
+                gas_price = min(gas_price, cap)
+            return GasQuote(gas_price=gas_price, block_number=self.block_number)
+
+        tip = self.tips[urgency] * (100 + delta) // 100
+        # two base fees of headroom keep the transaction valid through several full blocks
+        max_fee = 2 * self.next_base_fee + tip
+        if self._usable_cap(cap, self.next_base_fee):
+            max_fee = min(max_fee, cap)
+            tip = min(tip, max_fee - self.next_base_fee)
+        return GasQuote(
+            max_fee_per_gas=max_fee,
+            max_priority_fee_per_gas=tip,
+            block_number=self.block_number,
+        )
+
+
+class GasOracleRegistry:
+    """
+    Holds one GasOracle per network so every user shares the same per-block sample.
+    """
+
+    def __init__(self) -> None:
+        self._oracles: Dict[str, GasOracle] = {}
+
+    def get(self, network: str = "ETH") -> GasOracle:
+        oracle = self._oracles.get(network)
+        if oracle is None:
+            oracle = GasOracle(network)
+            self._oracles[network] = oracle
+        return oracle
+
+
+GasOracles = GasOracleRegistry()
@@ -1,5 +1,5 @@
 from typing import Final
-from decouple import config
+from decouple import Csv, config
 
 TOKEN: Final = config("TOKEN")
 REDIS: Final = config("BROKER_URL")
@@ -21,3 +21,9 @@ ONEINCH_TOKEN: Final = config("ONEINCH_TOKEN")
 QUICKNODE_WS: Final = config("QUICKNODE_WS")
 QUICKNODE_HTTP: Final = config("QUICKNODE_HTTP")
 DEBUG: Final = config("DEBUG")
+
+# extra comma separated rpc endpoints per chain, used alongside the primary url by the rpc router
+ETH_HTTP_URLS: Final = config("ETH_HTTP_URLS", default="", cast=Csv())
+BSC_HTTP_URLS: Final = config("BSC_HTTP_URLS", default="", cast=Csv())
+POLYGON_HTTP_URLS: Final = config("POLYGON_HTTP_URLS", default="", cast=Csv())
+AVALANCHE_HTTP_URLS: Final = config("AVALANCHE_HTTP_URLS", default="", cast=Csv())
@@ -0,0 +1,204 @@
+import bisect
+import time
+from typing import Dict, List, Optional, Tuple
+
+# stages of a copy trade, in the order they happen
+COPY_TRADE_STAGES = ["seen", "matched", "receipt", "metadata", "signed", "broadcast", "confirmed"]
+
+# histogram bucket upper bounds in seconds, the last bucket is +Inf
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0]
+
+
+class LatencyHistogram:
+    """
+    Counts latencies into fixed buckets, the same way a Prometheus histogram does.
+    """
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS) -> None:
+        """
+        Initializes an empty histogram.
+
+        Args:
+            buckets (List[float], optional): Sorted bucket upper bounds in seconds. Defaults to LATENCY_BUCKETS.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Records one latency.
+
+        Args:
+            seconds (float): The latency in seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            Optional[float]: The estimate in seconds, inf when it falls past the last bucket, None when empty.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class LatencyRegistry:
+    """
+    Holds one latency histogram per (network, stage) and renders them for the admin command and for scraping.
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def observe(self, network: str, stage: str, seconds: float) -> None:
+        """
+        Records the latency of a stage.
+
+        Args:
+            network (str): The short name of the network.
+            stage (str): The stage, one of COPY_TRADE_STAGES or "total".
+            seconds (float): The time spent reaching this stage from the previous one.
+        """
+        histogram = self.histograms.get((network, stage))
+        if histogram is None:
+            histogram = LatencyHistogram()
+            self.histograms[(network, stage)] = histogram
+        histogram.observe(seconds)
+
+    def summary(self) -> str:
+        """
+        Formats the p50, p90 and p99 of every stage per network as a fixed width table.
+
+        Returns:
+            str: The table, or a short note when nothing was recorded yet.
+        """
+        if not self.histograms:
+            return "No copy trades recorded yet"
+
+        def fmt(value: Optional[float]) -> str:
+            return "-" if value is None else (">120s" if value == float("inf") else f"{value:g}s")
+
+        order = COPY_TRADE_STAGES + ["total"]
+        lines = []
+        for network in sorted({network for network, _ in self.histograms}):
+            lines.append(f"{network}")
+            lines.append(f"{'STAGE':<10}| {'N':>5} | {'P50':>6} | {'P90':>6} | {'P99':>6}")
+            for stage in order:
+                histogram = self.histograms.get((network, stage))
+                if histogram is None:
+                    continue
+                lines.append(
+                    f"{stage:<10}| {histogram.count:>5} | {fmt(histogram.quantile(0.5)):>6} | "
+                    f"{fmt(histogram.quantile(0.9)):>6} | {fmt(histogram.quantile(0.99)):>6}"
+                )
+            lines.append("")
+        return "\n".join(lines).strip()
+
+    def export(self, name: str = "copytrade_stage_latency_seconds") -> str:
+        """
+        Renders every histogram in the Prometheus text exposition format.
+
+        Args:
+            name (str, optional): The metric name. Defaults to "copytrade_stage_latency_seconds".
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = [
+            f"# HELP {name} Time from the previous copy trade stage to this one.",
+            f"# TYPE {name} histogram",
+        ]
+        for (network, stage), histogram in sorted(self.histograms.items()):
+            labels = f'network="{network}",stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + [float("inf")], histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class LatencyTrace:
+    """
+    Timestamps the stages of one copy trade, from the target's block being seen to the mirror confirming.
+
+    Stages may be skipped, e.g. a mempool copy has no receipt. When the trace finishes each
+    marked stage is recorded as the time since the stage marked before it, and "total" as
+    the time from "seen" to the last stage.
+    """
+
+    def __init__(
+        self,
+        network: str,
+        seen_at: Optional[float] = None,
+        registry: Optional[LatencyRegistry] = None,
+    ) -> None:
+        """
+        Initializes a trace, marking the "seen" stage.
+
+        Args:
+            network (str): The short name of the network.
+            seen_at (Optional[float], optional): `time.monotonic()` when the block or pending transaction was
+                seen, e.g. a BlockHeader's `seen_at`. Defaults to now.
+            registry (Optional[LatencyRegistry], optional): Where the latencies are recorded.
+                Defaults to CopyTradeLatency.
+        """
+        self.network = network
+        self.registry = registry
+        self.marks: Dict[str, float] = {"seen": seen_at if seen_at is not None else time.monotonic()}
+        self.finished = False
+
+    def mark(self, stage: str) -> None:
+        """
+        Timestamps a stage, the first mark of a stage wins.
+
+        Args:
+            stage (str): The stage, one of COPY_TRADE_STAGES.
+        """
+        self.marks.setdefault(stage, time.monotonic())
+
+    def fork(self) -> "LatencyTrace":
+        """
+        Copies the trace so each follower of one target trade keeps its own later stages.
+
+        Returns:
+            LatencyTrace: The copy.
+        """
+        trace = LatencyTrace(self.network, registry=self.registry)
+        trace.marks = dict(self.marks)
+        return trace
+
+    def finish(self) -> None:
+        """
+        Records the marked stages, only the first call does anything.
+        """
+        if self.finished:
+            return
+        self.finished = True
+        registry = self.registry or CopyTradeLatency
+        stages = sorted(self.marks.items(), key=lambda mark: mark[1])
+        for (_, previous), (stage, at) in zip(stages, stages[1:]):
+            registry.observe(self.network, stage, at - previous)
+        if len(stages) > 1:
+            registry.observe(self.network, "total", stages[-1][1] - stages[0][1])
+
+
+CopyTradeLatency = LatencyRegistry()
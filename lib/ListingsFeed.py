@@ -0,0 +1,443 @@
+import asyncio
+import io
+import json
+import time
+import uuid
+import weakref
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from lib.GetDotEnv import COINMARKETCAP_API
+from lib.Logger import LOGGER
+from lib.RedisClient import get_redis
+
+CMC_LISTINGS_URL = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
+CMC_LISTINGS_PARAMS = {
+    "start": 1,
+    "limit": 200,
+    "sort": "date_added",
+    "cryptocurrency_type": "tokens",
+    "convert": "USD",
+    "aux": (
+        "circulating_supply,total_supply,market_cap_by_total_supply,volume_24h_reported,volume_7d,"
+        "volume_7d_reported,volume_30d,volume_30d_reported,is_market_cap_included_in_calc,date_added,tags,platform"
+    ),
+}
+
+# deletes the refresh lock only when it is still held by the caller
+_RELEASE_LOCK = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+# lower case CoinMarketCap platform names of the chains tokens are sniped on
+PLATFORM_NAMES = {
+    "solana": "Solana",
+    "ethereum": "Ethereum",
+    "binance smart chain": "Binance Smart Chain",
+    "polygon": "Polygon",
+    "avalanche": "Avalanche",
+}
+PLATFORMS = pd.CategoricalDtype(list(PLATFORM_NAMES.values()))
+
+
+def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    Reads a listings column as floats, missing columns and values read as 0.
+    """
+    if column not in df:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[column], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Divides element-wise, 0 where the denominator is 0.
+    """
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def score_listings(df: pd.DataFrame) -> dict:
+    """
+    Picks the best token on each supported platform from CoinMarketCap listings.
+
+    Platforms are mapped to a categorical in one pass, the scores are computed on NumPy
+    arrays for every listing at once and the best listing per platform is taken with a
+    single groupby. A token scores higher the less of its supply circulates, the closer its
+    7 day volume is to the platform's highest and the higher its market cap per circulating
+    token; a zero supply or volume adds nothing instead of dividing by zero.
+
+    Args:
+        df (pd.DataFrame): The `listings/latest` data, one row per token.
+
+    Returns:
+        dict: The best token per platform name, with its platform network id, contract address,
+              price in USD, name, id, market cap, 7 day volume and symbol.
+    """
+    if df.empty or "platform" not in df:
+        return {}
+
+    platform_names = (
+        df["platform"].str.get("name").str.lower().map(PLATFORM_NAMES).astype(PLATFORMS)
+    )
+    listings = df.loc[platform_names.notna()].assign(platform_name=platform_names)
+    if listings.empty:
+        return {}
+
+    circulating = _numeric(listings, "circulating_supply")
+    total = _numeric(listings, "total_supply")
+    volume = _numeric(listings, "volume_7d")
+    market_cap = _numeric(listings, "market_cap_by_total_supply")
+    volume_max = (
+        pd.Series(volume, index=listings.index)
+        .groupby(listings["platform_name"], observed=True)
+        .transform("max")
+        .to_numpy()
+    )
+
+    listings["score"] = (
+        np.where(total > 0, 1 - _safe_divide(circulating, total), 0.0) * 0.4
+        + _safe_divide(volume, volume_max) * 0.3
+        + _safe_divide(market_cap, circulating) * 0.3
+    )
+    best = listings.groupby("platform_name", observed=True)["score"].idxmax()
+
+    best_tokens = {}
+    for platform, index in best.items():
+        best_token = listings.loc[index]
+        platform_data = best_token["platform"]
+        best_tokens[platform] = {
+            "platform_name": platform,
+            "platform_network_id": platform_data["id"] if platform_data else None,
+            "platform_contract_address": (
+                platform_data["token_address"] if platform_data else None
+            ),
+            "price_usd": best_token["quote"]["USD"]["price"],
+            "token_name": best_token["name"],
+            "token_id": best_token["id"],
+            "market_cap": best_token.get("market_cap_by_total_supply"),
+            "volume_7d": best_token.get("volume_7d"),
+            "symbol": best_token["symbol"],
+        }
+    return best_tokens
+
+
+class ListingsSnapshot:
+    """
+    Represents the CoinMarketCap listings as fetched at one moment.
+    """
+
+    def __init__(self, frame: pd.DataFrame, fetched_at: float):
+        """
+        Initializes a ListingsSnapshot object.
+
+        Args:
+            frame (pd.DataFrame): The `listings/latest` data, one row per token.
+            fetched_at (float): The unix time the listings were fetched.
+        """
+        self.frame = frame
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the listings were fetched.
+        """
+        return max(time.time() - self.fetched_at, 0.0)
+
+
+class ListingsFeed:
+    """
+    Serves the latest CoinMarketCap listings to every sniper from one snapshot shared through Redis.
+
+    The parsed frame is stored as a zlib compressed `to_json(orient="split")` blob, so the
+    celery workers and the bot process read the same snapshot and CoinMarketCap is called
+    once per `ttl` however many snipers run. A stale or missing snapshot is refreshed by a
+    single caller: callers in one process wait on an asyncio lock and processes race for a
+    `SET NX` lock in Redis, the losers wait for the winner's snapshot instead of calling
+    upstream. `run` keeps the snapshot fresh on a schedule while snipers are reading it,
+    and every refresh hands the listings to NewListings.
+    """
+
+    def __init__(self, ttl: float = 300.0, lock_timeout: float = 30.0, idle: float = 900.0) -> None:
+        """
+        Initializes the feed, nothing is fetched until a snapshot is requested.
+
+        Args:
+            ttl (float, optional): Seconds a snapshot is served before it is refreshed. Defaults to 300.0.
+            lock_timeout (float, optional): Seconds a refresh may hold the Redis lock. Defaults to 30.0.
+            idle (float, optional): Seconds after the last read that `run` stops refreshing. Defaults to 900.0.
+        """
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.idle = idle
+        self.key = "cmc:listings"
+        self._snapshot: Optional[ListingsSnapshot] = None
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def _lock(self) -> asyncio.Lock:
+        # asyncio locks are bound to a loop, celery workers spin up fresh loops
+        return self._locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+
+    async def get(self, max_age: Optional[float] = None) -> ListingsSnapshot:
+        """
+        Returns the shared listings snapshot, refreshing it first when it is older than `max_age`.
+
+        Args:
+            max_age (Optional[float], optional): Oldest snapshot accepted in seconds. Defaults to the feed's ttl.
+
+        Returns:
+            ListingsSnapshot: The listings and their age.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        await self.want()
+        snapshot = await self._fresh(max_age)
+        if snapshot is not None:
+            return snapshot
+
+        async with self._lock():
+            # another caller in this process may have refreshed it while we waited
+            snapshot = await self._fresh(max_age)
+            if snapshot is not None:
+                return snapshot
+            return await self._refresh_once(max_age)
+
+    async def want(self) -> None:
+        """
+        Keeps the scheduled refresh running, called by every reader of the feed.
+        """
+        await get_redis().set(f"{self.key}:wanted", 1, ex=int(self.idle))
+
+    async def _fresh(self, max_age: float) -> Optional[ListingsSnapshot]:
+        if self._snapshot is not None and self._snapshot.age <= max_age:
+            return self._snapshot
+        snapshot = await self._load()
+        if snapshot is not None and snapshot.age <= max_age:
+            self._snapshot = snapshot
+            return snapshot
+        return None
+
+    async def _refresh_once(self, max_age: float) -> ListingsSnapshot:
+        redis = get_redis()
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            if await redis.set(f"{self.key}:lock", token, nx=True, px=int(self.lock_timeout * 1000)):
+                try:
+                    return await self.refresh()
+                finally:
+                    await redis.eval(_RELEASE_LOCK, 1, f"{self.key}:lock", token)
+
+            # another process is fetching, wait for its snapshot
+            await asyncio.sleep(0.25)
+            snapshot = await self._fresh(max_age)
+            if snapshot is not None:
+                return snapshot
+            if time.monotonic() > deadline and self._snapshot is not None:
+                LOGGER.warning(f"Listings refresh is stuck, serving a {self._snapshot.age:.0f}s old snapshot")
+                return self._snapshot
+
+    async def refresh(self) -> ListingsSnapshot:
+        """
+        Fetches the listings from CoinMarketCap and shares them through Redis.
+
+        Returns:
+            ListingsSnapshot: The new snapshot.
+        """
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                CMC_LISTINGS_URL,
+                headers={"X-CMC_PRO_API_KEY": COINMARKETCAP_API},
+                params=CMC_LISTINGS_PARAMS,
+            ) as response:
+                response.raise_for_status()
+                data = await response.json()
+
+        snapshot = ListingsSnapshot(pd.DataFrame(data["data"]), time.time())
+        await self._store(snapshot)
+        self._snapshot = snapshot
+        LOGGER.debug(f"Fetched {len(snapshot.frame)} listings from CoinMarketCap")
+        try:
+            # refreshes run one at a time under the lock, so each listing is queued once
+            await NewListings.publish(snapshot.frame)
+        except Exception as e:
+            LOGGER.error(f"Queueing new listings failed: {e}")
+        return snapshot
+
+    async def _store(self, snapshot: ListingsSnapshot) -> None:
+        blob = zlib.compress(
+            json.dumps(
+                {"fetched_at": snapshot.fetched_at, "frame": snapshot.frame.to_json(orient="split")}
+            ).encode()
+        )
+        # kept past its ttl so a failed refresh can still serve the last snapshot
+        await get_redis(decode_responses=False).set(self.key, blob, ex=int(self.ttl * 12))
+
+    async def _load(self) -> Optional[ListingsSnapshot]:
+        blob = await get_redis(decode_responses=False).get(self.key)
+        if blob is None:
+            return None
+        payload: Dict[str, Any] = json.loads(zlib.decompress(blob))
+        if self._snapshot is not None and self._snapshot.fetched_at == payload["fetched_at"]:
+            return self._snapshot
+        frame = pd.read_json(io.StringIO(payload["frame"]), orient="split", dtype=False, convert_dates=False)
+        return ListingsSnapshot(frame, payload["fetched_at"])
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts refreshing on the running event loop, a no-op when already running.
+
+        Returns:
+            asyncio.Task: The background refresh task.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def run(self) -> None:
+        """
+        Refreshes the snapshot shortly before it expires, for as long as snipers keep reading it.
+        """
+        redis = get_redis()
+        while True:
+            try:
+                if await redis.exists(f"{self.key}:wanted"):
+                    snapshot = await self._fresh(self.ttl * 0.8)
+                    if snapshot is None:
+                        async with self._lock():
+                            await self._refresh_once(self.ttl * 0.8)
+            except Exception as e:
+                LOGGER.error(f"Listings refresh failed: {e}")
+            await asyncio.sleep(self.ttl * 0.2)
+
+
+CmcListings = ListingsFeed()
+
+
+def _to_json(value: Any) -> Any:
+    # numpy scalars from the listings frame
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class NewListingsQueue:
+    """
+    Queues the best new token per platform each time new listings appear on CoinMarketCap.
+
+    Each snapshot is diffed against a high-water mark of `date_added` and the set of CMC ids
+    already seen, both kept in Redis, so only the listings that appeared since the previous
+    snapshot are scored. The best of them per platform are appended to a Redis stream that
+    every sniper reads from its own position, so each sniper sees each new listing once and
+    the scoring cost grows with the number of new listings instead of the listings window.
+    """
+
+    def __init__(self, max_entries: int = 1000, seen_ttl: int = 7 * 24 * 60 * 60) -> None:
+        """
+        Initializes the queue.
+
+        Args:
+            max_entries (int, optional): Entries kept in the stream, older ones are trimmed. Defaults to 1000.
+            seen_ttl (int, optional): Seconds the seen ids are kept after the last new listing. Defaults to a week.
+        """
+        self.max_entries = max_entries
+        self.seen_ttl = seen_ttl
+        self.key = "cmc:listings:new"
+
+    async def publish(self, frame: pd.DataFrame) -> dict:
+        """
+        Scores the listings of a snapshot that were not seen before and queues the best one per platform.
+
+        The first snapshot only sets the high-water mark, listings that were already there
+        when the queue started are not new.
+
+        Args:
+            frame (pd.DataFrame): The `listings/latest` data, one row per token.
+
+        Returns:
+            dict: The queued best new token per platform name, empty when nothing new appeared.
+        """
+        if frame.empty or "date_added" not in frame or "id" not in frame:
+            return {}
+        redis = get_redis()
+        added = pd.to_datetime(frame["date_added"], utc=True, errors="coerce")
+        high_water = await redis.get(f"{self.key}:high_water")
+
+        if high_water is None:
+            candidates = frame.iloc[0:0]
+        else:
+            # listings added at the mark itself may or may not have been seen yet
+            candidates = frame.loc[(added >= pd.Timestamp(high_water)).to_numpy()]
+        if not candidates.empty:
+            seen = await redis.smismember(f"{self.key}:seen", candidates["id"].astype(str).tolist())
+            candidates = candidates.loc[~np.asarray(seen, dtype=bool)]
+
+        async with redis.pipeline(transaction=False) as pipe:
+            ids = (frame if high_water is None else candidates)["id"].astype(str).tolist()
+            if ids:
+                pipe.sadd(f"{self.key}:seen", *ids)
+                pipe.expire(f"{self.key}:seen", self.seen_ttl)
+            if added.notna().any():
+                newest = added.max()
+                if high_water is None or newest > pd.Timestamp(high_water):
+                    pipe.set(f"{self.key}:high_water", newest.isoformat())
+            await pipe.execute()
+
+        if candidates.empty:
+            return {}
+        best_tokens = score_listings(candidates)
+        if best_tokens:
+            await redis.xadd(
+                self.key,
+                {"tokens": json.dumps(best_tokens, default=_to_json)},
+                maxlen=self.max_entries,
+                approximate=True,
+            )
+            LOGGER.info(f"Queued new listings on {', '.join(best_tokens)} from {len(candidates)} new tokens")
+        return best_tokens
+
+    async def position(self) -> str:
+        """
+        Returns the id of the newest entry, a sniper reads from here to get only later listings.
+
+        Returns:
+            str: The stream entry id, "0-0" while the stream is empty.
+        """
+        entries = await get_redis().xrevrange(self.key, count=1)
+        return entries[0][0] if entries else "0-0"
+
+    async def next(self, platform: Optional[str] = None, last_id: str = "$") -> Tuple[str, dict]:
+        """
+        Waits for the next queued listings with a token on a platform.
+
+        Args:
+            platform (Optional[str], optional): The platform name, e.g. "Ethereum", None accepts any. Defaults to None.
+            last_id (str, optional): Read the entries after this id, see `position`. Defaults to "$", new entries only.
+
+        Returns:
+            Tuple[str, dict]: The entry id to read from next time and the best new token per platform name.
+        """
+        redis = get_redis()
+        if last_id == "$":
+            last_id = await self.position()
+        while True:
+            # a waiting sniper keeps the listings refreshed
+            await CmcListings.want()
+            streams = await redis.xread({self.key: last_id}, count=100, block=60_000)
+            for _, entries in streams or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    best_tokens = json.loads(fields["tokens"])
+                    if platform is None or platform in best_tokens:
+                        return last_id, best_tokens
+
+
+NewListings = NewListingsQueue()
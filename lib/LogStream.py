@@ -0,0 +1,273 @@
+import asyncio
+import inspect
+import itertools
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import websockets
+
+from lib.ChainHead import ChainHeads
+from lib.Logger import LOGGER
+from lib.ProviderPool import WS_URLS
+from lib.RpcRouter import RpcRouters
+from lib.Types import BlockHeader
+
+LogListener = Callable[[Dict[str, Any]], Union[Awaitable[None], None]]
+ProgressListener = Callable[[int], Union[Awaitable[None], None]]
+
+# keccak("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def address_topic(address: str) -> str:
+    """
+    Left pads an address to the 32 byte topic form used for indexed event arguments.
+
+    Args:
+        address (str): The address.
+
+    Returns:
+        str: The topic, e.g. "0x000000000000000000000000<address>".
+    """
+    return "0x" + address.lower().replace("0x", "").rjust(64, "0")
+
+
+class LogStream:
+    """
+    Streams the logs matching a set of filters on one chain to a listener, with no gaps.
+
+    Logs and new heads are subscribed with `eth_subscribe` over one websocket. When the
+    socket drops it reconnects with backoff and backfills the blocks it missed with
+    `eth_getLogs`, so the listener sees every matching log once, in block order. Chains
+    without a websocket endpoint fetch the logs of each new head from the chain head
+    tracker instead. Logs removed by a reorg are skipped. `progress` is told every block
+    whose logs have all been delivered, so a checkpoint can be saved and passed back as
+    `from_block` after a restart.
+    """
+
+    def __init__(
+        self,
+        network: str,
+        filters: List[Dict[str, Any]],
+        listener: LogListener,
+        ws_url: Optional[str] = None,
+        from_block: Optional[int] = None,
+        backfill_chunk: int = 2000,
+        progress: Optional[ProgressListener] = None,
+    ) -> None:
+        """
+        Initializes a stream, nothing runs until `start` is called.
+
+        Args:
+            network (str): The short name of the network.
+            filters (List[Dict[str, Any]]): `eth_subscribe("logs")` filters, each with `address` and/or `topics`.
+            listener (LogListener): Called, sync or async, with every matching log.
+            ws_url (Optional[str], optional): Overrides the websocket endpoint for the network. Defaults to None.
+            from_block (Optional[int], optional): Backfill from this block on start, e.g. a saved checkpoint.
+                Defaults to None.
+            backfill_chunk (int, optional): Blocks per `eth_getLogs` request while backfilling. Defaults to 2000.
+            progress (Optional[ProgressListener], optional): Called, sync or async, with the last block whose
+                logs have all been delivered. Defaults to None.
+        """
+        self.network = network
+        self.filters = filters
+        self.listener = listener
+        self.ws_url = ws_url or WS_URLS.get(network)
+        self.backfill_chunk = backfill_chunk
+        self.progress = progress
+        # the last block whose logs have all been delivered
+        self.last_block: Optional[int] = from_block - 1 if from_block is not None else None
+        self._seen: "OrderedDict[tuple, None]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._ws: Any = None
+        self._subscriptions: Dict[str, str] = {}
+        self._replies: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._backfilling = False
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts streaming on the running event loop, a no-op when already running.
+
+        Returns:
+            asyncio.Task: The background streaming task.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        Stops streaming.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def set_filters(self, filters: List[Dict[str, Any]]) -> None:
+        """
+        Replaces the filters, re-subscribing on the live socket when there is one.
+
+        Args:
+            filters (List[Dict[str, Any]]): The new filters.
+        """
+        self.filters = filters
+        if self._ws is not None:
+            await self._resubscribe()
+
+    async def _deliver(self, log: Dict[str, Any]) -> None:
+        if log.get("removed"):
+            return
+        key = (log["transactionHash"], log["logIndex"])
+        if key in self._seen:
+            return
+        self._seen[key] = None
+        while len(self._seen) > 10000:
+            self._seen.popitem(last=False)
+
+        try:
+            result = self.listener(log)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            LOGGER.error(f"Log listener failed on {self.network}: {e}")
+
+    async def _advance(self, block: int) -> None:
+        self.last_block = block
+        if self.progress is None:
+            return
+        try:
+            result = self.progress(block)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            LOGGER.error(f"Log stream progress listener failed on {self.network}: {e}")
+
+    async def _backfill(self, to_block: int) -> None:
+        if self.last_block is None:
+            # first start without a checkpoint, only new blocks matter
+            self.last_block = to_block
+            return
+
+        router = RpcRouters.get(self.network)
+        while self.last_block < to_block:
+            start = self.last_block + 1
+            end = min(to_block, start + self.backfill_chunk - 1)
+            logs: List[Dict[str, Any]] = []
+            for log_filter in self.filters:
+                logs.extend(
+                    await router.request(
+                        "eth_getLogs",
+                        [{**log_filter, "fromBlock": hex(start), "toBlock": hex(end)}],
+                    )
+                )
+            logs.sort(key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+            for log in logs:
+                await self._deliver(log)
+            await self._advance(end)
+        LOGGER.debug(f"Log stream on {self.network} caught up to block {to_block}")
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                if self.ws_url:
+                    await self._subscribe()
+                else:
+                    await self._follow_heads()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error(f"Log stream on {self.network} dropped: {e}")
+            finally:
+                self._ws = None
+                self._subscriptions = {}
+            # back off while the endpoint keeps failing, start over after a connection that held
+            delay = 1.0 if time.monotonic() - started > 60 else min(delay * 2, 30.0)
+            await asyncio.sleep(delay)
+
+    async def _request(self, method: str, params: List[Any]) -> Any:
+        request_id = next(self._request_ids)
+        reply = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = reply
+        try:
+            await self._ws.send(
+                json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            )
+            return await asyncio.wait_for(reply, 10.0)
+        finally:
+            self._replies.pop(request_id, None)
+
+    async def _resubscribe(self) -> None:
+        for subscription_id, kind in list(self._subscriptions.items()):
+            if kind == "logs":
+                del self._subscriptions[subscription_id]
+                await self._request("eth_unsubscribe", [subscription_id])
+        for log_filter in self.filters:
+            self._subscriptions[await self._request("eth_subscribe", ["logs", log_filter])] = "logs"
+
+    async def _read(self, ws: Any) -> None:
+        async for message in ws:
+            payload = json.loads(message)
+            reply = self._replies.get(payload.get("id"))
+            if reply is not None and not reply.done():
+                if "error" in payload:
+                    reply.set_exception(ConnectionError(f"Subscription request rejected: {payload['error']}"))
+                else:
+                    reply.set_result(payload.get("result"))
+            elif payload.get("method") == "eth_subscription":
+                await self._handle(payload["params"])
+        raise ConnectionError("websocket closed")
+
+    async def _handle(self, params: Dict[str, Any]) -> None:
+        kind = self._subscriptions.get(params["subscription"])
+        result = params["result"]
+        if kind == "logs":
+            await self._deliver(result)
+        elif kind == "newHeads" and not self._backfilling:
+            number = int(result["number"], 16)
+            # logs for a block arrive with its head, so everything below it has been delivered
+            if self.last_block is None or number - 1 > self.last_block:
+                await self._advance(number - 1)
+
+    async def _subscribe(self) -> None:
+        async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+            self._ws = ws
+            reader = asyncio.ensure_future(self._read(ws))
+            try:
+                self._backfilling = True
+                self._subscriptions[await self._request("eth_subscribe", ["newHeads"])] = "newHeads"
+                await self._resubscribe()
+                LOGGER.debug(f"Subscribed to {len(self.filters)} log filters on {self.network}")
+
+                # anything mined while disconnected comes from eth_getLogs, the subscription covers the rest
+                head = int(await RpcRouters.get(self.network).request("eth_blockNumber"), 16)
+                await self._backfill(head)
+                self._backfilling = False
+                await reader
+            finally:
+                self._backfilling = False
+                reader.cancel()
+
+    async def _follow_heads(self) -> None:
+        tracker = ChainHeads.get(self.network)
+        heads: asyncio.Queue = asyncio.Queue()
+
+        def on_head(header: BlockHeader) -> None:
+            heads.put_nowait(header.number)
+
+        tracker.add_listener(on_head)
+        tracker.start()
+        try:
+            await self._backfill((await tracker.latest()).number)
+            while True:
+                await self._backfill(await heads.get())
+        finally:
+            tracker.remove_listener(on_head)
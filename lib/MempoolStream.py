@@ -0,0 +1,115 @@
+import asyncio
+import inspect
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+import websockets
+
+from lib.Logger import LOGGER
+from lib.ProviderPool import WS_URLS
+
+PendingListener = Callable[[Dict[str, Any]], Union[Awaitable[None], None]]
+
+
+class PendingTransactionStream:
+    """
+    Streams full pending transactions from a node's mempool with `eth_subscribe("newPendingTransactions", true)`.
+
+    The listener gets each transaction object as soon as the node sees it, before it is
+    mined. A `senders` predicate is applied before the listener so the firehose of
+    unrelated transactions never leaves this class. Reconnects with backoff; there is
+    nothing to backfill, transactions pending while disconnected are simply caught
+    later by the mined log stream.
+    """
+
+    def __init__(
+        self,
+        network: str,
+        listener: PendingListener,
+        senders: Callable[[str], bool],
+        ws_url: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes a stream, nothing runs until `start` is called.
+
+        Args:
+            network (str): The short name of the network.
+            listener (PendingListener): Called, sync or async, with every matching pending transaction.
+            senders (Callable[[str], bool]): Returns True for the lower case sender addresses to keep.
+            ws_url (Optional[str], optional): Overrides the websocket endpoint for the network. Defaults to None.
+        """
+        self.network = network
+        self.listener = listener
+        self.senders = senders
+        self.ws_url = ws_url or WS_URLS.get(network)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> Optional[asyncio.Task]:
+        """
+        Starts streaming on the running event loop, a no-op when already running or when the network has no websocket.
+
+        Returns:
+            Optional[asyncio.Task]: The background streaming task.
+        """
+        if not self.ws_url:
+            LOGGER.info(f"No websocket endpoint for {self.network}, pending transactions are not streamed")
+            return None
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        Stops streaming.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error(f"Pending transaction stream on {self.network} dropped: {e}")
+            delay = 1.0 if time.monotonic() - started > 60 else min(delay * 2, 30.0)
+            await asyncio.sleep(delay)
+
+    async def _subscribe(self) -> None:
+        async with websockets.connect(self.ws_url, ping_interval=20, max_size=None) as ws:
+            await ws.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["newPendingTransactions", True],
+                    }
+                )
+            )
+            LOGGER.debug(f"Subscribed to pending transactions on {self.network}")
+            async for message in ws:
+                payload = json.loads(message)
+                if payload.get("method") != "eth_subscription":
+                    if "error" in payload:
+                        raise ConnectionError(f"newPendingTransactions subscription rejected: {payload['error']}")
+                    continue
+                tx = payload["params"]["result"]
+                # nodes without full transaction support send bare hashes, which cannot be matched here
+                if not isinstance(tx, dict) or not self.senders(tx["from"].lower()):
+                    continue
+                try:
+                    result = self.listener(tx)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    LOGGER.error(f"Pending transaction listener failed on {self.network}: {e}")
@@ -0,0 +1,230 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
+from web3 import AsyncWeb3
+from web3.contract import AsyncContract
+
+from lib.Logger import LOGGER
+from lib.ProviderPool import ProviderPool
+from lib.Types import TokenBalance
+from lib.WalletClass import ERC20_ABI
+
+# Multicall3 is deployed at the same address on ethereum, bsc, polygon and avalanche
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "address", "name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"internalType": "uint256", "name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+GET_AMOUNTS_OUT_SELECTOR = function_signature_to_4byte_selector("getAmountsOut(uint256,address[])")
+
+
+class Multicall3Reader:
+    """
+    Reads ERC20 balances, decimals and allowances for many (owner, token) pairs in one `eth_call`.
+
+    Every read is packed into a single Multicall3 `aggregate3` call with `allowFailure` set,
+    so a broken token contract only blanks its own entry instead of failing the whole batch.
+    Decimals are requested once per distinct token no matter how many owners hold it.
+    Native balances and V2 router quotes for many wallets are read the same way.
+    """
+
+    def __init__(self, network: str = "ETH", chunk_size: int = 1000) -> None:
+        """
+        Initializes the reader on the pooled async provider of a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            chunk_size (int, optional): Maximum sub-calls per `eth_call`, large requests are split. Defaults to 1000.
+        """
+        self.w3: AsyncWeb3 = ProviderPool.get_async_web3(network)
+        self.chunk_size = chunk_size
+        self.multicall: AsyncContract = self.w3.eth.contract(
+            address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI
+        )
+        # used only to encode calldata, never bound to an address
+        self.erc20: AsyncContract = self.w3.eth.contract(abi=ERC20_ABI)
+
+    async def aggregate(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        """
+        Executes raw calls through Multicall3 and returns their return data.
+
+        Args:
+            calls (List[Tuple[str, bytes]]): (target address, calldata) pairs.
+
+        Returns:
+            List[Optional[bytes]]: The return data of each call in order, None for calls that reverted.
+        """
+        results: List[Optional[bytes]] = []
+        for start in range(0, len(calls), self.chunk_size):
+            chunk = [
+                (target, True, data)
+                for target, data in calls[start : start + self.chunk_size]
+            ]
+            response = await self.multicall.functions.aggregate3(chunk).call()
+            results.extend(
+                return_data if success and return_data else None
+                for success, return_data in response
+            )
+        return results
+
+    def _encode(self, fn_name: str, args: List[Any]) -> bytes:
+        return bytes.fromhex(self.erc20.encodeABI(fn_name=fn_name, args=args)[2:])
+
+    @staticmethod
+    def _decode_uint(data: Optional[bytes]) -> Optional[int]:
+        if data is None:
+            return None
+        try:
+            return decode(["uint256"], data)[0]
+        except Exception:
+            return None
+
+    async def get_token_balances(
+        self, pairs: List[Tuple[str, str]], spender: Optional[str] = None
+    ) -> List[TokenBalance]:
+        """
+        Reads the balance (and optionally the allowance) of every (owner, token) pair plus each token's decimals.
+
+        Args:
+            pairs (List[Tuple[str, str]]): (owner address, token address) pairs.
+            spender (Optional[str], optional): When given, the allowance each owner granted this spender is read too.
+
+        Returns:
+            List[TokenBalance]: One entry per pair, in the order the pairs were given.
+
+        Example:
+            reader = Multicall3Reader("ETH")
+            balances = await reader.get_token_balances([(owner, usdt), (owner, weth)])
+            print(balances[0].amount)  # Output: 1000.0 (example balance)
+        """
+        if not pairs:
+            return []
+
+        pairs = [
+            (self.w3.to_checksum_address(owner), self.w3.to_checksum_address(token))
+            for owner, token in pairs
+        ]
+        tokens = list(dict.fromkeys(token for _, token in pairs))
+        if spender is not None:
+            spender = self.w3.to_checksum_address(spender)
+
+        calls: List[Tuple[str, bytes]] = [
+            (token, self._encode("decimals", [])) for token in tokens
+        ]
+        calls.extend(
+            (token, self._encode("balanceOf", [owner])) for owner, token in pairs
+        )
+        if spender is not None:
+            calls.extend(
+                (token, self._encode("allowance", [owner, spender]))
+                for owner, token in pairs
+            )
+
+        results = await self.aggregate(calls)
+        LOGGER.debug(f"Multicall read {len(calls)} values in {len(pairs)} pairs")
+
+        decimals: Dict[str, Optional[int]] = {
+            token: self._decode_uint(data)
+            for token, data in zip(tokens, results[: len(tokens)])
+        }
+        balances = results[len(tokens) : len(tokens) + len(pairs)]
+        allowances = (
+            results[len(tokens) + len(pairs) :]
+            if spender is not None
+            else [None] * len(pairs)
+        )
+
+        return [
+            TokenBalance(
+                owner=owner,
+                token=token,
+                balance=self._decode_uint(balance),
+                decimals=decimals[token],
+                allowance=self._decode_uint(allowance),
+            )
+            for (owner, token), balance, allowance in zip(pairs, balances, allowances)
+        ]
+
+    async def get_eth_balances(self, owners: List[str]) -> List[Optional[int]]:
+        """
+        Reads the native coin balance of many addresses through Multicall3 `getEthBalance`.
+
+        Args:
+            owners (List[str]): The addresses.
+
+        Returns:
+            List[Optional[int]]: Each balance in wei, in the order the owners were given.
+        """
+        if not owners:
+            return []
+        calls = [
+            (
+                MULTICALL3_ADDRESS,
+                bytes.fromhex(
+                    self.multicall.encodeABI(
+                        fn_name="getEthBalance", args=[self.w3.to_checksum_address(owner)]
+                    )[2:]
+                ),
+            )
+            for owner in owners
+        ]
+        return [self._decode_uint(data) for data in await self.aggregate(calls)]
+
+    async def get_amounts_out(self, router: str, amounts: List[int], path: List[str]) -> List[Optional[int]]:
+        """
+        Quotes many amounts along one path with a V2 router's `getAmountsOut`.
+
+        Args:
+            router (str): The checksum address of the router.
+            amounts (List[int]): The amounts sold, in the first token's smallest unit.
+            path (List[str]): The token path.
+
+        Returns:
+            List[Optional[int]]: The amount bought for each amount sold, None where the quote reverted.
+        """
+        calls = [
+            (router, GET_AMOUNTS_OUT_SELECTOR + encode(["uint256", "address[]"], [amount, path]))
+            for amount in amounts
+        ]
+        quotes = []
+        for data in await self.aggregate(calls):
+            try:
+                quotes.append(decode(["uint256[]"], data)[0][-1] if data else None)
+            except Exception:
+                quotes.append(None)
+        return quotes
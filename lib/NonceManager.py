@@ -0,0 +1,323 @@
+import json
+import time
+from typing import Any, Dict, List
+
+from eth_account import Account
+from hexbytes import HexBytes
+
+from data.Networks import Networks
+from lib.GasOracle import GasOracles
+from lib.Logger import LOGGER
+from lib.RedisClient import get_redis
+from lib.RpcBatch import JsonRpcBatch, to_int
+from lib.RpcRouter import RpcRouters
+from lib.Types import NonceReport
+
+# hands out a released nonce first, otherwise the counter, seeding it from the chain when it expired.
+# returns -1 when the counter is missing and no seed was passed so the caller can fetch one.
+RESERVE_SCRIPT = """
+local gap = redis.call('ZPOPMIN', KEYS[2])
+if gap[1] then
+    redis.call('ZADD', KEYS[3], ARGV[1], gap[1])
+    return tonumber(gap[1])
+end
+local current = redis.call('GET', KEYS[1])
+if not current then
+    if ARGV[2] == '' then
+        return -1
+    end
+    current = ARGV[2]
+    redis.call('SET', KEYS[1], current, 'EX', ARGV[3])
+end
+redis.call('INCR', KEYS[1])
+redis.call('ZADD', KEYS[3], ARGV[1], current)
+return tonumber(current)
+"""
+
+# gives an unused nonce back, the counter is rolled back when it was the last one handed out
+RELEASE_SCRIPT = """
+if redis.call('ZREM', KEYS[3], ARGV[1]) == 0 then
+    return 0
+end
+local current = redis.call('GET', KEYS[1])
+if current and tonumber(current) == tonumber(ARGV[1]) + 1 then
+    redis.call('DECR', KEYS[1])
+else
+    redis.call('ZADD', KEYS[2], ARGV[1], ARGV[1])
+end
+return 1
+"""
+
+# nodes only accept a replacement that raises both fee fields by at least 10%
+REPLACEMENT_BUMP = 1.125
+
+
+class NonceManager:
+    """
+    Allocates nonces per address from Redis so several transactions from one wallet can be in flight at once.
+
+    The bot and the celery workers share the same counters, reservations are atomic Lua scripts,
+    and the chain is only asked for the transaction count when a counter is first seeded or has
+    expired after `resync_after` seconds. Reserved nonces that are never broadcast are handed out
+    again, and `inspect`/`heal` find gaps and stuck transactions and fill or re-price them.
+
+    Keys per address, all under `nonce:<network>:<address>`:
+        next      the next fresh nonce
+        reserved  zset of nonces handed out but not yet broadcast, scored by reservation time
+        gaps      zset of released nonces to hand out before fresh ones
+        inflight  hash of broadcast transactions by nonce
+    """
+
+    def __init__(
+        self,
+        network: str = "ETH",
+        resync_after: int = 60,
+        reserve_timeout: float = 120.0,
+        stuck_after: float = 90.0,
+    ) -> None:
+        """
+        Initializes a nonce manager for a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            resync_after (int, optional): Seconds before a counter expires and is reseeded from the chain.
+                Defaults to 60.
+            reserve_timeout (float, optional): Seconds before a reserved but unsent nonce counts as abandoned.
+                Defaults to 120.0.
+            stuck_after (float, optional): Seconds before an unmined in-flight transaction counts as stuck.
+                Defaults to 90.0.
+        """
+        self.network = network
+        self.chain_id = [chain for chain in Networks if chain.sn == network][0].id
+        self.resync_after = resync_after
+        self.reserve_timeout = reserve_timeout
+        self.stuck_after = stuck_after
+
+    def _keys(self, address: str) -> List[str]:
+        prefix = f"nonce:{self.network}:{address.lower()}"
+        return [f"{prefix}:next", f"{prefix}:gaps", f"{prefix}:reserved", f"{prefix}:inflight"]
+
+    async def _chain_counts(self, address: str) -> List[int]:
+        batch = JsonRpcBatch(self.network)
+        batch.add("eth_getTransactionCount", [address, "latest"])
+        batch.add("eth_getTransactionCount", [address, "pending"])
+        return [to_int(count) for count in await RpcRouters.get(self.network).batch(batch)]
+
+    async def reserve(self, address: str) -> int:
+        """
+        Reserves the next nonce for an address.
+
+        Args:
+            address (str): The sending address.
+
+        Returns:
+            int: A nonce no other caller will be given until it is released.
+        """
+        redis = get_redis()
+        keys = self._keys(address)
+        now = time.time()
+        nonce = await redis.eval(RESERVE_SCRIPT, 3, *keys[:3], now, "", self.resync_after)
+        if nonce >= 0:
+            return nonce
+
+        # the counter expired, seed it past both the chain and anything still tracked as in flight
+        _, pending = await self._chain_counts(address)
+        tracked = [int(n) for n in await redis.hkeys(keys[3])]
+        tracked += [int(n) for n in await redis.zrange(keys[2], 0, -1)]
+        seed = max([pending] + [n + 1 for n in tracked])
+        return await redis.eval(RESERVE_SCRIPT, 3, *keys[:3], now, seed, self.resync_after)
+
+    async def release(self, address: str, nonce: int) -> None:
+        """
+        Gives back a reserved nonce that was not broadcast, so the next reservation reuses it.
+
+        Args:
+            address (str): The sending address.
+            nonce (int): The reserved nonce.
+        """
+        keys = self._keys(address)
+        await get_redis().eval(RELEASE_SCRIPT, 3, *keys[:3], nonce)
+
+    async def mark_sent(self, address: str, nonce: int, tx_hash: HexBytes, transaction: Dict[str, Any]) -> None:
+        """
+        Records a broadcast transaction so it can be re-priced if it gets stuck.
+
+        Args:
+            address (str): The sending address.
+            nonce (int): The transaction nonce.
+            tx_hash (HexBytes): The transaction hash.
+            transaction (Dict[str, Any]): The unsigned transaction that was signed and sent.
+        """
+        keys = self._keys(address)
+        entry = {"hash": HexBytes(tx_hash).hex(), "sent_at": time.time(), "tx": transaction}
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.zrem(keys[2], nonce)
+            pipe.hset(keys[3], nonce, json.dumps(entry, default=str))
+            await pipe.execute()
+
+    async def mark_mined(self, address: str, nonce: int) -> None:
+        """
+        Stops tracking a transaction once it has been mined.
+
+        Args:
+            address (str): The sending address.
+            nonce (int): The transaction nonce.
+        """
+        await get_redis().hdel(self._keys(address)[3], nonce)
+
+    async def resync(self, address: str) -> None:
+        """
+        Drops the counter and the free list so the next reservation reseeds from the chain, e.g. after "nonce too low".
+
+        Args:
+            address (str): The sending address.
+        """
+        next_key, gaps_key, _, _ = self._keys(address)
+        await get_redis().delete(next_key, gaps_key)
+
+    async def inspect(self, address: str) -> NonceReport:
+        """
+        Compares the tracked nonces with the chain.
+
+        What has been mined is pruned, and gaps and stuck transactions are reported.
+
+        Args:
+            address (str): The sending address.
+
+        Returns:
+            NonceReport: The current nonce state of the address.
+        """
+        redis = get_redis()
+        next_key, gaps_key, reserved_key, inflight_key = self._keys(address)
+        mined, pending = await self._chain_counts(address)
+        now = time.time()
+
+        async with redis.pipeline(transaction=True) as pipe:
+            # gaps are scored by their own nonce, anything the node already holds is no longer free
+            pipe.zremrangebyscore(gaps_key, "-inf", pending - 1)
+            pipe.zrange(reserved_key, 0, -1, withscores=True)
+            pipe.hgetall(inflight_key)
+            pipe.get(next_key)
+            _, reserved, in_flight, next_nonce = await pipe.execute()
+
+        in_flight = {int(nonce): json.loads(entry) for nonce, entry in in_flight.items()}
+        mined_nonces = [nonce for nonce in in_flight if nonce < mined]
+        if mined_nonces:
+            await redis.hdel(inflight_key, *mined_nonces)
+            for nonce in mined_nonces:
+                del in_flight[nonce]
+
+        for nonce, reserved_at in reserved:
+            nonce = int(nonce)
+            if nonce < mined:
+                await redis.zrem(reserved_key, nonce)
+            elif now - reserved_at > self.reserve_timeout:
+                # the reserving process died before broadcasting, hand the nonce out again
+                await self.release(address, nonce)
+
+        next_nonce = int(next_nonce) if next_nonce is not None else None
+        reserved_now = {int(n) for n in await redis.zrange(reserved_key, 0, -1)}
+        upper = max([next_nonce or pending] + [n + 1 for n in in_flight])
+        # the node's pending count stops at the first nonce missing from its mempool
+        gaps = [
+            nonce
+            for nonce in range(pending, upper)
+            if nonce not in in_flight and nonce not in reserved_now
+        ]
+        if gaps:
+            await redis.zadd(gaps_key, {nonce: nonce for nonce in gaps})
+
+        stuck = [
+            nonce
+            for nonce, entry in in_flight.items()
+            if now - entry["sent_at"] > self.stuck_after
+        ]
+
+        report = NonceReport(address, mined, pending, next_nonce, in_flight, gaps, sorted(stuck))
+        if report.gaps or report.stuck:
+            LOGGER.info(
+                f"Nonces for {address} on {self.network}: mined={mined} gaps={report.gaps} stuck={report.stuck}"
+            )
+        return report
+
+    async def heal(self, private_key: str) -> List[HexBytes]:
+        """
+        Fills gaps that block later transactions with zero value self transfers and re-broadcasts
+        stuck transactions with bumped fees.
+
+        Args:
+            private_key (str): The private key of the address to heal.
+
+        Returns:
+            List[HexBytes]: The hashes of the transactions that were sent.
+        """
+        account = Account.from_key(private_key)
+        report = await self.inspect(account.address)
+        quote = (await GasOracles.get(self.network).quote("snipe")).to_tx_fields()
+        sent: List[HexBytes] = []
+
+        last_in_flight = max(report.in_flight, default=-1)
+        for nonce in report.gaps:
+            if nonce > last_in_flight:
+                # nothing waits behind this gap, the next reservation will use it
+                continue
+            gap_fill = {
+                "nonce": nonce,
+                "to": account.address,
+                "value": 0,
+                "gas": 21000,
+                **quote,
+                "chainId": self.chain_id,
+            }
+            sent.append(await self._send(account, gap_fill, claim=True))
+
+        for nonce in report.stuck:
+            transaction = dict(report.in_flight[nonce]["tx"])
+            for field, value in self._bumped_fees(transaction, quote).items():
+                transaction[field] = value
+            sent.append(await self._send(account, transaction))
+
+        return sent
+
+    @staticmethod
+    def _bumped_fees(transaction: Dict[str, Any], quote: Dict[str, int]) -> Dict[str, int]:
+        fields = {}
+        for field in ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice"):
+            if field in transaction:
+                bumped = int(int(transaction[field]) * REPLACEMENT_BUMP) + 1
+                fields[field] = max(bumped, quote.get(field, 0))
+        return fields
+
+    async def _send(self, account: Any, transaction: Dict[str, Any], claim: bool = False) -> HexBytes:
+        nonce = int(transaction["nonce"])
+        if claim:
+            # take the gap out of the free list so no reservation races the fill
+            await get_redis().zrem(self._keys(account.address)[1], nonce)
+        transaction = {
+            key: int(value) if key in ("nonce", "value", "gas", "chainId") else value
+            for key, value in transaction.items()
+        }
+        signed = account.sign_transaction(transaction)
+        tx_hash = await RpcRouters.get(self.network).send_raw_transaction(signed.rawTransaction)
+        await self.mark_sent(account.address, nonce, tx_hash, transaction)
+        LOGGER.info(f"Sent nonce {nonce} for {account.address} on {self.network}: {tx_hash.hex()}")
+        return tx_hash
+
+
+class NonceManagerRegistry:
+    """
+    Holds one NonceManager per network.
+    """
+
+    def __init__(self) -> None:
+        self._managers: Dict[str, NonceManager] = {}
+
+    def get(self, network: str = "ETH") -> NonceManager:
+        manager = self._managers.get(network)
+        if manager is None:
+            manager = NonceManager(network)
+            self._managers[network] = manager
+        return manager
+
+
+NonceManagers = NonceManagerRegistry()
@@ -0,0 +1,208 @@
+import asyncio
+import contextlib
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+import aiohttp
+
+from data.Queries import SnipeTradeData
+from lib.Logger import LOGGER
+from lib.RedisClient import get_redis
+
+COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+
+
+class PriceFeed:
+    """
+    Fetches the USD price of every token with an open snipe position and publishes the ticks through Redis.
+
+    One loop, run by the bot process, tracks the union of the open SnipeTrade token ids and
+    of the ids watchers subscribed to, and fetches them every `interval` seconds with
+    CoinGecko `/simple/price` requests of up to `batch_size` ids each, spaced at least
+    `min_request_interval` apart and backing off when rate limited. API usage therefore
+    depends on the number of batches, not on the number of positions. Each round's prices
+    are kept in a Redis hash and published on a channel, so stop-loss and take-profit
+    watchers in any process react within seconds of a price move.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        batch_size: int = 250,
+        min_request_interval: float = 2.5,
+        positions_interval: float = 30.0,
+        subscription_ttl: float = 120.0,
+    ) -> None:
+        """
+        Initializes the feed, nothing is fetched until `start` is called.
+
+        Args:
+            interval (float, optional): Seconds between price rounds. Defaults to 10.0.
+            batch_size (int, optional): Token ids per CoinGecko request. Defaults to 250.
+            min_request_interval (float, optional): Seconds between two CoinGecko requests. Defaults to 2.5.
+            positions_interval (float, optional): Seconds between reads of the open snipe trades. Defaults to 30.0.
+            subscription_ttl (float, optional): Seconds a subscription is tracked after its last heartbeat.
+                Defaults to 120.0.
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self.min_request_interval = min_request_interval
+        self.positions_interval = positions_interval
+        self.subscription_ttl = subscription_ttl
+        self.key = "prices:usd"
+        self.channel = "prices:ticks"
+        self._positions: Set[str] = set()
+        self._positions_read_at: Optional[float] = None
+        self._last_request_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts fetching on the running event loop, a no-op when already running.
+
+        Returns:
+            asyncio.Task: The background fetch task.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def run(self) -> None:
+        """
+        Fetches and publishes a round of prices every `interval` seconds.
+        """
+        while True:
+            started = time.monotonic()
+            try:
+                await self.publish(await self.fetch(await self.tracked()))
+            except Exception as e:
+                LOGGER.error(f"Price feed round failed: {e}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0.0))
+
+    async def tracked(self) -> List[str]:
+        """
+        Returns the token ids of the open snipe trades and of the live subscriptions.
+
+        Returns:
+            List[str]: The CoinGecko ids to fetch.
+        """
+        now = time.monotonic()
+        if self._positions_read_at is None or now - self._positions_read_at > self.positions_interval:
+            trades = await SnipeTradeData.get_all_sniped_tokens() or []
+            self._positions = {trade.token_id for trade in trades if not trade.completed_trade}
+            self._positions_read_at = now
+
+        redis = get_redis()
+        await redis.zremrangebyscore(f"{self.key}:wanted", "-inf", time.time() - self.subscription_ttl)
+        subscribed = await redis.zrange(f"{self.key}:wanted", 0, -1)
+        return sorted(self._positions.union(subscribed))
+
+    async def fetch(self, token_ids: List[str]) -> Dict[str, float]:
+        """
+        Fetches the USD price of many tokens in batched `ids=` requests.
+
+        Args:
+            token_ids (List[str]): The CoinGecko ids.
+
+        Returns:
+            Dict[str, float]: The price of each id CoinGecko knows.
+        """
+        prices: Dict[str, float] = {}
+        async with aiohttp.ClientSession() as session:
+            for start in range(0, len(token_ids), self.batch_size):
+                batch = token_ids[start : start + self.batch_size]
+                # stay under the rate limit however many batches a round takes
+                await asyncio.sleep(max(self._last_request_at + self.min_request_interval - time.monotonic(), 0.0))
+                self._last_request_at = time.monotonic()
+                async with session.get(
+                    COINGECKO_PRICE_URL,
+                    params={"ids": ",".join(batch), "vs_currencies": "usd"},
+                ) as response:
+                    if response.status == 429:
+                        retry_after = float(response.headers.get("Retry-After", 60))
+                        LOGGER.warning(f"CoinGecko rate limited the price feed, waiting {retry_after:.0f}s")
+                        self._last_request_at = time.monotonic() + retry_after
+                        break
+                    response.raise_for_status()
+                    data = await response.json()
+                prices.update(
+                    {token_id: float(quote["usd"]) for token_id, quote in data.items() if quote.get("usd") is not None}
+                )
+        return prices
+
+    async def publish(self, prices: Dict[str, float]) -> None:
+        """
+        Stores a round of prices and publishes it to the subscribers.
+
+        Args:
+            prices (Dict[str, float]): The price of each token id.
+        """
+        if not prices:
+            return
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hset(self.key, mapping=prices)
+            pipe.publish(self.channel, json.dumps(prices))
+            await pipe.execute()
+
+    async def price(self, token_id: str) -> Optional[float]:
+        """
+        Returns the last published price of a token.
+
+        Args:
+            token_id (str): The CoinGecko id.
+
+        Returns:
+            Optional[float]: The price in USD, None when it was never fetched.
+        """
+        price = await get_redis().hget(self.key, token_id)
+        return float(price) if price is not None else None
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, token_id: str) -> AsyncIterator[AsyncIterator[float]]:
+        """
+        Subscribes to a token's price ticks, starting with its last published price.
+
+        The token is tracked by the feed for as long as the subscription is open, even
+        before its snipe trade is saved.
+
+        Args:
+            token_id (str): The CoinGecko id.
+
+        Yields:
+            AsyncIterator[float]: The token's price in USD on every tick.
+
+        Example:
+            async with PriceFeeds.subscribe("ripple") as prices:
+                async for price in prices:
+                    print(price)  # Output: 0.52 (example price)
+        """
+        redis = get_redis()
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(self.channel)
+
+        async def ticks() -> AsyncIterator[float]:
+            price = await self.price(token_id)
+            if price is not None:
+                yield price
+            heartbeat = 0.0
+            while True:
+                if time.monotonic() - heartbeat > self.subscription_ttl / 4:
+                    await redis.zadd(f"{self.key}:wanted", {token_id: time.time()})
+                    heartbeat = time.monotonic()
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.interval)
+                if message is None:
+                    continue
+                price = json.loads(message["data"]).get(token_id)
+                if price is not None:
+                    yield float(price)
+
+        try:
+            yield ticks()
+        finally:
+            await pubsub.unsubscribe(self.channel)
+            await pubsub.reset()
+
+
+PriceFeeds = PriceFeed()
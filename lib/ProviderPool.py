@@ -0,0 +1,335 @@
+import asyncio
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.contract import AsyncContract, Contract
+from web3.middleware import async_geth_poa_middleware, geth_poa_middleware
+
+from jupiter_python_sdk.jupiter import Jupiter
+from solana.rpc.async_api import AsyncClient
+from solders.keypair import Keypair  # type: ignore
+
+from lib.GetDotEnv import (
+    AVALANCHE_HTTP_URL,
+    AVALANCHE_HTTP_URLS,
+    BSC_HTTP_URL,
+    BSC_HTTP_URLS,
+    ETH_HTTP_URLS,
+    INFURA_HTTP_URL,
+    INFURA_WS_URL,
+    POLYGON_HTTP_URL,
+    POLYGON_HTTP_URLS,
+    QUICKNODE_HTTP,
+)
+from lib.Logger import LOGGER
+
+# short network name -> http rpc endpoint, SOL falls back to infura like ETHWallet always did
+RPC_URLS: Dict[str, str] = {
+    "ETH": INFURA_HTTP_URL,
+    "SOL": INFURA_HTTP_URL,
+    "BSC": BSC_HTTP_URL,
+    "POL": POLYGON_HTTP_URL,
+    "AVL": AVALANCHE_HTTP_URL,
+}
+
+# websocket endpoints for head and log subscriptions, chains without one fall back to polling
+WS_URLS: Dict[str, str] = {
+    "ETH": INFURA_WS_URL,
+}
+
+# uniswap v2 compatible router per chain, chains not listed use the uniswap v2 router
+V2_ROUTERS: Dict[str, str] = {
+    "BSC": "0x10ED43C718714eb63d5aA57B78B54704E256024E",  # pancakeswap v2
+    "POL": "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff",  # quickswap
+}
+
+# every endpoint known for a chain, the primary url first
+RPC_ENDPOINTS: Dict[str, List[str]] = {
+    "ETH": [INFURA_HTTP_URL, *ETH_HTTP_URLS],
+    "SOL": [INFURA_HTTP_URL, *ETH_HTTP_URLS],
+    "BSC": [BSC_HTTP_URL, *BSC_HTTP_URLS],
+    "POL": [POLYGON_HTTP_URL, *POLYGON_HTTP_URLS],
+    "AVL": [AVALANCHE_HTTP_URL, *AVALANCHE_HTTP_URLS],
+}
+
+
+class Web3ProviderPool:
+    """
+    A process wide registry of Web3 providers keyed by network short name.
+
+    Each chain gets exactly one `Web3` instance backed by a keep-alive `requests.Session`,
+    one `AsyncWeb3` instance backed by web3's cached aiohttp session, and one prebuilt
+    Uniswap router contract for each. They are created the first time the chain is requested
+    and reused by every `ETHWallet`, `WsCryptoCopyTrader` and `HttpCryptoCopyTrader` afterwards,
+    so the connect handshake and contract construction are paid once per process.
+
+    Attributes:
+        built (int): The number of providers created since the process started.
+        reused (int): The number of times an existing provider was handed out.
+    """
+
+    def __init__(self, pool_maxsize: int = 32) -> None:
+        """
+        Initializes an empty provider pool.
+
+        Args:
+            pool_maxsize (int, optional): Maximum number of keep-alive connections per chain. Defaults to 32.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.built = 0
+        self.reused = 0
+        self._providers: Dict[str, Web3] = {}
+        self._routers: Dict[str, Contract] = {}
+        self._async_providers: Dict[str, AsyncWeb3] = {}
+        self._async_routers: Dict[str, AsyncContract] = {}
+        self._lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_web3(self, network: str = "ETH") -> Web3:
+        """
+        Returns the shared Web3 instance for a network, building it on first use.
+
+        Args:
+            network (str, optional): The short name of the network (ETH, BSC, POL, AVL). Defaults to "ETH".
+
+        Returns:
+            Web3: A connected Web3 instance for the network.
+
+        Raises:
+            ConnectionError: If the provider could not connect when it was first built.
+        """
+        w3 = self._providers.get(network)
+        if w3 is not None:
+            self.reused += 1
+            return w3
+
+        with self._lock:
+            # another thread may have built it while we waited on the lock
+            w3 = self._providers.get(network)
+            if w3 is not None:
+                self.reused += 1
+                return w3
+
+            w3 = Web3(
+                Web3.HTTPProvider(
+                    f"{RPC_URLS[network]}", session=self._build_session()
+                )
+            )
+            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            if not w3.is_connected():
+                LOGGER.info("Connection Error")
+                raise ConnectionError("Failed to connect to the Ethereum network")
+
+            self._providers[network] = w3
+            self.built += 1
+            LOGGER.debug(f"Built web3 provider for {network}")
+            return w3
+
+    def get_router(self, network: str = "ETH") -> Contract:
+        """
+        Returns the shared Uniswap router contract for a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+
+        Returns:
+            Contract: The prebuilt router contract bound to the pooled provider.
+        """
+        router = self._routers.get(network)
+        if router is None:
+            # imported here to avoid a circular import with WalletClass
+            from lib.WalletClass import uniswap_abi, uniswap_contract
+
+            router = self.get_web3(network).eth.contract(
+                address=V2_ROUTERS.get(network, uniswap_contract), abi=uniswap_abi
+            )
+            self._routers[network] = router
+        return router
+
+    def get_async_web3(self, network: str = "ETH") -> AsyncWeb3:
+        """
+        Returns the shared AsyncWeb3 instance for a network, building it on first use.
+
+        No connection check is made here since that would need an awaited round-trip,
+        connection failures surface on the first awaited call instead.
+
+        Args:
+            network (str, optional): The short name of the network (ETH, BSC, POL, AVL). Defaults to "ETH".
+
+        Returns:
+            AsyncWeb3: An AsyncWeb3 instance for the network.
+        """
+        w3 = self._async_providers.get(network)
+        if w3 is not None:
+            self.reused += 1
+            return w3
+
+        with self._lock:
+            w3 = self._async_providers.get(network)
+            if w3 is not None:
+                self.reused += 1
+                return w3
+
+            w3 = AsyncWeb3(AsyncHTTPProvider(f"{RPC_URLS[network]}"))
+            w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+            self._async_providers[network] = w3
+            self.built += 1
+            LOGGER.debug(f"Built async web3 provider for {network}")
+            return w3
+
+    def get_async_router(self, network: str = "ETH") -> AsyncContract:
+        """
+        Returns the shared Uniswap router contract bound to the async provider of a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+
+        Returns:
+            AsyncContract: The prebuilt router contract bound to the pooled async provider.
+        """
+        router = self._async_routers.get(network)
+        if router is None:
+            from lib.WalletClass import uniswap_abi, uniswap_contract
+
+            router = self.get_async_web3(network).eth.contract(
+                address=V2_ROUTERS.get(network, uniswap_contract), abi=uniswap_abi
+            )
+            self._async_routers[network] = router
+        return router
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the pool counters.
+
+        Returns:
+            Dict[str, int]: The number of providers built, reused and currently held.
+        """
+        return {
+            "built": self.built,
+            "reused": self.reused,
+            "chains": len(set(self._providers) | set(self._async_providers)),
+        }
+
+
+class SolanaClientPool:
+    """
+    Keeps one keep-alive Solana `AsyncClient` per event loop and a small cache of Jupiter sessions.
+
+    The client's underlying httpx connection pool is bound to the loop it was first used on,
+    so the bot's loop gets one client for its whole life while each Celery loop gets its own.
+    Jupiter sessions are cached per private key with LRU and idle-time eviction so the keypair
+    is decoded and the Jupiter object built once per active user instead of on every swap.
+
+    Attributes:
+        built (int): The number of Solana clients created since the process started.
+        reused (int): The number of times an existing client was handed out.
+    """
+
+    def __init__(self, max_sessions: int = 256, session_ttl: float = 30 * 60) -> None:
+        """
+        Initializes an empty Solana pool.
+
+        Args:
+            max_sessions (int, optional): Maximum number of cached Jupiter sessions. Defaults to 256.
+            session_ttl (float, optional): Seconds an unused Jupiter session is kept. Defaults to 30 minutes.
+        """
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.built = 0
+        self.reused = 0
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sessions: "OrderedDict[str, Tuple[AsyncClient, Jupiter, Keypair, float]]" = (
+            OrderedDict()
+        )
+
+    def get_client(self) -> AsyncClient:
+        """
+        Returns the shared Solana client for the running event loop.
+
+        Returns:
+            AsyncClient: A keep-alive client for QUICKNODE_HTTP.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # outside of a loop there is nothing to share the client with
+            self.built += 1
+            return AsyncClient(QUICKNODE_HTTP)
+
+        client = self._clients.get(loop)
+        if client is not None:
+            self.reused += 1
+            return client
+
+        client = AsyncClient(QUICKNODE_HTTP)
+        self._clients[loop] = client
+        self.built += 1
+        LOGGER.debug("Built solana client")
+        return client
+
+    def get_jupiter(self, client: AsyncClient, private_key: str) -> Tuple[Jupiter, Keypair]:
+        """
+        Returns a cached Jupiter session and decoded keypair for a private key.
+
+        Args:
+            client (AsyncClient): The client the session should use.
+            private_key (str): The base58 encoded private key.
+
+        Returns:
+            Tuple[Jupiter, Keypair]: The Jupiter session and the decoded keypair.
+        """
+        now = time.monotonic()
+        self._evict(now)
+
+        entry = self._sessions.get(private_key)
+        if entry is not None and entry[0] is client:
+            self._sessions.move_to_end(private_key)
+            self._sessions[private_key] = (client, entry[1], entry[2], now)
+            return entry[1], entry[2]
+
+        keypair = Keypair.from_base58_string(private_key)
+        jupiter = Jupiter(client, keypair)
+        self._sessions[private_key] = (client, jupiter, keypair, now)
+        self._sessions.move_to_end(private_key)
+        self._evict(now)
+        return jupiter, keypair
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            _, (_, _, _, last_used) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used < self.session_ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the pool counters.
+
+        Returns:
+            Dict[str, int]: The number of clients built and reused and Jupiter sessions currently cached.
+        """
+        return {
+            "built": self.built,
+            "reused": self.reused,
+            "jupiter_sessions": len(self._sessions),
+        }
+
+
+ProviderPool = Web3ProviderPool()
+SolanaPool = SolanaClientPool()
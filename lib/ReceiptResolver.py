@@ -0,0 +1,277 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted
+
+from lib.ChainHead import ChainHeads
+from lib.Logger import LOGGER
+from lib.RpcBatch import JsonRpcBatch, to_int
+from lib.RpcRouter import RpcRouters
+from lib.Types import BlockHeader
+
+RECEIPT_INT_FIELDS = [
+    "blockNumber",
+    "cumulativeGasUsed",
+    "effectiveGasPrice",
+    "gasUsed",
+    "status",
+    "transactionIndex",
+    "type",
+]
+
+
+class TransactionDropped(Exception):
+    """
+    Raised when a pending transaction disappeared from the node's mempool without being mined.
+    """
+
+
+class TransactionReplaced(Exception):
+    """
+    Raised when the nonce of a pending transaction was mined by a different transaction.
+    """
+
+
+class _PendingReceipt:
+    def __init__(
+        self,
+        tx_hash: str,
+        future: asyncio.Future,
+        sender: Optional[str],
+        nonce: Optional[int],
+        registered_at: Optional[int],
+    ) -> None:
+        self.tx_hash = tx_hash
+        self.future = future
+        self.sender = sender
+        self.nonce = nonce
+        self.registered_at = registered_at
+        self.nonce_taken_checks = 0
+
+
+class ReceiptResolver:
+    """
+    Resolves transaction receipts for one chain from a single batched request per block.
+
+    Callers `await wait(tx_hash)` instead of polling. On every new head from the chain's
+    ChainHeadTracker one JSON-RPC batch asks for the receipt of every pending hash, the
+    senders' mined transaction counts (to notice a nonce taken by a replacement) and, for
+    transactions pending for a few blocks, whether the node still knows them (to notice drops).
+    RPC load therefore grows with blocks instead of with transactions in flight.
+    """
+
+    def __init__(self, network: str = "ETH", drop_after_blocks: int = 5) -> None:
+        """
+        Initializes a resolver for a network, it starts listening on the first `wait`.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            drop_after_blocks (int, optional): Blocks a transaction may be pending before the node is
+                asked whether it still has it. Defaults to 5.
+        """
+        self.network = network
+        self.drop_after_blocks = drop_after_blocks
+        self.pending: Dict[str, List[_PendingReceipt]] = {}
+        self._attached = False
+        self._checking: Optional[asyncio.Task] = None
+        self._check_soon: Optional[asyncio.Task] = None
+
+    def _attach(self) -> None:
+        tracker = ChainHeads.get(self.network)
+        tracker.start()
+        if not self._attached:
+            tracker.add_listener(self._on_head)
+            self._attached = True
+
+    def _on_head(self, header: BlockHeader) -> None:
+        if self.pending:
+            self._schedule(header)
+
+    def _schedule(self, header: Optional[BlockHeader] = None) -> None:
+        # one check at a time, a head that arrives mid-check is covered by the next one
+        if self._checking is None or self._checking.done():
+            self._checking = asyncio.ensure_future(self._check(header))
+            self._checking.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+    async def wait(
+        self,
+        tx_hash: Union[HexBytes, str],
+        timeout: float = 120.0,
+        sender: Optional[str] = None,
+        nonce: Optional[int] = None,
+        check_now: bool = False,
+    ) -> AttributeDict:
+        """
+        Waits for a transaction's receipt.
+
+        Args:
+            tx_hash (Union[HexBytes, str]): The transaction hash.
+            timeout (float, optional): Seconds to wait before giving up. Defaults to 120.0.
+            sender (Optional[str], optional): The sender, with `nonce` lets a replacement be noticed. Defaults to None.
+            nonce (Optional[int], optional): The transaction nonce. Defaults to None.
+            check_now (bool, optional): Also check before the next block, for transactions that may
+                already be mined. Concurrent early checks are coalesced into one batch. Defaults to False.
+
+        Returns:
+            AttributeDict: The receipt, with `status`, `blockNumber` and gas fields as integers.
+
+        Raises:
+            TimeExhausted: The transaction was not mined within `timeout`.
+            TransactionDropped: The node no longer knows the transaction.
+            TransactionReplaced: Another transaction with the same sender and nonce was mined.
+        """
+        self._attach()
+        tx_hash = HexBytes(tx_hash).hex()
+        header = ChainHeads.get(self.network).header
+        entry = _PendingReceipt(
+            tx_hash,
+            asyncio.get_running_loop().create_future(),
+            sender,
+            nonce,
+            header.number if header is not None else None,
+        )
+        self.pending.setdefault(tx_hash, []).append(entry)
+
+        if check_now and (self._check_soon is None or self._check_soon.done()):
+            self._check_soon = asyncio.ensure_future(self._check_after(0.05))
+            self._check_soon.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry.future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(
+                f"Transaction {tx_hash} is not in the chain after {timeout} seconds"
+            )
+        finally:
+            self._forget(entry)
+
+    def _forget(self, entry: _PendingReceipt) -> None:
+        entries = self.pending.get(entry.tx_hash, [])
+        if entry in entries:
+            entries.remove(entry)
+        if not entries:
+            self.pending.pop(entry.tx_hash, None)
+
+    async def _check_after(self, delay: float) -> None:
+        # gathers every early check requested within the delay into one batch
+        await asyncio.sleep(delay)
+        if self._checking is not None and not self._checking.done():
+            await asyncio.shield(self._checking)
+        self._schedule()
+
+    async def _check(self, header: Optional[BlockHeader] = None) -> None:
+        pending = {tx_hash: list(entries) for tx_hash, entries in self.pending.items() if entries}
+        if not pending:
+            return
+        block_number = header.number if header is not None else None
+
+        batch = JsonRpcBatch(self.network)
+        receipt_calls = {tx_hash: batch.add("eth_getTransactionReceipt", [tx_hash]) for tx_hash in pending}
+        lookup_calls = {
+            tx_hash: batch.add("eth_getTransactionByHash", [tx_hash])
+            for tx_hash, entries in pending.items()
+            if block_number is not None
+            and any(
+                entry.registered_at is not None
+                and block_number - entry.registered_at >= self.drop_after_blocks
+                for entry in entries
+            )
+        }
+        senders = {
+            entry.sender
+            for entries in pending.values()
+            for entry in entries
+            if entry.sender is not None and entry.nonce is not None
+        }
+        count_calls = {
+            sender: batch.add("eth_getTransactionCount", [sender, "latest"])
+            for sender in senders
+        }
+
+        try:
+            results = await RpcRouters.get(self.network).batch(batch)
+        except Exception as e:
+            LOGGER.error(f"Receipt check on {self.network} failed: {e}")
+            return
+        mined_counts = {sender: to_int(results[index]) for sender, index in count_calls.items()}
+
+        for tx_hash, entries in pending.items():
+            receipt = results[receipt_calls[tx_hash]]
+            for entry in entries:
+                if entry.future.done():
+                    continue
+                if receipt is not None:
+                    self._settle(entry.future, result=self._format(receipt))
+                elif (
+                    entry.sender in mined_counts
+                    and mined_counts[entry.sender] > entry.nonce
+                ):
+                    # receipts can be indexed a moment after the count moves, ask again before giving up
+                    entry.nonce_taken_checks += 1
+                    if entry.nonce_taken_checks < 2:
+                        continue
+                    self._settle(
+                        entry.future,
+                        error=TransactionReplaced(
+                            f"Nonce {entry.nonce} of {entry.sender} was mined by another transaction than {tx_hash}"
+                        ),
+                    )
+                elif tx_hash in lookup_calls and results[lookup_calls[tx_hash]] is None:
+                    self._settle(
+                        entry.future,
+                        error=TransactionDropped(f"Transaction {tx_hash} was dropped from the mempool"),
+                    )
+
+    @staticmethod
+    def _settle(
+        future: asyncio.Future, result: Any = None, error: Optional[Exception] = None
+    ) -> None:
+        def settle() -> None:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        loop = future.get_loop()
+        if loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            settle()
+        else:
+            # the waiter lives on another loop, e.g. a celery task's
+            loop.call_soon_threadsafe(settle)
+
+    @staticmethod
+    def _format(receipt: Dict[str, Any]) -> AttributeDict:
+        formatted = dict(receipt)
+        for field in RECEIPT_INT_FIELDS:
+            if formatted.get(field) is not None:
+                formatted[field] = to_int(formatted[field])
+        return AttributeDict(formatted)
+
+
+class ReceiptResolverRegistry:
+    """
+    Holds one ReceiptResolver per network.
+    """
+
+    def __init__(self) -> None:
+        self._resolvers: Dict[str, ReceiptResolver] = {}
+
+    def get(self, network: str = "ETH") -> ReceiptResolver:
+        resolver = self._resolvers.get(network)
+        if resolver is None:
+            resolver = ReceiptResolver(network)
+            self._resolvers[network] = resolver
+        return resolver
+
+
+ReceiptResolvers = ReceiptResolverRegistry()
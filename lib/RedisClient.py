@@ -0,0 +1,40 @@
+import asyncio
+import weakref
+from typing import Dict
+
+from redis.asyncio import Redis
+
+from lib.GetDotEnv import REDIS_DB, REDIS_HOST, REDIS_PASSWORD, REDIS_POST
+
+# redis.asyncio connections are bound to the loop that opened them, celery workers spin up fresh loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, Redis]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_redis(decode_responses: bool = True) -> Redis:
+    """
+    Returns the shared asyncio Redis client for the running event loop, creating it when needed.
+
+    The bot process and the celery workers point at the same Redis, so state kept here
+    (nonces, checkpoints, caches) is shared between them.
+
+    Args:
+        decode_responses (bool, optional): Return str instead of bytes, pass False for binary blobs. Defaults to True.
+
+    Returns:
+        Redis: A pooled client bound to the current loop.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(decode_responses)
+    if client is None:
+        client = Redis(
+            host=REDIS_HOST,
+            port=int(REDIS_POST),
+            db=int(REDIS_DB),
+            password=REDIS_PASSWORD or None,
+            decode_responses=decode_responses,
+        )
+        clients[decode_responses] = client
+    return client
@@ -0,0 +1,179 @@
+import asyncio
+import itertools
+import weakref
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from lib.Logger import LOGGER
+from lib.ProviderPool import RPC_URLS
+
+# one keep-alive aiohttp session per running event loop, celery workers spin up fresh loops
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+_request_ids = itertools.count(1)
+
+# error codes nodes answer with when the caller is over its request quota
+RATE_LIMIT_CODES = {-32005, -32029, 429}
+
+
+class JsonRpcError(ValueError):
+    """
+    An error object a node answered a JSON-RPC call with, e.g. a reverted eth_call.
+
+    The endpoint itself worked, so another endpoint would give the same answer, unless
+    the error says the endpoint is rate limiting the caller.
+    """
+
+    def __init__(self, method: str, error: Any) -> None:
+        """
+        Initializes the error from the call's `error` field.
+
+        Args:
+            method (str): The JSON-RPC method that failed.
+            error (Any): The error object, usually a dict with `code` and `message`.
+        """
+        self.method = method
+        self.error = error
+        self.code = error.get("code") if isinstance(error, dict) else None
+        super().__init__(f"RPC error for {method}: {error}")
+
+    @property
+    def rate_limited(self) -> bool:
+        message = str(self.error.get("message", "") if isinstance(self.error, dict) else self.error).lower()
+        return self.code in RATE_LIMIT_CODES or "rate limit" in message or "too many requests" in message
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared aiohttp session for the running event loop, creating it when needed.
+
+    Returns:
+        aiohttp.ClientSession: A keep-alive session bound to the current loop.
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60)
+        )
+        _sessions[loop] = session
+    return session
+
+
+def to_int(value: Optional[str]) -> Optional[int]:
+    """
+    Converts a hex quantity returned by a JSON-RPC node to an integer.
+
+    Args:
+        value (Optional[str]): The hex encoded quantity, e.g. "0x1a".
+
+    Returns:
+        Optional[int]: The integer value, or None when the node returned null.
+    """
+    if value is None:
+        return None
+    return int(value, 16)
+
+
+class JsonRpcBatch:
+    """
+    Collects independent JSON-RPC calls and sends them to a node as a single batch request.
+
+    Web3.py 6 has no batch support, so reads that do not depend on each other (nonce,
+    latest block, fee suggestions, balances) are queued here and resolved in one HTTP round-trip.
+
+    Example:
+        batch = JsonRpcBatch("ETH")
+        batch.add("eth_getTransactionCount", [address, "latest"])
+        batch.add("eth_getBlockByNumber", ["latest", False])
+        nonce, block = await batch.execute()
+    """
+
+    def __init__(self, network: str = "ETH", url: Optional[str] = None, timeout: float = 10.0) -> None:
+        """
+        Initializes an empty batch for a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            url (Optional[str], optional): Overrides the endpoint taken from the provider pool. Defaults to None.
+            timeout (float, optional): Request timeout in seconds. Defaults to 10.0.
+        """
+        self.url = url or RPC_URLS[network]
+        self.timeout = timeout
+        self.calls: List[Dict[str, Any]] = []
+
+    def add(self, method: str, params: Optional[List[Any]] = None) -> int:
+        """
+        Queues a call and returns its position in the result list.
+
+        Args:
+            method (str): The JSON-RPC method name.
+            params (Optional[List[Any]], optional): The method parameters. Defaults to None.
+
+        Returns:
+            int: The index of this call's result in the list returned by `execute`.
+        """
+        self.calls.append(
+            {
+                "jsonrpc": "2.0",
+                "id": next(_request_ids),
+                "method": method,
+                "params": params or [],
+            }
+        )
+        return len(self.calls) - 1
+
+    async def execute(self, raise_on_error: bool = True, url: Optional[str] = None) -> List[Any]:
+        """
+        Sends every queued call in one request and returns the results in the order they were added.
+
+        The queued calls are left in place, so the same batch can be sent to several endpoints.
+
+        Args:
+            raise_on_error (bool, optional): Raise when any call returns an error instead of
+                leaving None in its slot. Defaults to True.
+            url (Optional[str], optional): Send to this endpoint instead of the batch's own. Defaults to None.
+
+        Returns:
+            List[Any]: The `result` field of each call.
+
+        Raises:
+            JsonRpcError: If a call returned an error and `raise_on_error` is set.
+            ValueError: If the node rejected the batch, left a call unanswered or did not answer JSON.
+        """
+        calls = list(self.calls)
+        if not calls:
+            return []
+
+        session = await get_session()
+        async with session.post(
+            url or self.url,
+            json=calls,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            response.raise_for_status()
+            payload = await response.json(content_type=None)
+
+        # a node rejecting the whole batch answers with a single error object
+        if isinstance(payload, dict):
+            raise ValueError(f"RPC batch rejected: {payload.get('error', payload)}")
+
+        by_id = {item.get("id"): item for item in payload}
+        results = []
+        for call in calls:
+            item = by_id.get(call["id"], {})
+            if "error" in item or "result" not in item:
+                error = item.get("error", "missing response")
+                LOGGER.error(f"RPC batch call {call['method']} failed: {error}")
+                if raise_on_error:
+                    if "error" not in item:
+                        # a dropped call says nothing about the call itself, another endpoint may answer it
+                        raise ValueError(f"RPC batch left {call['method']} unanswered")
+                    raise JsonRpcError(call["method"], error)
+                results.append(None)
+                continue
+            results.append(item["result"])
+
+        return results
@@ -0,0 +1,349 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import aiohttp
+from hexbytes import HexBytes
+
+from lib.Logger import LOGGER
+from lib.ProviderPool import RPC_ENDPOINTS
+from lib.RpcBatch import JsonRpcBatch, JsonRpcError, get_session
+
+_request_ids = itertools.count(1)
+
+
+def _is_answer(error: BaseException) -> bool:
+    """
+    Tells a node's JSON-RPC error apart from a failing endpoint.
+
+    Malformed JSON, rejected batches and rate limits are the endpoint's fault and fail
+    over, while an error object, e.g. a reverted call, would come back from every endpoint.
+
+    Args:
+        error (BaseException): What the request raised.
+
+    Returns:
+        bool: True when the endpoint answered and the error should reach the caller.
+    """
+    return isinstance(error, JsonRpcError) and not error.rate_limited
+
+
+class EndpointScore:
+    """
+    Rolling latency and error statistics for one RPC endpoint.
+    """
+
+    def __init__(self, url: str, window: int = 100) -> None:
+        """
+        Initializes an empty score for an endpoint.
+
+        Args:
+            url (str): The endpoint url.
+            window (int, optional): How many recent latencies are kept. Defaults to 100.
+        """
+        self.url = url
+        self.latencies: deque = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.error_rate *= 0.9
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.error_rate = self.error_rate * 0.9 + 0.1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= 3:
+            # back off exponentially, capped at a minute
+            self.cooldown_until = time.monotonic() + min(
+                60.0, 2 ** (self.consecutive_failures - 3)
+            )
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def percentile(self, pct: float, default: float = 0.25) -> float:
+        """
+        Returns the given latency percentile in seconds.
+
+        Args:
+            pct (float): The percentile between 0 and 1.
+            default (float, optional): Returned while there are no samples yet. Defaults to 0.25.
+
+        Returns:
+            float: The latency at that percentile.
+        """
+        if not self.latencies:
+            return default
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+    @property
+    def score(self) -> float:
+        """
+        Lower is better, the median latency inflated by the recent error rate.
+        """
+        return self.percentile(0.5) * (1 + 10 * self.error_rate)
+
+
+class RpcRouter:
+    """
+    Routes JSON-RPC traffic for one chain across every configured endpoint.
+
+    Endpoints are ranked by a rolling latency/error score. Reads go to the best endpoint and,
+    when `hedge` is set, a duplicate is sent to the runner-up once the best endpoint has taken
+    longer than its own p90 latency, whichever answers first wins. Raw transactions are broadcast
+    to every healthy endpoint at once.
+    """
+
+    def __init__(
+        self,
+        network: str = "ETH",
+        endpoints: Optional[List[str]] = None,
+        hedge_percentile: float = 0.9,
+        timeout: float = 10.0,
+    ) -> None:
+        """
+        Initializes a router for a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+            endpoints (Optional[List[str]], optional): Overrides the endpoints from the environment. Defaults to None.
+            hedge_percentile (float, optional): Latency percentile after which a hedged request is sent.
+                Defaults to 0.9.
+            timeout (float, optional): Request timeout in seconds. Defaults to 10.0.
+        """
+        urls = [url for url in (endpoints or RPC_ENDPOINTS[network]) if url]
+        self.network = network
+        self.scores: Dict[str, EndpointScore] = {url: EndpointScore(url) for url in urls}
+        self.hedge_percentile = hedge_percentile
+        self.timeout = timeout
+
+    def ranked(self) -> List[EndpointScore]:
+        """
+        Returns the endpoints best first, unhealthy ones last.
+        """
+        return sorted(
+            self.scores.values(), key=lambda score: (not score.healthy, score.score)
+        )
+
+    async def _timed(self, score: EndpointScore, func: Callable[[str], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        try:
+            result = await func(score.url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if _is_answer(e):
+                # the node answered with a json-rpc error, the endpoint itself is fine
+                score.record_success(time.monotonic() - started)
+            else:
+                score.record_failure()
+            raise
+        score.record_success(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, func: Callable[[str], Awaitable[Any]], hedge: bool = True) -> Any:
+        ranked = self.ranked()
+        pending = set()
+        errors: List[Exception] = []
+        try:
+            for index, score in enumerate(ranked):
+                pending.add(asyncio.ensure_future(self._timed(score, func)))
+                is_last = index == len(ranked) - 1
+                # wait for the current leader up to its hedge deadline, or for a failure
+                deadline = (
+                    score.percentile(self.hedge_percentile)
+                    if hedge and not is_last
+                    else self.timeout
+                )
+                done, pending = await asyncio.wait(
+                    pending, timeout=deadline, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    if _is_answer(task.exception()):
+                        # another endpoint would give the same json-rpc error
+                        raise task.exception()
+                    errors.append(task.exception())
+                if pending and not hedge:
+                    # without hedging a timed out attempt is abandoned before failing over
+                    for task in pending:
+                        task.cancel()
+                    pending = set()
+                    score.record_failure()
+                    errors.append(TimeoutError(f"{score.url} timed out"))
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise errors[-1] if errors else TimeoutError(
+            f"No RPC endpoint answered for {self.network}"
+        )
+
+    async def _post(self, url: str, method: str, params: List[Any]) -> Any:
+        session = await get_session()
+        async with session.post(
+            url,
+            json={
+                "jsonrpc": "2.0",
+                "id": next(_request_ids),
+                "method": method,
+                "params": params,
+            },
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            response.raise_for_status()
+            payload = await response.json(content_type=None)
+        if "error" in payload:
+            raise JsonRpcError(method, payload["error"])
+        return payload.get("result")
+
+    async def request(self, method: str, params: Optional[List[Any]] = None, hedge: bool = True) -> Any:
+        """
+        Sends a single JSON-RPC call to the best endpoint, hedged to the runner-up when it is slow.
+
+        Args:
+            method (str): The JSON-RPC method name.
+            params (Optional[List[Any]], optional): The method parameters. Defaults to None.
+            hedge (bool, optional): Send a duplicate to the next endpoint after the hedge deadline. Defaults to True.
+
+        Returns:
+            Any: The `result` field of the first successful response.
+        """
+        return await self._hedged(
+            lambda url: self._post(url, method, params or []), hedge
+        )
+
+    async def batch(self, batch: JsonRpcBatch, hedge: bool = True) -> List[Any]:
+        """
+        Sends a JSON-RPC batch to the best endpoint, hedged the same way as `request`.
+
+        Args:
+            batch (JsonRpcBatch): The queued calls.
+            hedge (bool, optional): Send a duplicate to the next endpoint after the hedge deadline. Defaults to True.
+
+        Returns:
+            List[Any]: The results in the order the calls were added.
+        """
+        return await self._hedged(lambda url: batch.execute(url=url), hedge)
+
+    async def send_raw_transaction(self, raw_transaction: Union[bytes, str]) -> HexBytes:
+        """
+        Broadcasts a signed transaction to every healthy endpoint at once.
+
+        Args:
+            raw_transaction (Union[bytes, str]): The signed transaction.
+
+        Returns:
+            HexBytes: The transaction hash reported by the first endpoint that accepted it.
+
+        Raises:
+            Exception: The last error seen when no endpoint accepted the transaction.
+        """
+        raw = HexBytes(raw_transaction).hex()
+        if not raw.startswith("0x"):
+            raw = f"0x{raw}"
+        targets = [score for score in self.ranked() if score.healthy] or self.ranked()
+
+        pending = {
+            asyncio.ensure_future(
+                self._timed(
+                    score, lambda url: self._post(url, "eth_sendRawTransaction", [raw])
+                )
+            )
+            for score in targets
+        }
+        for task in pending:
+            # late failures from the background broadcasts are expected, keep them quiet
+            task.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+        errors: List[Exception] = []
+        while pending:
+            # slower endpoints keep propagating in the background once one has accepted it
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return HexBytes(task.result())
+                errors.append(task.exception())
+                LOGGER.debug(f"Broadcast failed: {task.exception()}")
+        raise errors[-1]
+
+    async def send_raw_transactions(self, raw_transactions: List[Union[bytes, str]]) -> List[Optional[HexBytes]]:
+        """
+        Broadcasts many signed transactions as one JSON-RPC batch to every healthy endpoint at once.
+
+        Args:
+            raw_transactions (List[Union[bytes, str]]): The signed transactions.
+
+        Returns:
+            List[Optional[HexBytes]]: The hash of each transaction, None for the ones no endpoint accepted.
+        """
+        raws = []
+        for raw_transaction in raw_transactions:
+            raw = HexBytes(raw_transaction).hex()
+            raws.append(raw if raw.startswith("0x") else f"0x{raw}")
+        batch = JsonRpcBatch(self.network, timeout=self.timeout)
+        for raw in raws:
+            batch.add("eth_sendRawTransaction", [raw])
+        targets = [score for score in self.ranked() if score.healthy] or self.ranked()
+
+        pending = {
+            asyncio.ensure_future(
+                self._timed(score, lambda url: batch.execute(raise_on_error=False, url=url))
+            )
+            for score in targets
+        }
+        for task in pending:
+            task.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+        hashes: List[Optional[HexBytes]] = [None] * len(raws)
+        while pending and None in hashes:
+            # a transaction one endpoint rejected may still be accepted by another
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    LOGGER.debug(f"Batch broadcast failed: {task.exception()}")
+                    continue
+                for index, result in enumerate(task.result()):
+                    if result is not None and hashes[index] is None:
+                        hashes[index] = HexBytes(result)
+        return hashes
+
+
+class RpcRouterRegistry:
+    """
+    Holds one RpcRouter per network so endpoint scores are shared across the process.
+    """
+
+    def __init__(self) -> None:
+        self._routers: Dict[str, RpcRouter] = {}
+
+    def get(self, network: str = "ETH") -> RpcRouter:
+        router = self._routers.get(network)
+        if router is None:
+            router = RpcRouter(network)
+            self._routers[network] = router
+        return router
+
+
+RpcRouters = RpcRouterRegistry()
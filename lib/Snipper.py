@@ -2,15 +2,15 @@ import asyncio
 import time
 from typing import Optional
 import base58
-import pandas as pd
-import aiohttp
 import json
 
 from eth_account import Account
 from data.Networks import Network, Networks
 from data.Queries import PresetsData, SnipeTradeData, WalletData
-from lib.GetDotEnv import COINMARKETCAP_API, TOKEN
+from lib.GetDotEnv import TOKEN
+from lib.ListingsFeed import CmcListings, NewListings, score_listings
 from lib.Logger import LOGGER
+from lib.PriceFeed import PriceFeeds
 from lib.TokenMetadata import TokenMetadata
 from lib.WalletClass import ETHWallet, SolanaWallet
 from solders.pubkey import Pubkey  # type: ignore
@@ -31,148 +31,34 @@ SOL = "So11111111111111111111111111111111111111112"
 
 class CryptoArbitrageBot:
     """
-    A class used to interact with the CoinMarketCap API to fetch and analyze cryptocurrency tokens.
+    A class used to analyze the CoinMarketCap listings and snipe the best cryptocurrency tokens.
 
-    Attributes:
-        cmc_headers (dict): Headers for CoinMarketCap API authentication.
-        cmc_url (str): URL endpoint for fetching cryptocurrency listings from CoinMarketCap.
+    The listings come from the shared CmcListings feed, so every sniper reads the same snapshot.
     """
 
     def __init__(self, user_id: str, token_mint: Optional[str] = None):
         """
-        Initializes the CryptoArbitrageBot with the necessary headers and URL for the CoinMarketCap API.
+        Initializes the CryptoArbitrageBot for a user.
         """
         self.user_id = user_id
         self.bot = bot
         self.token_mint = token_mint
-        self.cmc_headers = {"X-CMC_PRO_API_KEY": COINMARKETCAP_API}
-        self.cmc_url = (
-            "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
-        )
 
     async def fetch_listings(self):
         """
         Fetches the latest cryptocurrency token listings from CoinMarketCap.
 
-        Makes an API call to fetch data on the latest cryptocurrency token listings, converts the data to a pandas DataFrame,
-        identifies the platform for each token, filters tokens based on specific platforms, and determines the best token on each platform.
+        Reads the shared listings snapshot, which is refreshed from CoinMarketCap at most once per
+        feed ttl across all snipers, and scores it with `score_listings` to determine the best
+        token on each platform.
 
         Returns:
             dict: A dictionary containing the best tokens on each platform, with their details including platform name,
                   network ID, contract address, price in USD, token name, and token ID.
         """
-        params = {
-            "start": 1,
-            "limit": 200,
-            "sort": "date_added",
-            "cryptocurrency_type": "tokens",
-            "convert": "USD",
-            "aux": "circulating_supply,total_supply,market_cap_by_total_supply,volume_24h_reported,volume_7d,volume_7d_reported,volume_30d,volume_30d_reported,is_market_cap_included_in_calc,date_added,tags,platform",
-        }
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                self.cmc_url, headers=self.cmc_headers, params=params
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-
-        # Convert data to a pandas DataFrame
-        df = pd.DataFrame(data["data"])
-
-        def identify_platform(platform_data):
-            """
-            Identifies the platform name from platform data.
-
-            Args:
-                platform_data (dict): The platform data containing the platform name.
-
-            Returns:
-                str: The platform name in a readable format. If the platform is not recognized, returns 'Other'.
-            """
-            if platform_data and platform_data.get("name"):
-                platform_name = platform_data["name"].lower()
-                if platform_name == "solana":
-                    return "Solana"
-                elif platform_name == "ethereum":
-                    return "Ethereum"
-                elif platform_name == "binance smart chain":
-                    return "Binance Smart Chain"
-                elif platform_name == "polygon":
-                    return "Polygon"
-                elif platform_name == "avalanche":
-                    return "Avalanche"
-            return "Other"
-
-        # Add a new 'platform' column based on platform identification logic
-        df["platform"] = df["platform"].apply(identify_platform)
-
-        # Filter tokens based on specific platforms
-        platforms = [
-            "Solana",
-            "Ethereum",
-            "Binance Smart Chain",
-            "Polygon",
-            "Avalanche",
-        ]
-        filtered_df = df[df["platform"].isin(platforms)]
-
-        def determine_best_token(df: pd.DataFrame, platform: str):
-            """
-            Determines the best token on a specific platform based on various metrics.
-
-            Args:
-                df (pd.DataFrame): DataFrame containing the filtered tokens.
-                platform (str): The name of the platform to filter tokens by.
-
-            Returns:
-                dict: A dictionary containing details of the best token on the platform, including platform name,
-                      network ID, contract address, price in USD, token name, and token ID. If no tokens are found,
-                      returns None.
-            """
-            platform_df = df[df["platform"] == platform]
-            if platform_df.empty:
-                return None
-
-            # Add a new column for the score
-            platform_df["score"] = (
-                (1 - platform_df["circulating_supply"] / platform_df["total_supply"])
-                * 0.4
-                + (platform_df["volume_7d"] / platform_df["volume_7d"].max()) * 0.3
-                + (
-                    platform_df["market_cap_by_total_supply"]
-                    / platform_df["circulating_supply"]
-                )
-                * 0.3
-            )
-
-            best_token = platform_df.loc[platform_df["score"].idxmax()]
-
-            return {
-                "platform_name": platform,
-                "platform_network_id": (
-                    best_token["platform"]["id"] if best_token["platform"] else None
-                ),
-                "platform_contract_address": (
-                    best_token["platform"]["token_address"]
-                    if best_token["platform"]
-                    else None
-                ),
-                "price_usd": best_token["quote"]["USD"]["price"],
-                "token_name": best_token["name"],
-                "token_id": best_token["id"],
-                "market_cap": best_token["market_cap_by_total_supply"],
-                "volume_7d": best_token["volume_7d"],
-                "symbol": best_token["symbol"],
-            }
-
-        best_tokens = {}
-        for platform in platforms:
-            best_token = determine_best_token(filtered_df, platform)
-            if best_token is not None:
-                best_tokens[platform] = best_token
-
-        return best_tokens
+        snapshot = await CmcListings.get()
+        LOGGER.debug(f"Scoring {len(snapshot.frame)} listings fetched {snapshot.age:.0f}s ago")
+        return score_listings(snapshot.frame)
 
     async def buy_token(self, tokens: dict):
         """
@@ -268,7 +154,14 @@ class CryptoArbitrageBot:
                 )
 
                 transaction_detail = await eth_wallet.swap_tokens_with_uniswap(
-                    private_key, WETH, contract_address, bal_wei, amount_out_min, 5000
+                    private_key,
+                    WETH,
+                    contract_address,
+                    bal_wei,
+                    amount_out_min,
+                    5000,
+                    urgency="snipe",
+                    presets=presets,
                 )
 
                 if self.token_mint is not None:
@@ -294,6 +187,8 @@ class CryptoArbitrageBot:
                         bal_wei,
                         amount_out_min,
                         5000,
+                        urgency="snipe",
+                        presets=presets,
                     )
 
             data: SnipeTrade = SnipeTrade(
@@ -324,62 +219,67 @@ class CryptoArbitrageBot:
             f"{self.user_id}-{wallet.chain_id}"
         )
 
-        while True:
-            current_price = await TokenMetadata.currency_amount(sniped_token.token_id)
-            take_profit_amount = sniped_token.purchased_price_usd + (
-                sniped_token.purchased_price_usd * (presets.snipe_take_profit)
-            )
-            stop_loss_amount = sniped_token.purchased_price_usd - (
-                sniped_token.purchased_price_usd * (presets.snipe_stop_loss)
-            )
+        take_profit_amount = sniped_token.purchased_price_usd + (
+            sniped_token.purchased_price_usd * (presets.snipe_take_profit)
+        )
+        stop_loss_amount = sniped_token.purchased_price_usd - (
+            sniped_token.purchased_price_usd * (presets.snipe_stop_loss)
+        )
 
-            if wallet.chain_name.lower() == "solana":
-                pk = Pubkey(sniped_token.token_address)
-                bal = await SolanaWallet().get_token_balance(pk)
-                amount_in = bal  # in lamport
-            elif wallet.chain_name.lower() != "solana":
-                network: Network = [
-                    network
-                    for network in Networks
-                    if network.name.lower() == wallet.chain_name.lower()
-                ][0]
-                eth_wallet = ETHWallet(network.sn)
-                token_metadata = await TokenMetadata().get_token_symbol_by_contract(
-                    sniped_token.token_address, wallet.chain_name
-                )
-                # if buying the new token with any other evm token
-                bal = await eth_wallet.get_token_balance(
-                    wallet.pub_key, sniped_token.token_address
-                )
-                amount_in = bal * (
-                    10**token_metadata.decimal.ethereum
-                )  # in tokens native unit
-
-            if float(current_price) <= float(stop_loss_amount) or float(
-                current_price
-            ) >= float(take_profit_amount):
-                # sell all the token back to usdt to lessen the losses
-                amount_out_min = await ETHWallet.calculate_eth_amount_out(
-                    amount_in, sniped_token.token_address, WETH
-                )
-                transaction_detail = (
-                    await eth_wallet.swap_tokens_with_uniswap(
-                        wallet.sec_key,
+        # the shared price feed fetches every open position's price in one batched request
+        async with PriceFeeds.subscribe(sniped_token.token_id) as prices:
+            async for current_price in prices:
+                if float(stop_loss_amount) < float(current_price) < float(take_profit_amount):
+                    continue
+
+                # the balance is only read once the position is sold, then all of it is sold
+                if wallet.chain_name.lower() == "solana":
+                    solana_wallet = SolanaWallet()
+                    pk = Pubkey(sniped_token.token_address)
+                    amount_in = await solana_wallet.get_token_balance(pk)  # in lamport
+                    # presets store the slippage as a fraction
+                    slippage_bps = int(presets.slippage * 10000)
+                    amount_out_min = await solana_wallet.get_amount_out_min(
+                        wallet.sol_sec_key,
                         sniped_token.token_address,
-                        WETH,
+                        SOL,
                         amount_in,
-                        amount_out_min,
-                        5000,
+                        slippage_bps,
                     )
-                    if wallet.chain_name.lower() != "solana"
-                    else await SolanaWallet().execute_swap(
-                        wallet.sec_key,
+                    transaction_detail = await solana_wallet.execute_swap(
+                        wallet.sol_sec_key,
                         Pubkey(sniped_token.token_address),
                         Pubkey(SOL),
                         amount_in,
-                        (presets.slippage * 100),
+                        slippage_bps,
+                    )
+                else:
+                    network: Network = [
+                        network
+                        for network in Networks
+                        if network.name.lower() == wallet.chain_name.lower()
+                    ][0]
+                    eth_wallet = ETHWallet(network.sn)
+                    # raw balance straight from the token contract, no metadata lookup needed
+                    token_balance = (
+                        await eth_wallet.get_token_balances(
+                            [(wallet.pub_key, sniped_token.token_address)]
+                        )
+                    )[0]
+                    amount_in = token_balance.balance or 0  # in tokens native unit
+                    amount_out_min = await eth_wallet.calculate_eth_amount_out(
+                        amount_in, sniped_token.token_address, WETH
+                    )
+                    transaction_detail = await eth_wallet.swap_tokens_with_uniswap(
+                        wallet.sec_key,
+                        sniped_token.token_address,
+                        WETH,
+                        amount_in,
+                        amount_out_min,
+                        5000,
+                        urgency="snipe",
+                        presets=presets,
                     )
-                )
                 data = {
                     "completed_trade": True,
                     "trading_status": "Traded",
@@ -403,9 +303,18 @@ AMOUNT: {amount_out_min / (10**sniped_token.decimals)} {sniped_token.token_name}
                     parse_mode="HTML",
                 )
                 break
-            await asyncio.sleep(300)
 
     async def run(self):
+        """
+        Snipes the best listed token on the user's chain, then each best new listing as it appears.
+
+        After a position is closed the sniper waits on the NewListings queue instead of buying
+        from the same scores again, so every round trades a token listed since the last one.
+        """
+        wallet: Optional[UserWallet] = await WalletData.get_wallet_by_id(self.user_id)
+        platform = wallet.chain_name if wallet is not None else None
+        # taken before scoring so a listing queued meanwhile is not missed
+        last_id = await NewListings.position()
         best_tokens = await self.fetch_listings()
 
         while True:
@@ -431,3 +340,4 @@ AMOUNT: {amount_out_min / (10**sniped_token.decimals)} {sniped_token.token_name}
             LOGGER.debug(f"Watching for {sniped_token.token_name} price change")
             await self.watch_price_change_for_stop_loss_or_take_profit(sniped_token)
             await asyncio.sleep(60 * 3)
+            last_id, best_tokens = await NewListings.next(platform, last_id)
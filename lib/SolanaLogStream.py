@@ -0,0 +1,176 @@
+import asyncio
+import inspect
+import itertools
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Union
+
+import websockets
+
+from lib.GetDotEnv import QUICKNODE_WS
+from lib.LatencyMetrics import LatencyTrace
+from lib.Logger import LOGGER
+
+SignatureListener = Callable[[str, str, LatencyTrace], Union[Awaitable[None], None]]
+
+
+class SolanaLogStream:
+    """
+    Streams the signatures of successful transactions that mention a watched Solana wallet and invoke a given program.
+
+    Every watched wallet gets a `logsSubscribe({"mentions": [wallet]})` subscription on one
+    websocket, Solana allows a single address per logs filter. The program check is made
+    on the log lines of the notification itself, so transactions that are not swaps never
+    cost an RPC call. Reconnects with backoff and subscribes every wallet again.
+    """
+
+    def __init__(
+        self,
+        listener: SignatureListener,
+        programs: Iterable[str],
+        ws_url: Optional[str] = None,
+        commitment: str = "confirmed",
+    ) -> None:
+        """
+        Initializes a stream, nothing runs until `start` is called.
+
+        Args:
+            listener (SignatureListener): Called, sync or async, with the wallet, the transaction signature
+                and a latency trace started when the notification arrived.
+            programs (Iterable[str]): Program ids, a transaction must invoke one of them to be passed on.
+            ws_url (Optional[str], optional): Overrides the websocket endpoint. Defaults to QUICKNODE_WS.
+            commitment (str, optional): The commitment notifications are sent at. Defaults to "confirmed".
+        """
+        self.listener = listener
+        self.invokes = tuple(f"Program {program} invoke" for program in programs)
+        self.ws_url = ws_url or QUICKNODE_WS
+        self.commitment = commitment
+        self.watched: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._ws: Any = None
+        # subscription id -> wallet
+        self._subscriptions: Dict[int, str] = {}
+        self._replies: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._subscribing = asyncio.Lock()
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts streaming on the running event loop, a no-op when already running.
+
+        Returns:
+            asyncio.Task: The background streaming task.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        Stops streaming.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def set_watched(self, wallets: Iterable[str]) -> None:
+        """
+        Replaces the watched wallets, subscribing and unsubscribing on the live socket when there is one.
+
+        Args:
+            wallets (Iterable[str]): The base58 wallet addresses.
+        """
+        self.watched = set(wallets)
+        if self._ws is not None:
+            await self._resubscribe()
+
+    async def _request(self, method: str, params: list) -> Any:
+        request_id = next(self._request_ids)
+        reply = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = reply
+        try:
+            await self._ws.send(
+                json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            )
+            return await asyncio.wait_for(reply, 10.0)
+        finally:
+            self._replies.pop(request_id, None)
+
+    async def _resubscribe(self) -> None:
+        # a watch added while the socket is still subscribing must not be subscribed twice
+        async with self._subscribing:
+            subscribed = set(self._subscriptions.values())
+            for subscription_id, wallet in list(self._subscriptions.items()):
+                if wallet not in self.watched:
+                    del self._subscriptions[subscription_id]
+                    await self._request("logsUnsubscribe", [subscription_id])
+            for wallet in self.watched - subscribed:
+                subscription_id = await self._request(
+                    "logsSubscribe", [{"mentions": [wallet]}, {"commitment": self.commitment}]
+                )
+                self._subscriptions[subscription_id] = wallet
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error(f"Solana log stream dropped: {e}")
+            finally:
+                self._ws = None
+                self._subscriptions = {}
+            delay = 1.0 if time.monotonic() - started > 60 else min(delay * 2, 30.0)
+            await asyncio.sleep(delay)
+
+    async def _subscribe(self) -> None:
+        async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+            self._ws = ws
+            reader = asyncio.ensure_future(self._read(ws))
+            try:
+                await self._resubscribe()
+                LOGGER.debug(f"Subscribed to the logs of {len(self._subscriptions)} solana wallets")
+                await reader
+            finally:
+                reader.cancel()
+
+    async def _read(self, ws: Any) -> None:
+        async for message in ws:
+            payload = json.loads(message)
+            reply = self._replies.get(payload.get("id"))
+            if reply is not None and not reply.done():
+                if "error" in payload:
+                    reply.set_exception(ConnectionError(f"Subscription request rejected: {payload['error']}"))
+                else:
+                    reply.set_result(payload.get("result"))
+            elif payload.get("method") == "logsNotification":
+                await self._handle(payload["params"])
+        raise ConnectionError("websocket closed")
+
+    async def _handle(self, params: Dict[str, Any]) -> None:
+        trace = LatencyTrace("SOL")
+        wallet = self._subscriptions.get(params["subscription"])
+        value = params["result"]["value"]
+        if wallet is None or value.get("err") is not None:
+            return
+        if not any(line.startswith(self.invokes) for line in value.get("logs") or []):
+            return
+        trace.mark("matched")
+        # listeners run off the reader so signatures arriving together can be resolved in one batch
+        dispatch = asyncio.ensure_future(self._dispatch(wallet, value["signature"], trace))
+        dispatch.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+    async def _dispatch(self, wallet: str, signature: str, trace: LatencyTrace) -> None:
+        try:
+            result = self.listener(wallet, signature, trace)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            LOGGER.error(f"Solana log listener failed for {wallet}: {e}")
@@ -0,0 +1,163 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from lib.GetDotEnv import QUICKNODE_HTTP
+from lib.Logger import LOGGER
+from lib.RpcBatch import JsonRpcBatch
+
+# getSignatureStatuses accepts at most this many signatures per call
+MAX_STATUS_SIGNATURES = 256
+
+
+class SolanaSignatureResolver:
+    """
+    Resolves Solana transaction signatures in batches instead of one RPC call per signature.
+
+    `transaction(signature)` waits for the parsed transaction: signatures requested within a
+    short window are fetched with one JSON-RPC batch of `getTransaction` calls, and the ones
+    the node has not indexed yet are retried with the next batch. `confirm(signature)` waits
+    for a signature to be confirmed: every pending signature is checked with a single
+    `getSignatureStatuses` call per poll.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        window: float = 0.05,
+        poll_interval: float = 0.4,
+        commitment: str = "confirmed",
+    ) -> None:
+        """
+        Initializes a resolver, it only polls while signatures are pending.
+
+        Args:
+            url (Optional[str], optional): The JSON-RPC endpoint. Defaults to QUICKNODE_HTTP.
+            window (float, optional): Seconds transaction requests are gathered before a batch is sent.
+                Defaults to 0.05.
+            poll_interval (float, optional): Seconds between batches while anything is pending. Defaults to 0.4.
+            commitment (str, optional): The commitment transactions are read and confirmed at. Defaults to "confirmed".
+        """
+        self.url = url or QUICKNODE_HTTP
+        self.window = window
+        self.poll_interval = poll_interval
+        self.commitment = commitment
+        self._transactions: Dict[str, List[asyncio.Future]] = {}
+        self._statuses: Dict[str, List[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._requested: Optional[asyncio.Event] = None
+
+    def _wake(self) -> None:
+        if self._task is None or self._task.done():
+            self._requested = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+            self._task.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+    async def _wait(self, pending: Dict[str, List[asyncio.Future]], signature: str, timeout: float) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        pending.setdefault(signature, []).append(future)
+        self._wake()
+        if pending is self._transactions:
+            # a transaction is worth fetching straight away, statuses can wait for the next poll
+            self._requested.set()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            waiters = pending.get(signature, [])
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                pending.pop(signature, None)
+
+    async def transaction(self, signature: str, timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Waits for a transaction, parsed with `jsonParsed` encoding.
+
+        Args:
+            signature (str): The transaction signature.
+            timeout (float, optional): Seconds to wait. Defaults to 30.0.
+
+        Returns:
+            Dict[str, Any]: The `getTransaction` result.
+
+        Raises:
+            asyncio.TimeoutError: The node did not return the transaction in time.
+        """
+        return await self._wait(self._transactions, signature, timeout)
+
+    async def confirm(self, signature: str, timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Waits for a signature to reach the resolver's commitment.
+
+        Args:
+            signature (str): The transaction signature.
+            timeout (float, optional): Seconds to wait. Defaults to 60.0.
+
+        Returns:
+            Dict[str, Any]: The signature status, `err` is None for successful transactions.
+
+        Raises:
+            asyncio.TimeoutError: The signature was not confirmed in time.
+        """
+        return await self._wait(self._statuses, signature, timeout)
+
+    async def _run(self) -> None:
+        while self._transactions or self._statuses:
+            await asyncio.sleep(self.window)
+            self._requested.clear()
+            try:
+                await self._check()
+            except Exception as e:
+                LOGGER.error(f"Solana signature check failed: {e}")
+            if self._transactions or self._statuses:
+                try:
+                    await asyncio.wait_for(self._requested.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _check(self) -> None:
+        transactions = list(self._transactions)
+        statuses = list(self._statuses)
+
+        batch = JsonRpcBatch("SOL", url=self.url)
+        for signature in transactions:
+            batch.add(
+                "getTransaction",
+                [
+                    signature,
+                    {
+                        "encoding": "jsonParsed",
+                        "commitment": self.commitment,
+                        "maxSupportedTransactionVersion": 0,
+                    },
+                ],
+            )
+        chunks = [
+            statuses[start : start + MAX_STATUS_SIGNATURES]
+            for start in range(0, len(statuses), MAX_STATUS_SIGNATURES)
+        ]
+        for chunk in chunks:
+            batch.add("getSignatureStatuses", [chunk])
+        results = await batch.execute(raise_on_error=False)
+
+        for signature, result in zip(transactions, results):
+            if result is not None:
+                self._settle(self._transactions, signature, result)
+
+        confirmed = ["confirmed", "finalized"] if self.commitment == "confirmed" else [self.commitment]
+        for chunk, result in zip(chunks, results[len(transactions) :]):
+            if result is None:
+                continue
+            for signature, status in zip(chunk, result["value"]):
+                if status is None:
+                    continue
+                if status.get("err") is not None or status.get("confirmationStatus") in confirmed:
+                    self._settle(self._statuses, signature, status)
+
+    @staticmethod
+    def _settle(pending: Dict[str, List[asyncio.Future]], signature: str, result: Any) -> None:
+        for future in pending.pop(signature, []):
+            if not future.done():
+                future.set_result(result)
+
+
+SolanaSignatures = SolanaSignatureResolver()
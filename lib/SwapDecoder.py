@@ -0,0 +1,260 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_abi import decode
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+from hexbytes import HexBytes
+from uniswap_universal_router_decoder import RouterCodec
+
+from lib.Logger import LOGGER
+from lib.Types import DecodedSwap
+
+# wrapped native coin per network, a path starting here is a buy and one ending here is a sell
+WRAPPED_NATIVE: Dict[str, str] = {
+    "ETH": "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+    "BSC": "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c",
+    "POL": "0x0d500B1d8E8eF31E21C99d1Db9A6444d3ADf1270",
+    "AVL": "0xB31f66AA3C1e785363F0875A1B74E3a85D34f15c",
+}
+
+# Universal Router execute(bytes,bytes[],uint256) and execute(bytes,bytes[])
+UNIVERSAL_ROUTER_SELECTORS = {HexBytes("0x3593564c"), HexBytes("0x24856bc3")}
+UNIVERSAL_ROUTER_SWAPS = {
+    "V2_SWAP_EXACT_IN",
+    "V2_SWAP_EXACT_OUT",
+    "V3_SWAP_EXACT_IN",
+    "V3_SWAP_EXACT_OUT",
+}
+
+# solana programs whose invocation marks a swap
+SOLANA_SWAP_PROGRAMS: Dict[str, str] = {
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "jupiter",
+    "JUP4Fb2cqiRUcaTHdrPC8h2gNsA2ETXiEDcs2C2fwjN9": "jupiter",
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "raydium",
+    "CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK": "raydium",
+    "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C": "raydium",
+}
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+# V2 router argument names for the amount sold and the amount bought
+AMOUNT_IN_ARGS = ["amountIn", "amountInMax"]
+AMOUNT_OUT_ARGS = ["amountOutMin", "amountOut"]
+
+
+class SwapDecoder:
+    """
+    Decodes V2 router (Uniswap, PancakeSwap and their forks) and Universal Router calldata into DecodedSwap objects.
+
+    V2 swap functions are indexed once by their 4 byte selector, decoding a transaction is
+    then a dict lookup plus one `eth_abi.decode` of the arguments, no contract objects are
+    involved. Universal Router `execute` calls are handed to RouterCodec and their swap
+    commands are folded into a single swap from the first token sold to the last token bought.
+    """
+
+    def __init__(self, network: str = "ETH") -> None:
+        """
+        Initializes a decoder for a network.
+
+        Args:
+            network (str, optional): The short name of the network. Defaults to "ETH".
+        """
+        # imported here to avoid a circular import, the router abi lives with the wallet code
+        from lib.WalletClass import uniswap_abi
+
+        self.network = network
+        self.wrapped_native = WRAPPED_NATIVE.get(network, WRAPPED_NATIVE["ETH"])
+        self.selectors: Dict[bytes, Tuple[str, List[str], List[str]]] = {
+            function_abi_to_4byte_selector(entry): (
+                entry["name"],
+                [arg["name"] for arg in entry["inputs"]],
+                [arg["type"] for arg in entry["inputs"]],
+            )
+            for entry in uniswap_abi
+            if entry.get("type") == "function" and entry["name"].startswith("swap")
+        }
+        self.codec = RouterCodec()
+
+    def decode(self, tx_details: Dict[str, Any]) -> Optional[DecodedSwap]:
+        """
+        Decodes a router transaction.
+
+        Args:
+            tx_details (Dict[str, Any]): The transaction, raw from `eth_getTransactionByHash` or formatted by web3.
+
+        Returns:
+            Optional[DecodedSwap]: The swap, or None when the calldata is not a known swap.
+        """
+        data = HexBytes(tx_details.get("input") or tx_details.get("data") or b"")
+        value = tx_details.get("value") or 0
+        value = int(value, 16) if isinstance(value, str) else int(value)
+        router = to_checksum_address(tx_details["to"])
+
+        try:
+            selector = bytes(data[:4])
+            if selector in self.selectors:
+                return self._decode_v2(router, data, value)
+            if HexBytes(selector) in UNIVERSAL_ROUTER_SELECTORS:
+                return self._decode_universal(router, data, value)
+        except Exception as e:
+            LOGGER.error(f"Could not decode swap calldata sent to {router}: {e}")
+        return None
+
+    def _side(self, path: List[str], native_in: bool, native_out: bool) -> str:
+        if native_in or path[0].lower() == self.wrapped_native.lower():
+            return "buy"
+        if native_out or path[-1].lower() == self.wrapped_native.lower():
+            return "sell"
+        return "swap"
+
+    def _decode_v2(self, router: str, data: HexBytes, value: int) -> DecodedSwap:
+        name, arg_names, arg_types = self.selectors[bytes(data[:4])]
+        args = dict(zip(arg_names, decode(arg_types, bytes(data[4:]))))
+        path = [to_checksum_address(token) for token in args["path"]]
+        # "ETH" in a V2 function name is the chain's native coin, BNB on PancakeSwap
+        native_in = name.startswith("swapExactETH") or name.startswith("swapETH")
+        native_out = name.endswith("ETH") or "ETHSupportingFee" in name
+
+        amount_in = next((args[arg] for arg in AMOUNT_IN_ARGS if arg in args), value if native_in else None)
+        amount_out = next((args[arg] for arg in AMOUNT_OUT_ARGS if arg in args), None)
+        return DecodedSwap(
+            router=router,
+            function=name,
+            path=path,
+            side=self._side(path, native_in, native_out),
+            amount_in=amount_in,
+            amount_out=amount_out,
+            native_in=native_in,
+            native_out=native_out,
+        )
+
+    def _decode_universal(self, router: str, data: HexBytes, value: int) -> Optional[DecodedSwap]:
+        _, params = self.codec.decode.function_input(data)
+        commands = [command for command in params["inputs"] if isinstance(command, tuple)]
+        names = [function.fn_name for function, _ in commands]
+        swaps = [(function.fn_name, args) for function, args in commands if function.fn_name in UNIVERSAL_ROUTER_SWAPS]
+        if not swaps:
+            return None
+
+        path: List[str] = []
+        for fn_name, args in swaps:
+            if fn_name.startswith("V3"):
+                hops = [
+                    to_checksum_address(hop)
+                    for hop in self.codec.decode.v3_path(fn_name, args["path"])
+                    if isinstance(hop, str)
+                ]
+                # exact output paths are encoded from the token bought back to the token sold
+                if fn_name.endswith("EXACT_OUT"):
+                    hops.reverse()
+            else:
+                hops = [to_checksum_address(token) for token in args["path"]]
+            # consecutive commands share their joining token
+            path.extend(hops[1:] if path and path[-1] == hops[0] else hops)
+
+        first, last = swaps[0][1], swaps[-1][1]
+        native_in = "WRAP_ETH" in names
+        native_out = "UNWRAP_WETH" in names
+        amount_in = first.get("amountIn", first.get("amountInMax"))
+        if amount_in is None and native_in:
+            amount_in = value
+        return DecodedSwap(
+            router=router,
+            function=",".join(fn_name for fn_name, _ in swaps),
+            path=path,
+            side=self._side(path, native_in, native_out),
+            amount_in=amount_in,
+            amount_out=last.get("amountOutMin", last.get("amountOut")),
+            native_in=native_in,
+            native_out=native_out,
+            v3=any(fn_name.startswith("V3") for fn_name, _ in swaps),
+        )
+
+
+class SolanaSwapDecoder:
+    """
+    Decodes Jupiter and Raydium swaps from a parsed Solana transaction.
+
+    Jupiter routes through any number of pools and Raydium has several pool programs, each
+    with their own instruction layouts. Rather than decoding every one of them, the swap is
+    read from what it did to the trader: the mints whose balances the trader lost and gained
+    between `preTokenBalances` and `postTokenBalances`, with SOL and wrapped SOL counted as
+    one. The swap instruction is only used to name the program.
+    """
+
+    def decode(self, transaction: Dict[str, Any], wallet: str) -> Optional[DecodedSwap]:
+        """
+        Decodes the swap a wallet made in a transaction.
+
+        Args:
+            transaction (Dict[str, Any]): The `getTransaction` result with `jsonParsed` encoding.
+            wallet (str): The base58 address of the trader.
+
+        Returns:
+            Optional[DecodedSwap]: The swap, or None when the transaction failed or did not trade one mint for another.
+        """
+        meta = transaction.get("meta") or {}
+        if meta.get("err") is not None:
+            return None
+        message = transaction["transaction"]["message"]
+        keys = [key["pubkey"] if isinstance(key, dict) else key for key in message["accountKeys"]]
+        if wallet not in keys:
+            return None
+
+        index = keys.index(wallet)
+        deltas: Dict[str, int] = {SOL_MINT: meta["postBalances"][index] - meta["preBalances"][index]}
+        if index == 0:
+            # the fee payer's lamports also paid the fee, which is not part of the swap
+            deltas[SOL_MINT] += meta.get("fee", 0)
+        for balances, sign in [(meta.get("preTokenBalances") or [], -1), (meta.get("postTokenBalances") or [], 1)]:
+            for balance in balances:
+                if balance.get("owner") == wallet:
+                    mint = balance["mint"]
+                    deltas[mint] = deltas.get(mint, 0) + sign * int(balance["uiTokenAmount"]["amount"])
+
+        tokens = {mint: delta for mint, delta in deltas.items() if mint != SOL_MINT and delta != 0}
+        # rent for new token accounts also moves SOL, tokens on a side win over SOL
+        sold = min(tokens, key=tokens.get) if any(delta < 0 for delta in tokens.values()) else None
+        bought = max(tokens, key=tokens.get) if any(delta > 0 for delta in tokens.values()) else None
+        sold = sold or (SOL_MINT if deltas[SOL_MINT] < 0 else None)
+        bought = bought or (SOL_MINT if deltas[SOL_MINT] > 0 else None)
+        if sold is None or bought is None or sold == bought:
+            return None
+
+        program = next(
+            (
+                instruction["programId"]
+                for instruction in message["instructions"]
+                + [inner for group in meta.get("innerInstructions") or [] for inner in group["instructions"]]
+                if instruction.get("programId") in SOLANA_SWAP_PROGRAMS
+            ),
+            None,
+        )
+        return DecodedSwap(
+            router=program,
+            function=SOLANA_SWAP_PROGRAMS.get(program, "swap"),
+            path=[sold, bought],
+            side="buy" if sold == SOL_MINT else "sell" if bought == SOL_MINT else "swap",
+            amount_in=-deltas[sold],
+            amount_out=deltas[bought],
+            native_in=sold == SOL_MINT,
+            native_out=bought == SOL_MINT,
+        )
+
+
+class SwapDecoderRegistry:
+    """
+    Holds one SwapDecoder per network so the selector table is built once.
+    """
+
+    def __init__(self) -> None:
+        self._decoders: Dict[str, SwapDecoder] = {}
+
+    def get(self, network: str = "ETH") -> SwapDecoder:
+        decoder = self._decoders.get(network)
+        if decoder is None:
+            decoder = SwapDecoder(network)
+            self._decoders[network] = decoder
+        return decoder
+
+
+SwapDecoders = SwapDecoderRegistry()
+SolanaSwaps = SolanaSwapDecoder()
@@ -0,0 +1,274 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
+
+from lib.Logger import LOGGER
+from lib.SwapDecoder import SwapDecoders
+from lib.Types import DecodedSwap
+from models.Presets import Presets
+
+# the V2 router functions a mirror is sent through, fee on transfer safe
+SWAP_SIGNATURES = {
+    "native_in": "swapExactETHForTokensSupportingFeeOnTransferTokens(uint256,address[],address,uint256)",
+    "native_out": "swapExactTokensForETHSupportingFeeOnTransferTokens(uint256,uint256,address[],address,uint256)",
+    "tokens": "swapExactTokensForTokensSupportingFeeOnTransferTokens(uint256,uint256,address[],address,uint256)",
+}
+
+# an allowance above this is treated as unlimited, some tokens spend down even a max approval
+UNLIMITED_ALLOWANCE = 2**128
+# gas limit and slippage of a mirror when the follower's presets do not give a usable one
+DEFAULT_SWAP_GAS = 350000
+DEFAULT_SLIPPAGE = 0.05
+# a V2 swap, fee on transfer tokens included, needs more than the lower bound and far less than the upper one
+SWAP_GAS_RANGE = (100000, 3000000)
+
+
+class SwapTemplate:
+    """
+    A follower's mirror swap with everything but the amounts, deadline, nonce and fee already encoded.
+
+    The calldata is encoded once with zero placeholders; filling the template writes the
+    amounts and deadline into their 32 byte argument slots, so preparing a mirror costs
+    a few byte copies instead of an ABI encode through a contract object.
+    """
+
+    def __init__(
+        self,
+        account: Any,
+        router: str,
+        path: List[str],
+        kind: str,
+        gas: int,
+        chain_id: int,
+        slippage: float,
+    ) -> None:
+        """
+        Initializes a template.
+
+        Args:
+            account (Any): The follower's local account, it signs the mirror.
+            router (str): The checksum address of the V2 router.
+            path (List[str]): The token path the mirror swaps along.
+            kind (str): One of the SWAP_SIGNATURES keys.
+            gas (int): The gas limit.
+            chain_id (int): The chain id.
+            slippage (float): The follower's slippage as a fraction, 0.05 for 5%.
+        """
+        self.account = account
+        self.router = router
+        self.path = path
+        self.kind = kind
+        self.gas = gas
+        self.chain_id = chain_id
+        self.slippage = slippage
+        self.created_at = time.monotonic()
+
+        types = SWAP_SIGNATURES[kind].split("(", 1)[1].rstrip(")").split(",")
+        if kind == "native_in":
+            args = [0, path, account.address, 0]
+            # argument slot of amountOutMin and deadline
+            self.slots = {"amount_out_min": 0, "deadline": 3}
+        else:
+            args = [0, 0, path, account.address, 0]
+            self.slots = {"amount_in": 0, "amount_out_min": 1, "deadline": 4}
+        self.calldata = function_signature_to_4byte_selector(SWAP_SIGNATURES[kind]) + encode(types, args)
+
+    def amount_out_min(self, quote: int) -> int:
+        """
+        Applies the follower's slippage to a quote.
+
+        Args:
+            quote (int): The router's quoted amount out.
+
+        Returns:
+            int: The least amount bought that is accepted.
+        """
+        # basis points keep the math in integers, a float would round large token amounts
+        return quote * (10000 - round(self.slippage * 10000)) // 10000
+
+    def fill(
+        self,
+        amount_in: int,
+        amount_out_min: int,
+        deadline: int,
+        nonce: int,
+        fee_fields: Dict[str, int],
+    ) -> Dict[str, Any]:
+        """
+        Builds the unsigned transaction.
+
+        Args:
+            amount_in (int): The amount sold, in the token's smallest unit.
+            amount_out_min (int): The least amount bought that is accepted.
+            deadline (int): The swap deadline as a unix timestamp.
+            nonce (int): The reserved nonce.
+            fee_fields (Dict[str, int]): The fee fields from a GasQuote.
+
+        Returns:
+            Dict[str, Any]: A transaction ready for `sign_transaction`.
+        """
+        data = bytearray(self.calldata)
+        values = {"amount_in": amount_in, "amount_out_min": amount_out_min, "deadline": deadline}
+        for name, slot in self.slots.items():
+            start = 4 + slot * 32
+            data[start : start + 32] = values[name].to_bytes(32, "big")
+        return {
+            "from": self.account.address,
+            "to": self.router,
+            "value": amount_in if self.kind == "native_in" else 0,
+            "data": HexBytes(bytes(data)),
+            "nonce": nonce,
+            "gas": self.gas,
+            "chainId": self.chain_id,
+            **fee_fields,
+        }
+
+
+class SwapTemplateCache:
+    """
+    Holds the mirror swap templates per (follower, router, path shape), with the router allowance already checked.
+
+    A template is built on a follower's first mirror of a path and reused for every later
+    trigger on that path. Templates expire after `ttl` seconds so preset changes, e.g. a
+    new slippage or gas limit, are picked up without a restart.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_templates: int = 4096) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            ttl (float, optional): Seconds a template is reused. Defaults to 60.0.
+            max_templates (int, optional): Templates kept before the least recently used is dropped. Defaults to 4096.
+        """
+        self.ttl = ttl
+        self.max_templates = max_templates
+        self.built = 0
+        self.reused = 0
+        self._templates: "OrderedDict[Tuple[str, str, str, Tuple[str, ...]], SwapTemplate]" = OrderedDict()
+
+    @staticmethod
+    def route(swap: DecodedSwap, wrapped_native: str) -> Tuple[str, List[str]]:
+        """
+        Picks the V2 function and path a decoded swap is mirrored with.
+
+        Args:
+            swap (DecodedSwap): The target's swap.
+            wrapped_native (str): The wrapped native token of the chain.
+
+        Returns:
+            Tuple[str, List[str]]: The SWAP_SIGNATURES key and the token path.
+        """
+        path = list(swap.path)
+        # concentrated liquidity paths are not V2 pools, route them through the wrapped native coin
+        if swap.v3 and wrapped_native not in (swap.token_in, swap.token_out):
+            path = [swap.token_in, wrapped_native, swap.token_out]
+        elif swap.v3:
+            path = [swap.token_in, swap.token_out]
+        kind = "native_in" if swap.native_in else "native_out" if swap.native_out else "tokens"
+        return kind, path
+
+    @staticmethod
+    def slippage(presets: Optional[Presets]) -> float:
+        """
+        Reads the follower's slippage the way the /presets prompt stores it, as a fraction.
+
+        Args:
+            presets (Optional[Presets]): The follower's presets.
+
+        Returns:
+            float: The slippage between 0 and 1, DEFAULT_SLIPPAGE when it is not set.
+        """
+        slippage = presets.slippage if presets is not None and presets.slippage else DEFAULT_SLIPPAGE
+        return min(max(slippage, 0.0), 1.0)
+
+    @staticmethod
+    def gas_limit(presets: Optional[Presets]) -> int:
+        """
+        Reads the follower's gas limit, falling back to DEFAULT_SWAP_GAS when it is not a swap's gas.
+
+        The /presets prompt takes the gas limit as an ETH amount and stores it in wei, and the
+        default presets write 500, neither is a number of gas units a swap can run with.
+
+        Args:
+            presets (Optional[Presets]): The follower's presets.
+
+        Returns:
+            int: The gas limit of a mirror swap.
+        """
+        gas = presets.gas_limit if presets is not None else None
+        if gas and SWAP_GAS_RANGE[0] <= gas <= SWAP_GAS_RANGE[1]:
+            return gas
+        return DEFAULT_SWAP_GAS
+
+    async def get(
+        self,
+        wallet: Any,
+        account: Any,
+        swap: DecodedSwap,
+        presets: Optional[Presets] = None,
+        urgency: str = "copy",
+    ) -> SwapTemplate:
+        """
+        Returns the follower's template for a swap, building it and approving the router on a miss.
+
+        Args:
+            wallet (ETHWallet): The follower's wallet on the swap's chain.
+            account (Any): The follower's local account.
+            swap (DecodedSwap): The target's swap.
+            presets (Optional[Presets], optional): The follower's presets. Defaults to None.
+            urgency (str, optional): The gas oracle tier of an approval. Defaults to "copy".
+
+        Returns:
+            SwapTemplate: The template.
+        """
+        router = wallet.uniswap_router
+        kind, path = self.route(swap, SwapDecoders.get(wallet.network.sn).wrapped_native)
+        key = (account.address, router.address, kind, tuple(path))
+
+        template = self._templates.get(key)
+        if template is not None and time.monotonic() - template.created_at < self.ttl:
+            self._templates.move_to_end(key)
+            self.reused += 1
+            return template
+
+        if kind != "native_in":
+            allowance = (
+                await wallet.get_token_balances([(account.address, path[0])], spender=router.address)
+            )[0].allowance
+            if (allowance or 0) < UNLIMITED_ALLOWANCE:
+                await wallet.approve_max(account, path[0], router.address, urgency, presets)
+
+        template = SwapTemplate(
+            account,
+            router.address,
+            path,
+            kind,
+            self.gas_limit(presets),
+            wallet.chain,
+            self.slippage(presets),
+        )
+        self._templates[key] = template
+        self._templates.move_to_end(key)
+        while len(self._templates) > self.max_templates:
+            self._templates.popitem(last=False)
+        self.built += 1
+        LOGGER.debug(f"Built mirror template for {account.address} on {path}")
+        return template
+
+    def forget(self, address: str) -> None:
+        """
+        Drops every template of a follower, e.g. after a mirror failed on a stale allowance.
+
+        Args:
+            address (str): The follower's address.
+        """
+        for key in [key for key in self._templates if key[0] == address]:
+            del self._templates[key]
+
+
+SwapTemplates = SwapTemplateCache()
@@ -40,3 +40,225 @@ class TokenInfo:
         self.id = id
         self.symbol = symbol
         self.decimal = decimal
+
+
+class TokenBalance:
+    """
+    Represents an ERC20 balance read for one (owner, token) pair.
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        token: str,
+        balance: Optional[int] = None,
+        decimals: Optional[int] = None,
+        allowance: Optional[int] = None,
+    ):
+        """
+        Initializes a TokenBalance object.
+
+        Args:
+            owner (str): The checksum address holding the token.
+            token (str): The checksum address of the token contract.
+            balance (Optional[int], optional): The raw balance in the token's smallest unit. None if the call failed.
+            decimals (Optional[int], optional): The token's decimals. None if the call failed.
+            allowance (Optional[int], optional): The allowance granted to the requested spender, if one was requested.
+        """
+
+        self.owner = owner
+        self.token = token
+        self.balance = balance
+        self.decimals = decimals
+        self.allowance = allowance
+
+    @property
+    def amount(self) -> float:
+        """
+        The balance converted to the token's units, 0.0 when either read failed.
+        """
+        if self.balance is None or self.decimals is None:
+            return 0.0
+        return float(self.balance) / (10**self.decimals)
+
+
+class BlockHeader:
+    """
+    Represents the parts of a block header the transaction builders need.
+    """
+
+    def __init__(
+        self,
+        number: int,
+        hash: str,
+        timestamp: int,
+        base_fee_per_gas: Optional[int] = None,
+        seen_at: float = 0.0,
+    ):
+        """
+        Initializes a BlockHeader object.
+
+        Args:
+            number (int): The block number.
+            hash (str): The block hash.
+            timestamp (int): The block timestamp in seconds.
+            base_fee_per_gas (Optional[int], optional): The EIP-1559 base fee in wei, None on legacy chains.
+            seen_at (float, optional): Local monotonic time at which the header was received.
+        """
+
+        self.number = number
+        self.hash = hash
+        self.timestamp = timestamp
+        self.base_fee_per_gas = base_fee_per_gas
+        self.seen_at = seen_at
+
+    @classmethod
+    def from_rpc(cls, header: dict, seen_at: float = 0.0) -> "BlockHeader":
+        """
+        Builds a BlockHeader from a raw `newHeads` or `eth_getBlockByNumber` result with hex quantities.
+
+        Args:
+            header (dict): The raw header.
+            seen_at (float, optional): Local monotonic time at which the header was received.
+
+        Returns:
+            BlockHeader: The parsed header.
+        """
+        base_fee = header.get("baseFeePerGas")
+        return cls(
+            number=int(header["number"], 16),
+            hash=header["hash"],
+            timestamp=int(header["timestamp"], 16),
+            base_fee_per_gas=int(base_fee, 16) if base_fee is not None else None,
+            seen_at=seen_at,
+        )
+
+
+class GasQuote:
+    """
+    Represents the fee fields to put on a transaction.
+    """
+
+    def __init__(
+        self,
+        max_fee_per_gas: Optional[int] = None,
+        max_priority_fee_per_gas: Optional[int] = None,
+        gas_price: Optional[int] = None,
+        block_number: Optional[int] = None,
+    ):
+        """
+        Initializes a GasQuote object, either the EIP-1559 pair or a legacy gas price is set.
+
+        Args:
+            max_fee_per_gas (Optional[int], optional): The EIP-1559 max fee per gas in wei.
+            max_priority_fee_per_gas (Optional[int], optional): The EIP-1559 priority fee per gas in wei.
+            gas_price (Optional[int], optional): The legacy gas price in wei, for chains without a base fee.
+            block_number (Optional[int], optional): The block the quote was sampled at.
+        """
+
+        self.max_fee_per_gas = max_fee_per_gas
+        self.max_priority_fee_per_gas = max_priority_fee_per_gas
+        self.gas_price = gas_price
+        self.block_number = block_number
+
+    def to_tx_fields(self) -> dict:
+        """
+        Returns the quote as transaction fields.
+
+        Returns:
+            dict: Either `maxFeePerGas`/`maxPriorityFeePerGas` or `gasPrice`.
+        """
+        if self.gas_price is not None:
+            return {"gasPrice": self.gas_price}
+        return {
+            "maxFeePerGas": self.max_fee_per_gas,
+            "maxPriorityFeePerGas": self.max_priority_fee_per_gas,
+        }
+
+
+class NonceReport:
+    """
+    Represents the nonce state of one address, as seen by the chain and by the nonce manager.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        mined: int,
+        pending: int,
+        next_nonce: Optional[int],
+        in_flight: Optional[dict] = None,
+        gaps: Optional[list] = None,
+        stuck: Optional[list] = None,
+    ):
+        """
+        Initializes a NonceReport object.
+
+        Args:
+            address (str): The address the report is for.
+            mined (int): The transaction count in the latest block, the lowest nonce not yet mined.
+            pending (int): The transaction count including the node's mempool.
+            next_nonce (Optional[int]): The next nonce the manager will hand out, None when it has to resync.
+            in_flight (Optional[dict], optional): Broadcast but unmined transactions by nonce.
+            gaps (Optional[list], optional): Unused nonces below `next_nonce` that block later transactions.
+            stuck (Optional[list], optional): In-flight nonces that have waited longer than the stuck threshold.
+        """
+
+        self.address = address
+        self.mined = mined
+        self.pending = pending
+        self.next_nonce = next_nonce
+        self.in_flight = in_flight or {}
+        self.gaps = gaps or []
+        self.stuck = stuck or []
+
+
+class DecodedSwap:
+    """
+    Represents a DEX swap decoded from router calldata.
+    """
+
+    def __init__(
+        self,
+        router: str,
+        function: str,
+        path: list,
+        side: str,
+        amount_in: Optional[int] = None,
+        amount_out: Optional[int] = None,
+        native_in: bool = False,
+        native_out: bool = False,
+        v3: bool = False,
+    ):
+        """
+        Initializes a DecodedSwap object.
+
+        Args:
+            router (str): The router the swap was sent to.
+            function (str): The router function or Universal Router command that performed the swap.
+            path (list): The token addresses from the token sold to the token bought.
+            side (str): "buy" when the native coin is spent, "sell" when it is received, otherwise "swap".
+            amount_in (Optional[int], optional): The exact or maximum amount sold, in the token's smallest unit.
+            amount_out (Optional[int], optional): The minimum or exact amount bought, in the token's smallest unit.
+            native_in (bool, optional): Whether the native coin was sold through its wrapped token.
+            native_out (bool, optional): Whether the bought wrapped token was unwrapped to the native coin.
+            v3 (bool, optional): Whether the swap went through concentrated liquidity pools.
+        """
+
+        self.router = router
+        self.function = function
+        self.path = path
+        self.side = side
+        self.amount_in = amount_in
+        self.amount_out = amount_out
+        self.native_in = native_in
+        self.native_out = native_out
+        self.v3 = v3
+
+    @property
+    def token_in(self) -> str:
+        return self.path[0]
+
+    @property
+    def token_out(self) -> str:
+        return self.path[-1]
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 from datetime import datetime
 from decimal import Decimal
@@ -5,29 +6,33 @@ import json
 import time
 from mnemonic import Mnemonic
 import requests
-from web3 import Web3
+from web3 import AsyncWeb3
 from bip_utils import Bip39SeedGenerator, Bip44Coins, Bip44, base58, Bip44Changes
-from web3.contract import Contract
+from web3.contract import AsyncContract
+from web3.exceptions import TimeExhausted
+from hexbytes import HexBytes
 from eth_account import Account
 import secrets
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from data.Networks import Network, Networks
 from data.Queries import CoinData
-from lib.GetDotEnv import (
-    AVALANCHE_HTTP_URL,
-    BSC_HTTP_URL,
-    ETHERSCAN_API,
-    INFURA_HTTP_URL,
-    POLYGON_HTTP_URL,
-    QUICKNODE_HTTP,
-)
+from lib.GetDotEnv import ETHERSCAN_API
+from lib.ChainHead import ChainHeads
+from lib.GasOracle import GasOracles
+from lib.LatencyMetrics import LatencyTrace
 from lib.Logger import LOGGER
+from lib.NonceManager import NonceManagers
+from lib.ProviderPool import ProviderPool, SolanaPool
+from lib.ReceiptResolver import ReceiptResolvers
+from lib.RpcBatch import JsonRpcBatch, to_int
+from lib.RpcRouter import RpcRouters
+from lib.SwapTemplate import SwapTemplates
 from lib.MultiChainWalletGenerator import MultiChainWalletGenerator
 from lib.TokenMetadata import TokenMetadata
-from lib.Types import TokenInfo
-from models.CoinsModel import Coins, CurrentPrice, MarketCap, Platform
+from lib.Types import DecodedSwap, TokenBalance
+from models.CoinsModel import CurrentPrice, MarketCap, Platform
+from models.Presets import Presets
 
-from solana.rpc.async_api import AsyncClient
 from solders.message import Message, MessageAddressTableLookup, MessageHeader, MessageV0, to_bytes_versioned  # type: ignore
 from solders.signature import Signature  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
@@ -35,7 +40,6 @@ from solders.keypair import Keypair  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
 from solana.rpc.types import TxOpts, TokenAccountOpts
-from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Processed
 
 from jupiter_python_sdk.jupiter import Jupiter, Jupiter_DCA
@@ -285,7 +289,8 @@ oneinch_abi = json.loads(
 
 class SolanaWallet:
     def __init__(self) -> None:
-        self.async_client = AsyncClient(QUICKNODE_HTTP)
+        # one keep-alive client per event loop shared by every SolanaWallet
+        self.async_client = SolanaPool.get_client()
         self.program_id = "TokenkegQfeZyiNwAJbNbGKPFCWuBvf9Ss623VQ5DA"
 
     async def generate_multi_chain_wallet(
@@ -337,7 +342,7 @@ class SolanaWallet:
         Raises:
             ConnectionError: If the connection to Jupiter fails.
         """
-        jupiter = Jupiter(self.async_client, Keypair.from_base58_string(private_key))
+        jupiter, _ = SolanaPool.get_jupiter(self.async_client, private_key)
         if not jupiter.rpc.is_connected:
             raise ConnectionError("Failed to connect to Jupiter")
         return jupiter
@@ -366,10 +371,9 @@ class SolanaWallet:
         Raises:
             Exception: If there is an error during the swap process.
         """
-        pk = Keypair.from_base58_string(private_key)
-        jupiter = await self.connect_jupiter(private_key)
+        _, pk = SolanaPool.get_jupiter(self.async_client, private_key)
 
-        token_bal = await self.get_token_balance(input_mint)
+        token_bal = await self.get_mint_balance(pk.pubkey(), input_mint)
         if token_bal < amount:
             LOGGER.debug("Insufficient amount to complete a swap")
             return f"""
@@ -378,6 +382,83 @@ class SolanaWallet:
 You do not have the total amount to complete the swap. Please top up your wallet to complete the transaction
         """
 
+        transaction_id = await self.send_swap(
+            private_key, input_mint, output_mint, amount, slippage_bps
+        )
+        tokenInDetails = await TokenMetadata().get_token_symbol_by_contract(input_mint)
+        tokenOutDetails = await TokenMetadata().get_token_symbol_by_contract(
+            output_mint
+        )
+
+        return f"""
+<code>
+<b>Swap Successful</b>
+--------------------------
+🏦 Swapped | {tokenInDetails.symbol} for {tokenOutDetails.symbol}
+---------------------------
+</code>
+----------------------------
+<a href='https://explorer.solana.com/tx/{transaction_id}'>Transaction ID: {transaction_id}</a>
+            """
+
+    async def get_amount_out_min(
+        self,
+        private_key: str,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        slippage_bps: int = 50,
+    ) -> int:
+        """
+        Quotes a swap on Jupiter and returns the least amount out the slippage accepts.
+
+        Args:
+            private_key (str): The base58 encoded private key of the Solana wallet.
+            input_mint (str): The mint address of the input token.
+            output_mint (str): The mint address of the output token.
+            amount (int): The amount of input tokens to swap, in their smallest unit.
+            slippage_bps (int, optional): The allowed slippage in basis points. Defaults to 50.
+
+        Returns:
+            int: The minimum amount of output tokens, in their smallest unit.
+        """
+        jupiter = await self.connect_jupiter(private_key)
+        quote = await jupiter.quote(
+            input_mint=input_mint,
+            output_mint=output_mint,
+            amount=amount,
+            slippage_bps=slippage_bps,
+        )
+        return int(quote["otherAmountThreshold"])
+
+    async def send_swap(
+        self,
+        private_key: str,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        slippage_bps: int = 50,
+        trace: Optional[LatencyTrace] = None,
+    ) -> str:
+        """
+        Builds a Jupiter swap, signs it and sends it without any balance check.
+
+        Args:
+            private_key (str): The base58 encoded private key of the Solana wallet.
+            input_mint (str): The mint address of the input token.
+            output_mint (str): The mint address of the output token.
+            amount (int): The amount of input tokens to swap, in their smallest unit.
+            slippage_bps (int, optional): The allowed slippage in basis points. Defaults to 50.
+            trace (Optional[LatencyTrace], optional): Marks the "signed" and "broadcast" stages of a copy trade.
+                Defaults to None.
+
+        Returns:
+            str: The transaction signature.
+        """
+        # the session cache hands back the already decoded keypair along with Jupiter
+        jupiter = await self.connect_jupiter(private_key)
+        _, pk = SolanaPool.get_jupiter(self.async_client, private_key)
+
         transaction_data = await jupiter.swap(
             input_mint=input_mint,
             output_mint=output_mint,
@@ -391,15 +472,15 @@ You do not have the total amount to complete the swap. Please top up your wallet
         message = raw_transaction.message
         signature = pk.sign_message(to_bytes_versioned(message))
         signed_txn = VersionedTransaction.populate(message, [signature])
+        if trace is not None:
+            trace.mark("signed")
 
         opts = TxOpts(skip_preflight=False, preflight_commitment=Processed)
         result = await self.async_client.send_raw_transaction(
             txn=bytes(signed_txn), opts=opts
         )
-        tokenInDetails = await TokenMetadata().get_token_symbol_by_contract(input_mint)
-        tokenOutDetails = await TokenMetadata().get_token_symbol_by_contract(
-            output_mint
-        )
+        if trace is not None:
+            trace.mark("broadcast")
 
         json_response = json.loads(result.to_json())
         transaction_id = json_response["result"]
@@ -407,16 +488,7 @@ You do not have the total amount to complete the swap. Please top up your wallet
         LOGGER.info(
             f"Transaction sent: https://explorer.solana.com/tx/{transaction_id}"
         )
-        return f"""
-<code>
-<b>Swap Successful</b>
---------------------------
-🏦 Swapped | {tokenInDetails.symbol} for {tokenOutDetails.symbol}
----------------------------
-</code>
-----------------------------
-<a href='https://explorer.solana.com/tx/{transaction_id}'>Transaction ID: {transaction_id}</a>
-            """
+        return transaction_id
 
     async def open_limit_order(
         self,
@@ -508,6 +580,27 @@ You do not have the total amount to complete the swap. Please top up your wallet
         balance = await self.async_client.get_token_account_balance(token_pubkey)
         return int(balance.value.amount)
 
+    async def get_mint_balance(self, owner_pubkey: Pubkey, mint: str) -> int:
+        """
+        Retrieves how much of a mint a wallet holds across all its token accounts.
+
+        Args:
+            owner_pubkey (Pubkey): The public key of the wallet.
+            mint (str): The mint address, the wrapped SOL mint reads the wallet's lamports.
+
+        Returns:
+            int: The balance in the mint's smallest unit.
+        """
+        if mint in ["SOL", "So11111111111111111111111111111111111111112"]:
+            return await self.get_balance(owner_pubkey)
+        accounts = await self.async_client.get_token_accounts_by_owner_json_parsed(
+            owner_pubkey, TokenAccountOpts(mint=Pubkey.from_string(mint))
+        )
+        return sum(
+            int(account.account.data.parsed["info"]["tokenAmount"]["amount"])
+            for account in accounts.value
+        )
+
     async def get_token_supply(self, token_pubkey: Pubkey) -> int:
         """
         Retrieves the total supply of a specific SPL token.
@@ -628,25 +721,14 @@ You do not have the total amount to complete the swap. Please top up your wallet
 
 class ETHWallet:
     def __init__(self, network: str = "ETH") -> None:
-        if network == "SOL":
-            provider = INFURA_HTTP_URL
-        if network == "ETH":
-            provider = INFURA_HTTP_URL
-        elif network == "BSC":
-            provider = BSC_HTTP_URL
-        elif network == "POL":
-            provider = POLYGON_HTTP_URL
-        elif network == "AVL":
-            provider = AVALANCHE_HTTP_URL
-
-        self.w3: Web3 = Web3(Web3.HTTPProvider(f"{provider}"))
-
-        if not self.w3.is_connected():
-            LOGGER.info("Connection Error")
-            raise ConnectionError("Failed to connect to the Ethereum network")
-        self.uniswap_router: type[Contract] = self.w3.eth.contract(
-            address=uniswap_contract, abi=uniswap_abi
-        )
+        # providers and the router contract are shared per chain for the life of the process,
+        # every rpc call goes through the async provider so handlers never block the event loop
+        self.w3: AsyncWeb3 = ProviderPool.get_async_web3(network)
+        self.uniswap_router: type[AsyncContract] = ProviderPool.get_async_router(network)
+        # latency critical reads and raw transaction broadcasts go through the multi endpoint router
+        self.rpc = RpcRouters.get(network)
+        self.nonces = NonceManagers.get(network)
+        self.receipts = ReceiptResolvers.get(network)
 
         self.network: Network = [chain for chain in Networks if chain.sn == network][0]
         self.chain = self.network.id
@@ -798,7 +880,7 @@ class ETHWallet:
             balance = ETHWallet.get_balance("0x742d35Cc6634C0532925a3b844Bc454e4438f44e")
             print(balance)  # Output: 12.345 (example balance)
         """
-        balance = self.w3.eth.get_balance(address)
+        balance = await self.w3.eth.get_balance(address)
         return float(self.w3.from_wei(balance, "ether"))
 
     async def get_token_balance(self, address: str, token_address: str) -> float:
@@ -820,27 +902,64 @@ class ETHWallet:
             print(token_balance)  # Output: 1000.0 (example token balance)
         """
 
-        # Get the ERC20 token contract ABI (Application Binary Interface)
-        # You'll need to obtain the ABI for the specific token you're interested in.
-        # This can often be found on the token's website or Etherscan page.
-        token: TokenInfo = await TokenMetadata().get_token_symbol_by_contract(
-            token_address, self.network.name
-        )
-        token_meta: Optional[Coins] = await TokenMetadata().get_token_details(
-            token.id, token.symbol
-        )
+        # balance and decimals come from the token contract itself through one multicall
+        balances = await self.get_token_balances([(address, token_address)])
+        return balances[0].amount
+
+    async def get_token_balances(
+        self, pairs: List[Tuple[str, str]], spender: Optional[str] = None
+    ) -> List[TokenBalance]:
+        """
+        Get balances, decimals and optionally allowances for many (owner, token) pairs in one RPC call.
+
+        Args:
+            pairs (List[Tuple[str, str]]): (owner address, token address) pairs.
+            spender (Optional[str], optional): Also read the allowance each owner granted this spender.
+
+        Returns:
+            List[TokenBalance]: One entry per pair, in the order given.
+
+        Example:
+            balances = await ETHWallet.get_token_balances([(owner, token_a), (owner, token_b)])
+            print(balances[1].amount)  # Output: 1000.0 (example token balance)
+        """
+        # imported here to avoid a circular import, Multicall reads ERC20_ABI from this module
+        from lib.Multicall import Multicall3Reader
 
-        # Create an ERC20 contract instance using the ABI and token address
-        token_contract: Contract = self.w3.eth.contract(
-            address=token_address, abi=token_meta.abi
+        return await Multicall3Reader(self.network.sn).get_token_balances(
+            pairs, spender
         )
 
-        # Call the balanceOf method of the token contract to get the balance
-        balance = await token_contract.functions.balanceOf(address).call()
+    async def get_eth_balances(self, addresses: List[str]) -> List[int]:
+        """
+        Get the native coin balance of many addresses in one RPC call.
+
+        Args:
+            addresses (List[str]): The addresses.
+
+        Returns:
+            List[int]: Each balance in wei, in the order given.
+        """
+        from lib.Multicall import Multicall3Reader
+
+        balances = await Multicall3Reader(self.network.sn).get_eth_balances(addresses)
+        return [balance or 0 for balance in balances]
+
+    async def get_amounts_out(self, amounts: List[int], path: List[str]) -> List[Optional[int]]:
+        """
+        Quote many amounts along one path on this network's V2 router in one RPC call.
+
+        Args:
+            amounts (List[int]): The amounts sold, in the first token's smallest unit.
+            path (List[str]): The token path.
+
+        Returns:
+            List[Optional[int]]: The amount bought for each amount sold, None where the quote failed.
+        """
+        from lib.Multicall import Multicall3Reader
 
-        # Convert the balance from wei to the token's units (depends on the token)
-        return float(balance) / (
-            10 ** (token.decimal.ethereum or token_contract.functions.decimals().call())
+        return await Multicall3Reader(self.network.sn).get_amounts_out(
+            self.uniswap_router.address, amounts, path
         )
 
     async def estimate_gas(self, transaction: Dict[str, Any]) -> int:
@@ -861,7 +980,7 @@ class ETHWallet:
             gas = ETHWallet.estimate_gas(transaction)
             print(gas)  # Output: 21000 (example gas estimate)
         """
-        return self.w3.eth.estimate_gas(transaction)
+        return await self.w3.eth.estimate_gas(transaction)
 
     async def get_gas_price(self) -> int:
         """
@@ -874,7 +993,171 @@ class ETHWallet:
             gas_price = ETHWallet.get_gas_price()
             print(gas_price)  # Output: 20000000000 (example gas price)
         """
-        return self.w3.eth.gas_price
+        return await self.w3.eth.gas_price
+
+    async def get_signing_context(
+        self, address: str, urgency: str = "normal", presets: Optional[Presets] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetches everything needed to sign a transaction for an address.
+
+        The latest block's timestamp comes from the in-memory chain head tracker, the fee
+        fields from the shared gas oracle and the nonce is reserved from the shared nonce
+        manager, so a wallet can have several transactions in flight at once. The reserved
+        nonce must be sent with `broadcast`, which releases it again if the send fails, or
+        given back with `nonces.release` when the transaction is abandoned before that.
+
+        Args:
+            address (str): The address that will send the transaction.
+            urgency (str, optional): The gas oracle tier, one of "snipe", "copy" or "normal". Defaults to "normal".
+            presets (Optional[Presets], optional): The user's presets applied to the fee. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The nonce, the latest block timestamp and the GasQuote under "gas".
+        """
+        header, nonce, gas = await asyncio.gather(
+            ChainHeads.get(self.network.sn).latest(),
+            self.nonces.reserve(address),
+            GasOracles.get(self.network.sn).quote(urgency, presets),
+            return_exceptions=True,
+        )
+        for error in (header, nonce, gas):
+            if isinstance(error, BaseException):
+                if not isinstance(nonce, BaseException):
+                    await self.nonces.release(address, nonce)
+                raise error
+
+        return {
+            "nonce": nonce,
+            "timestamp": header.timestamp,
+            "gas": gas,
+        }
+
+    async def broadcast(
+        self, sender_account: Any, transaction: Dict[str, Any], trace: Optional[LatencyTrace] = None
+    ) -> HexBytes:
+        """
+        Signs a transaction carrying a reserved nonce and broadcasts it, keeping the nonce manager in step.
+
+        Args:
+            sender_account (Any): The local account that signs the transaction.
+            transaction (Dict[str, Any]): The unsigned transaction, its nonce from `get_signing_context`.
+            trace (Optional[LatencyTrace], optional): Marks the "signed" and "broadcast" stages of a copy trade.
+                Defaults to None.
+
+        Returns:
+            HexBytes: The transaction hash.
+
+        Raises:
+            Exception: Whatever the signer or the endpoints raised, after the nonce was given back.
+        """
+        nonce = transaction["nonce"]
+        try:
+            signed_tx = self.w3.eth.account.sign_transaction(transaction, sender_account.key)
+            if trace is not None:
+                trace.mark("signed")
+            tx_hash = await self.rpc.send_raw_transaction(signed_tx.rawTransaction)
+            if trace is not None:
+                trace.mark("broadcast")
+        except Exception as e:
+            if "nonce too low" in str(e).lower():
+                # the nonce was used outside the manager, start again from the chain
+                await self.nonces.resync(sender_account.address)
+            else:
+                await self.nonces.release(sender_account.address, nonce)
+            raise
+        await self.nonces.mark_sent(sender_account.address, nonce, tx_hash, transaction)
+        return tx_hash
+
+    async def broadcast_many(
+        self,
+        sender_accounts: List[Any],
+        transactions: List[Dict[str, Any]],
+        traces: Optional[List[LatencyTrace]] = None,
+    ) -> List[Union[HexBytes, Exception]]:
+        """
+        Signs transactions of many senders and broadcasts them together in one JSON-RPC batch.
+
+        Every transaction is signed before any is sent, so the last one leaves a few
+        milliseconds after the first. A transaction no endpoint accepted in the batch is
+        sent once more on its own through `broadcast`, which reports why it failed and
+        gives its nonce back.
+
+        Args:
+            sender_accounts (List[Any]): The local account signing each transaction.
+            transactions (List[Dict[str, Any]]): The unsigned transactions, their nonces from `get_signing_context`.
+            traces (Optional[List[LatencyTrace]], optional): Each transaction's copy trade trace. Defaults to None.
+
+        Returns:
+            List[Union[HexBytes, Exception]]: Each transaction hash, or the error that stopped it.
+        """
+        traces = traces or [None] * len(transactions)
+        signed: List[Any] = []
+        for sender_account, transaction, trace in zip(sender_accounts, transactions, traces):
+            try:
+                signed.append(self.w3.eth.account.sign_transaction(transaction, sender_account.key))
+                if trace is not None:
+                    trace.mark("signed")
+            except Exception as e:
+                await self.nonces.release(sender_account.address, transaction["nonce"])
+                signed.append(e)
+
+        raws = [signed_tx.rawTransaction for signed_tx in signed if not isinstance(signed_tx, Exception)]
+        try:
+            sent = iter(await self.rpc.send_raw_transactions(raws))
+        except Exception as e:
+            LOGGER.error(f"Batch broadcast on {self.network.sn} failed: {e}")
+            sent = iter([None] * len(raws))
+
+        results: List[Union[HexBytes, Exception]] = []
+        for sender_account, transaction, trace, signed_tx in zip(sender_accounts, transactions, traces, signed):
+            if isinstance(signed_tx, Exception):
+                results.append(signed_tx)
+                continue
+            tx_hash = next(sent)
+            if tx_hash is None:
+                try:
+                    results.append(await self.broadcast(sender_account, transaction, trace))
+                except Exception as e:
+                    results.append(e)
+                continue
+            if trace is not None:
+                trace.mark("broadcast")
+            await self.nonces.mark_sent(sender_account.address, transaction["nonce"], tx_hash, transaction)
+            results.append(tx_hash)
+        return results
+
+    async def heal_nonces(self, private_key: str) -> List[HexBytes]:
+        """
+        Fills nonce gaps and re-prices stuck transactions of a wallet, logging instead of raising.
+
+        Args:
+            private_key (str): The private key of the wallet.
+
+        Returns:
+            List[HexBytes]: The hashes of the transactions that were sent, empty when none were or the heal failed.
+        """
+        try:
+            tx_hashes = await self.nonces.heal(private_key)
+            LOGGER.info(f"Healed {len(tx_hashes)} nonces on {self.network.sn}")
+            return tx_hashes
+        except Exception as e:
+            LOGGER.error(f"Nonce heal failed on {self.network.sn}: {e}")
+            return []
+
+    async def pending_message(self, private_key: str) -> str:
+        """
+        Heals a wallet whose transaction is taking too long and describes what was done.
+
+        Args:
+            private_key (str): The private key of the wallet.
+
+        Returns:
+            str: The message shown to the user.
+        """
+        if await self.heal_nonces(private_key):
+            return "Transaction is taking too long to confirm, it was re-sent with a higher fee"
+        return "Transaction is taking too long to confirm, it is still pending"
 
     async def send_token(
         self,
@@ -883,6 +1166,8 @@ class ETHWallet:
         sender_private_key: str,
         recipient_address: str,
         amount_ether: float,
+        urgency: str = "normal",
+        presets: Optional[Presets] = None,
     ) -> str:
         """
         Send tokens to a recipient address.
@@ -893,6 +1178,8 @@ class ETHWallet:
             sender_private_key (str): The private key of the sender.
             recipient_address (str): The recipient's address.
             amount_ether (float): The amount of tokens to send in Ether equivalent.
+            urgency (str, optional): The gas oracle tier, "snipe", "copy" or "normal". Defaults to "normal".
+            presets (Optional[Presets], optional): The user's presets applied to the gas quote. Defaults to None.
 
         Returns:
             str: The transaction URL on Etherscan.
@@ -904,57 +1191,55 @@ class ETHWallet:
         """
 
         sender_account = self.w3.eth.account.from_key(sender_private_key)
-        nonce = self.w3.eth.get_transaction_count(sender_account.address)
-        contract: type[Contract] = self.w3.eth.contract(contract_address, abi)
+        contract: type[AsyncContract] = self.w3.eth.contract(contract_address, abi)
         token_amount = self.w3.to_wei(amount_ether, "ether")
 
-        gas_estimate = contract.functions.transfer(
-            recipient_address, token_amount
-        ).estimate_gas({"from": sender_account.address})
-
-        # Get and determine gas parameters
-        latest_block = self.w3.eth.get_block("latest")
-        base_fee_per_gas = (
-            latest_block.baseFeePerGas
-        )  # Base fee in the latest block (in wei)
-        max_priority_fee_per_gas = (
-            self.w3.eth.max_priority_fee
-        )  # Priority fee to include the transaction in the block
-        max_fee_per_gas = (
-            5 * base_fee_per_gas
-        ) + max_priority_fee_per_gas  # Maximum amount you’re willing to pay
+        # the nonce is reserved from the NonceManager, the latest block read from the ChainHead and the fee
+        # quoted by the GasOracle, all concurrently in get_signing_context
+        signing_context, gas_estimate = await asyncio.gather(
+            self.get_signing_context(sender_account.address, urgency, presets),
+            contract.functions.transfer(recipient_address, token_amount).estimate_gas(
+                {"from": sender_account.address}
+            ),
+            return_exceptions=True,
+        )
+        if isinstance(signing_context, Exception):
+            raise signing_context
 
-        tx = {
-            "nonce": nonce,
-            "gas": gas_estimate,
-            "maxFeePerGas": max_fee_per_gas,
-            "maxPriorityFeePerGas": max_priority_fee_per_gas,
-            "chainId": self.chain,
-        }
-        if self.network.sn == "BSC":
+        try:
+            if isinstance(gas_estimate, Exception):
+                raise gas_estimate
             tx = {
-                "nonce": nonce,
-                "gas": 2100000,
-                "gasPrice": await self.get_gas_price(),
+                "nonce": signing_context["nonce"],
+                "gas": 2100000 if self.network.sn == "BSC" else gas_estimate,
+                # maxFeePerGas/maxPriorityFeePerGas, or gasPrice on legacy chains
+                **signing_context["gas"].to_tx_fields(),
                 "chainId": self.chain,
             }
 
-        transaction = contract.functions.transfer(
-            recipient_address, token_amount
-        ).build_transaction(tx)
-        signed_tx = self.w3.eth.account.sign_transaction(
-            transaction, sender_account.key
-        )
+            transaction = await contract.functions.transfer(
+                recipient_address, token_amount
+            ).build_transaction(tx)
+        except Exception:
+            # nothing was sent, the reserved nonce goes to the next transaction
+            await self.nonces.release(sender_account.address, signing_context["nonce"])
+            raise
 
         try:
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_hash = await self.broadcast(sender_account, transaction)
+            tx_receipt = await self.receipts.wait(
+                tx_hash, sender=sender_account.address, nonce=transaction["nonce"]
+            )
+            await self.nonces.mark_mined(sender_account.address, transaction["nonce"])
             if tx_receipt["status"] == 1:
                 LOGGER.info("Transaction successful!")
                 return f"https://etherscan.io/tx/{tx_hash.hex()}"
             else:
                 LOGGER.info("Transaction failed")
                 return "Transaction failed"
+        except TimeExhausted as e:
+            LOGGER.error(e)
+            return await self.pending_message(sender_private_key)
         except Exception as e:
             LOGGER.error(e)
             if "insufficient funds for gas" in str(e):
@@ -962,7 +1247,12 @@ class ETHWallet:
             return str(e)
 
     async def send_eth(
-        self, sender_private_key: str, recipient_address: str, amount_ether: float
+        self,
+        sender_private_key: str,
+        recipient_address: str,
+        amount_ether: float,
+        urgency: str = "normal",
+        presets: Optional[Presets] = None,
     ) -> str:
         """
         Send Ether to a recipient address.
@@ -971,6 +1261,8 @@ class ETHWallet:
             sender_private_key (str): The private key of the sender.
             recipient_address (str): The recipient's address.
             amount_ether (Decimal): The amount of Ether to send.
+            urgency (str, optional): The gas oracle tier, "snipe", "copy" or "normal". Defaults to "normal".
+            presets (Optional[Presets], optional): The user's presets applied to the gas quote. Defaults to None.
 
         Returns:
             str: The transaction URL on Etherscan.
@@ -980,48 +1272,34 @@ class ETHWallet:
             print(tx_url)  # Output: Etherscan transaction URL
         """
         sender_account = self.w3.eth.account.from_key(sender_private_key)
-        nonce = self.w3.eth.get_transaction_count(sender_account.address)
-
-        # Get and determine gas parameters
-        latest_block = self.w3.eth.get_block("latest")
-        base_fee_per_gas = (
-            latest_block.baseFeePerGas
-        )  # Base fee in the latest block (in wei)
-        max_priority_fee_per_gas = (
-            self.w3.eth.max_priority_fee
-        )  # Priority fee to include the transaction in the block
-        max_fee_per_gas = (
-            50 * base_fee_per_gas
-        ) + max_priority_fee_per_gas  # Maximum amount you’re willing to pay
+        signing_context = await self.get_signing_context(
+            sender_account.address, urgency, presets
+        )
 
         tx = {
-            "nonce": nonce,
+            "nonce": signing_context["nonce"],
             "to": recipient_address,
             "value": self.w3.to_wei(amount_ether, "ether"),
             "gas": 21000,
-            "maxFeePerGas": max_fee_per_gas,
-            "maxPriorityFeePerGas": max_priority_fee_per_gas,
+            **signing_context["gas"].to_tx_fields(),
             "chainId": self.chain,
         }
-        if self.network.sn == "BSC":
-            tx = {
-                "nonce": nonce,
-                "gas": 2100000,
-                "gasPrice": await self.get_gas_price(),
-                "chainId": self.chain,
-            }
-
-        signed_tx = self.w3.eth.account.sign_transaction(tx, sender_account.key)
 
         try:
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_hash = await self.broadcast(sender_account, tx)
+            tx_receipt = await self.receipts.wait(
+                tx_hash, sender=sender_account.address, nonce=tx["nonce"]
+            )
+            await self.nonces.mark_mined(sender_account.address, tx["nonce"])
             if tx_receipt["status"] == 1:
                 LOGGER.info("Transaction successful!")
                 return f"https://etherscan.io/tx/{tx_hash.hex()}"
             else:
                 LOGGER.info("Transaction failed")
                 return "Transaction failed"
+        except TimeExhausted as e:
+            LOGGER.error(e)
+            return await self.pending_message(sender_private_key)
         except Exception as e:
             LOGGER.error(e)
             if "insufficient funds for gas" in str(e):
@@ -1060,13 +1338,24 @@ class ETHWallet:
         user_address = await self.convert_to_checksum(user_address)
         token_address = await self.convert_to_checksum(token_address)
 
-        # Fetch ETH balance
-        eth_balance = self.w3.eth.get_balance(user_address)
-        LOGGER.debug(f"ETH Bal: {eth_balance}")
-
-        # Fetch token balance
+        # Fetch ETH and token balance in one batched request
         token_contract = self.w3.eth.contract(address=token_address, abi=ERC20_ABI)
-        token_balance = token_contract.functions.balanceOf(user_address).call()
+        batch = JsonRpcBatch(self.network.sn)
+        batch.add("eth_getBalance", [user_address, "latest"])
+        batch.add(
+            "eth_call",
+            [
+                {
+                    "to": token_address,
+                    "data": token_contract.encodeABI(
+                        fn_name="balanceOf", args=[user_address]
+                    ),
+                },
+                "latest",
+            ],
+        )
+        eth_balance, token_balance = [to_int(value) for value in await self.rpc.batch(batch)]
+        LOGGER.debug(f"ETH Bal: {eth_balance}")
         amount_to_transfer_wei = self.w3.to_wei(amount_to_transfer, "ether")
 
         # Calculate gas cost in wei
@@ -1098,6 +1387,8 @@ class ETHWallet:
         amount_in_wei: int,
         amount_out_min_wei: int,
         deadline: int = 3000,
+        urgency: str = "normal",
+        presets: Optional[Presets] = None,
     ) -> str:
         """
         Swap tokens using Uniswap.
@@ -1109,6 +1400,8 @@ class ETHWallet:
             amount_in (float): The amount of input tokens.
             amount_out_min (float): The minimum amount of output tokens.
             deadline (int): The transaction deadline in seconds.
+            urgency (str, optional): The gas oracle tier, "snipe", "copy" or "normal". Defaults to "normal".
+            presets (Optional[Presets], optional): The user's presets applied to the gas quote. Defaults to None.
             router_address (str): The address of the Uniswap router.
             router_abi (Any): The ABI of the Uniswap router.
 
@@ -1121,37 +1414,22 @@ class ETHWallet:
             print(tx_url)  # Output: Etherscan transaction URL
         """
         sender_account = self.w3.eth.account.from_key(sender_private_key)
-        nonce = self.w3.eth.get_transaction_count(sender_account.address)
         path = [token_in, token_out]
 
-        deadline_timestamp = self.w3.eth.get_block("latest")["timestamp"] + deadline
+        # the nonce is reserved from the NonceManager, the latest block read from the ChainHead and the fee
+        # quoted by the GasOracle, all concurrently in get_signing_context
+        signing_context = await self.get_signing_context(
+            sender_account.address, urgency, presets
+        )
 
-        # Get and determine gas parameters
-        latest_block = self.w3.eth.get_block("latest")
-        base_fee_per_gas = (
-            latest_block.baseFeePerGas
-        )  # Base fee in the latest block (in wei)
-        max_priority_fee_per_gas = (
-            self.w3.eth.max_priority_fee
-        )  # Priority fee to include the transaction in the block
-        max_fee_per_gas = (
-            5 * base_fee_per_gas
-        ) + max_priority_fee_per_gas  # Maximum amount you’re willing to pay
+        deadline_timestamp = signing_context["timestamp"] + deadline
 
         tx = {
-            "nonce": nonce,
+            "nonce": signing_context["nonce"],
             "gas": 2100000,
-            "maxFeePerGas": max_fee_per_gas,
-            "maxPriorityFeePerGas": max_priority_fee_per_gas,
+            **signing_context["gas"].to_tx_fields(),
             "chainId": self.chain,
         }
-        if self.network.sn == "BSC":
-            tx = {
-                "nonce": nonce,
-                "gas": 2100000,
-                "gasPrice": await self.get_gas_price(),
-                "chainId": self.chain,
-            }
         LOGGER.debug(tx)
         #         can_transfer = await self.check_balances(
         #             sender_account.address, token_in, amount_in, gas_price
@@ -1161,26 +1439,30 @@ class ETHWallet:
         #             return """
         # Insufficient Balance for transaction.
         #         """
-        transaction = self.uniswap_router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
-            amount_in_wei,
-            amount_out_min_wei,
-            path,
-            sender_account.address,
-            deadline_timestamp,
-        ).build_transaction(
-            tx
-        )
-
-        signed_tx = self.w3.eth.account.sign_transaction(
-            transaction, sender_account.key
-        )
+        try:
+            transaction = await self.uniswap_router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
+                amount_in_wei,
+                amount_out_min_wei,
+                path,
+                sender_account.address,
+                deadline_timestamp,
+            ).build_transaction(
+                tx
+            )
 
-        tokenInDetails = await TokenMetadata().get_token_symbol_by_contract(token_in)
-        tokenOutDetails = await TokenMetadata().get_token_symbol_by_contract(token_out)
+            tokenInDetails = await TokenMetadata().get_token_symbol_by_contract(token_in)
+            tokenOutDetails = await TokenMetadata().get_token_symbol_by_contract(token_out)
+        except Exception:
+            # nothing was sent, the reserved nonce goes to the next transaction
+            await self.nonces.release(sender_account.address, signing_context["nonce"])
+            raise
 
         try:
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_hash = await self.broadcast(sender_account, transaction)
+            tx_receipt = await self.receipts.wait(
+                tx_hash, sender=sender_account.address, nonce=transaction["nonce"]
+            )
+            await self.nonces.mark_mined(sender_account.address, transaction["nonce"])
             if tx_receipt["status"] == 1:
                 LOGGER.info("Token swap successful!")
                 return f"""
@@ -1197,6 +1479,9 @@ class ETHWallet:
             else:
                 LOGGER.info("Token swap failed")
                 return "Token swap failed"
+        except TimeExhausted as e:
+            LOGGER.error(e)
+            return await self.pending_message(sender_private_key)
         except Exception as e:
             LOGGER.error(e)
             if "insufficient funds for gas" in str(e):
@@ -1211,9 +1496,189 @@ class ETHWallet:
         LOGGER.debug(f"Path: {path}")
 
         # Fetch amounts out
-        amounts_out = self.uniswap_router.functions.getAmountsOut(
+        amounts_out = await self.uniswap_router.functions.getAmountsOut(
             amount_in, path
         ).call()
 
         LOGGER.debug(f"Amount Out: {amounts_out}")
         return amounts_out[1]
+
+    async def approve_max(
+        self,
+        sender_account: Any,
+        token_address: str,
+        spender: str,
+        urgency: str = "normal",
+        presets: Optional[Presets] = None,
+    ) -> HexBytes:
+        """
+        Approves a spender for the maximum amount of a token, without waiting for it to be mined.
+
+        Args:
+            sender_account (Any): The local account owning the token.
+            token_address (str): The checksum address of the token.
+            spender (str): The checksum address of the spender, usually a router.
+            urgency (str, optional): The gas oracle tier. Defaults to "normal".
+            presets (Optional[Presets], optional): The user's presets applied to the fee. Defaults to None.
+
+        Returns:
+            HexBytes: The approval transaction hash.
+        """
+        token = self.w3.eth.contract(address=token_address, abi=ERC20_ABI)
+        signing_context = await self.get_signing_context(sender_account.address, urgency, presets)
+        try:
+            approval = await token.functions.approve(spender, 2**256 - 1).build_transaction(
+                {
+                    "from": sender_account.address,
+                    "nonce": signing_context["nonce"],
+                    "gas": 100000,
+                    **signing_context["gas"].to_tx_fields(),
+                    "chainId": self.chain,
+                }
+            )
+        except Exception:
+            await self.nonces.release(sender_account.address, signing_context["nonce"])
+            raise
+        return await self.broadcast(sender_account, approval)
+
+    async def mirror_swap(
+        self,
+        sender_account: Any,
+        swap: DecodedSwap,
+        amount_in: int,
+        presets: Optional[Presets] = None,
+        urgency: str = "copy",
+        deadline: int = 300,
+        trace: Optional[LatencyTrace] = None,
+    ) -> Tuple[HexBytes, int]:
+        """
+        Sends the follower's copy of a decoded swap through this network's V2 router.
+
+        The swap keeps the direction of the original: native coin in, native coin out or token
+        to token, with `amount_in` chosen by the caller. Concentrated liquidity paths are routed
+        through the wrapped native coin. The transaction comes from the follower's cached
+        SwapTemplate for the path, built and approved on the first mirror of that path, so
+        only the quote, the amounts, the nonce and the fee are filled in here.
+
+        Args:
+            sender_account (Any): The follower's local account.
+            swap (DecodedSwap): The swap to copy.
+            amount_in (int): The amount of the sold token, in its smallest unit.
+            presets (Optional[Presets], optional): The follower's presets, `slippage` as the fraction the
+                /presets prompt stores, 0.05 for 5%. Defaults to None.
+            urgency (str, optional): The gas oracle tier. Defaults to "copy".
+            deadline (int, optional): The swap deadline in seconds. Defaults to 300.
+            trace (Optional[LatencyTrace], optional): The copy trade's latency trace, marked when the swap is
+                signed and sent. Defaults to None.
+
+        Returns:
+            Tuple[HexBytes, int]: The swap transaction hash and its nonce.
+        """
+        template = await SwapTemplates.get(self, sender_account, swap, presets, urgency)
+        amounts_out, signing_context = await asyncio.gather(
+            self.uniswap_router.functions.getAmountsOut(amount_in, template.path).call(),
+            self.get_signing_context(sender_account.address, urgency, presets),
+            return_exceptions=True,
+        )
+        if isinstance(signing_context, Exception):
+            raise signing_context
+        if isinstance(amounts_out, Exception):
+            await self.nonces.release(sender_account.address, signing_context["nonce"])
+            raise amounts_out
+        transaction = template.fill(
+            amount_in,
+            template.amount_out_min(amounts_out[-1]),
+            signing_context["timestamp"] + deadline,
+            signing_context["nonce"],
+            signing_context["gas"].to_tx_fields(),
+        )
+        try:
+            tx_hash = await self.broadcast(sender_account, transaction, trace)
+        except Exception:
+            # an allowance spent or revoked since the template was built is checked again next time
+            SwapTemplates.forget(sender_account.address)
+            raise
+        return tx_hash, transaction["nonce"]
+
+    async def mirror_swaps(
+        self,
+        sender_accounts: List[Any],
+        swap: DecodedSwap,
+        amounts_in: List[int],
+        presets: List[Optional[Presets]],
+        urgency: str = "copy",
+        deadline: int = 300,
+        traces: Optional[List[LatencyTrace]] = None,
+    ) -> List[Union[Tuple[HexBytes, int], Exception]]:
+        """
+        Sends many followers' copies of one decoded swap, see `mirror_swap`.
+
+        The followers' templates and signing contexts are fetched concurrently, every amount
+        is quoted in one multicall since all copies take the same route, and the filled
+        transactions are signed and broadcast together with `broadcast_many`.
+
+        Args:
+            sender_accounts (List[Any]): The followers' local accounts.
+            swap (DecodedSwap): The swap to copy.
+            amounts_in (List[int]): Each follower's amount of the sold token, in its smallest unit.
+            presets (List[Optional[Presets]]): Each follower's presets.
+            urgency (str, optional): The gas oracle tier. Defaults to "copy".
+            deadline (int, optional): The swap deadline in seconds. Defaults to 300.
+            traces (Optional[List[LatencyTrace]], optional): Each follower's copy trade trace. Defaults to None.
+
+        Returns:
+            List[Union[Tuple[HexBytes, int], Exception]]: Each swap's hash and nonce, or the error that stopped it.
+        """
+        templates = await asyncio.gather(
+            *[
+                SwapTemplates.get(self, account, swap, preset, urgency)
+                for account, preset in zip(sender_accounts, presets)
+            ],
+            return_exceptions=True,
+        )
+        ready = [index for index, template in enumerate(templates) if not isinstance(template, Exception)]
+        results: List[Union[Tuple[HexBytes, int], Exception]] = list(templates)
+        if not ready:
+            return results
+
+        quotes, *signing_contexts = await asyncio.gather(
+            self.get_amounts_out([amounts_in[index] for index in ready], templates[ready[0]].path),
+            *[self.get_signing_context(sender_accounts[index].address, urgency, presets[index]) for index in ready],
+            return_exceptions=True,
+        )
+        if isinstance(quotes, Exception):
+            quotes = [quotes] * len(ready)
+        sending, transactions = [], []
+        for index, quote, signing_context in zip(ready, quotes, signing_contexts):
+            template = templates[index]
+            if isinstance(signing_context, Exception):
+                results[index] = signing_context
+                continue
+            if quote is None or isinstance(quote, Exception):
+                await self.nonces.release(sender_accounts[index].address, signing_context["nonce"])
+                results[index] = quote or ValueError(f"No quote for {amounts_in[index]} along {template.path}")
+                continue
+            sending.append(index)
+            transactions.append(
+                template.fill(
+                    amounts_in[index],
+                    template.amount_out_min(quote),
+                    signing_context["timestamp"] + deadline,
+                    signing_context["nonce"],
+                    signing_context["gas"].to_tx_fields(),
+                )
+            )
+
+        sent = await self.broadcast_many(
+            [sender_accounts[index] for index in sending],
+            transactions,
+            [traces[index] for index in sending] if traces is not None else None,
+        )
+        for index, transaction, tx_hash in zip(sending, transactions, sent):
+            if isinstance(tx_hash, Exception):
+                # an allowance spent or revoked since the template was built is checked again next time
+                SwapTemplates.forget(sender_accounts[index].address)
+                results[index] = tx_hash
+            else:
+                results[index] = (tx_hash, transaction["nonce"])
+        return results
@@ -16,3 +16,4 @@ class Presets(Model):
     snipe_take_profit: Optional[float] = 1.25
     snipe_stop_loss: Optional[float] = 0.15
     balance_tradable: Optional[float] = 0.05
+    mempool_copy: Optional[bool] = False
@@ -7,7 +7,9 @@ from .commands.Actions import (
     faq,
     start,
     stop_trade,
+    latency_report,
 )
+from .commands.Presets import toggle_mempool_copy
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -26,6 +28,8 @@ faq = CommandHandler("faq", faq)
 start = CommandHandler("start", start)
 home = CommandHandler("home", start)
 stop_trade = CommandHandler("stop_copytrade", stop_trade)
+mempool_copy = CommandHandler("mempool_copy", toggle_mempool_copy)
+latency = CommandHandler("latency", latency_report)
 
 
-commands = [cancel, about, help, faq, start, stop_trade, home] # start_copytrade, stop_watch_ws
+commands = [cancel, about, help, faq, start, stop_trade, home, mempool_copy, latency] # start_copytrade, stop_watch_ws
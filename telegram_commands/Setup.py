@@ -2,7 +2,10 @@ import html
 import json
 import traceback
 from warnings import filterwarnings
+from lib.CopyTradeHub import CopyTradeWatcher
 from lib.GetDotEnv import DEVELOPER_CHAT_ID, TOKEN, USERNAME
+from lib.ListingsFeed import CmcListings
+from lib.PriceFeed import PriceFeeds
 from lib.Logger import LOGGER
 from telegram import KeyboardButton, Update
 from telegram.constants import ParseMode
@@ -70,11 +73,19 @@ async def log_error(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     LOGGER.error(f"Update: {update}\n\ncaused error: {context.error}")
 
 
+async def post_init(application: Application) -> None:
+    """Start the background services that run on the bot's event loop."""
+    await CopyTradeWatcher.start(application)
+    CmcListings.start()
+    PriceFeeds.start()
+
+
 def telegram_setup() -> None:
     """Set up and run the Telegram bot."""
     LOGGER.info("Initializing CopyTraderBot")
     LOGGER.info(f"Bot Name: {USERNAME}")
-    app = Application.builder().token(TOKEN).build()
+    # copy trade watches, the listings refresher and the price feed run on the bot's event loop once it is up
+    app = Application.builder().token(TOKEN).post_init(post_init).build()
     LOGGER.info("App Initialized and Ready")
 
     for command in commands:
@@ -1,4 +1,5 @@
 import asyncio
+import io
 from datetime import datetime
 
 # from lib.CryptoWatcher import CryptoWatcherHttp, CryptoWatcherWs
@@ -15,7 +16,10 @@ from telegram.ext import (
     CallbackContext,
 )
 from data.Constants import help_message, about_message, faq_messages
-from data.Queries import CoinData, PresetsData, UserData, WalletData
+from data.Queries import CoinData, PresetsData, UserCopyTradesTasksData, UserData, WalletData
+from lib.CopyTradeHub import CopyTradeWatcher
+from lib.GetDotEnv import DEVELOPER_CHAT_ID
+from lib.LatencyMetrics import CopyTradeLatency
 from lib.WalletClass import ETHWallet
 from models.CoinsModel import Coins
 from models.Presets import Presets
@@ -131,15 +135,28 @@ async def stop_trade(update: Update, context: CallbackContext) -> None:
     LOGGER.debug(f"Stop Trade Args: {args}")
     chat_id = update.effective_chat.id
 
+    kb = await setKeyboard(auth_start_buttons)
+
     if args:
         task_id = args[0]  # Assuming the task ID is the first argument
         LOGGER.info(f"Attempting to stop task with ID: {task_id}")
 
+        if await CopyTradeWatcher.remove_watch(task_id, chat_id):
+            await UserCopyTradesTasksData.update_copy_trade_tasks(
+                f"{chat_id}-{task_id}", {"status": 0}
+            )
+            LOGGER.info(f"Removed copy trade watch: {task_id}")
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=f"Stopped trade with task ID: {task_id}.",
+                reply_markup=kb,
+            )
+            return
+
+        # copy trades started before the hub ran as celery tasks
         result = AsyncResult(task_id)
         LOGGER.info(f"Task state: {result.state}")
 
-        kb = setKeyboard(auth_start_buttons)
-
         if result.state in ["PENDING", "STARTED"]:
             result.revoke(terminate=True)
             LOGGER.info(f"Revoked task: {task_id}")
@@ -159,3 +176,29 @@ async def stop_trade(update: Update, context: CallbackContext) -> None:
         await context.bot.send_message(
             chat_id=chat_id, text="No task ID provided in the command.", reply_markup=kb
         )
+
+
+async def latency_report(update: Update, context: CallbackContext) -> None:
+    """
+    Sends the per chain copy trade stage latencies to the developer.
+
+    `/latency` replies with the p50, p90 and p99 of each stage, `/latency prometheus`
+    sends the raw histograms as a text file in the Prometheus exposition format.
+    """
+    chat_id = update.effective_chat.id
+    if str(chat_id) != str(DEVELOPER_CHAT_ID):
+        return
+
+    if context.args and context.args[0].lower() == "prometheus":
+        await context.bot.send_document(
+            chat_id=chat_id,
+            document=io.BytesIO(CopyTradeLatency.export().encode()),
+            filename="copytrade_latency.prom",
+        )
+        return
+
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"<b>COPY TRADE LATENCY</b>\n<pre>{CopyTradeLatency.summary()}</pre>",
+        parse_mode=ParseMode.HTML,
+    )
@@ -277,6 +277,7 @@ async def process_amount_in(update: Update, context: CallbackContext):
             tokenOutContractAddress,
             amountIn_wei,
             amountOut_wei,
+            presets=preset,
         )
     else:
         transactionHash = await SolanaWallet().execute_swap(
@@ -1,8 +1,9 @@
 from datetime import datetime, date
 from typing import Optional
 from data.Networks import Network, Networks
-from data.Queries import CoinData, UserCopyTradesTasksData, UserData, WalletData
+from data.Queries import CoinData, PresetsData, UserCopyTradesTasksData, UserData, WalletData
 from lib.GetDotEnv import TOKEN
+from lib.CopyTradeHub import CopyTradeWatcher
 from lib.Logger import LOGGER
 from telegram import ForceReply, ReplyKeyboardRemove, Update
 from telegram.constants import ParseMode
@@ -25,10 +26,11 @@ from data.Constants import (
     agreement_message_III,
 )
 from lib.WalletClass import ETHWallet
+from solders.pubkey import Pubkey  # type: ignore
 from models.CoinsModel import Coins, Platform
 from models.CopyTradeModel import UserCopyTradesTasks
+from models.Presets import Presets
 from models.UserModel import User, UserWallet
-from tasks import copytrade_task
 from telegram_commands.commands.Messages import profile_msg, wallet_msg
 from .Buttons import (
     setWalletKeyboard,
@@ -81,7 +83,15 @@ async def process_wallet_address(update: Update, context: CallbackContext):
         network for network in Networks if network.id == wallet.chain_id
     ][0]
 
-    valid = await ETHWallet(network.sn).validate_address(text)
+    if network.sn == "SOL":
+        text = text.strip()
+        try:
+            Pubkey.from_string(text)
+            valid = True
+        except ValueError:
+            valid = False
+    else:
+        valid = await ETHWallet(network.sn).validate_address(text)
     if not valid:
         response_text = (
             "Invalid wallet address, Please provide a correct wallet address."
@@ -95,13 +105,20 @@ async def process_wallet_address(update: Update, context: CallbackContext):
         )
         return ADDRESS_RECEIVER
 
-    token = context.bot.token
     if usr and wallet is not None:
-        result = copytrade_task.delay(wallet.sec_key, text, chat_id)
+        # the watch runs inside the bot's copy trade hub, no worker is tied up per follow
+        preset: Optional[Presets] = await PresetsData.get_presets_by_id(f"{chat_id}-{wallet.chain_id}")
+        watch_id = await CopyTradeWatcher.add_watch(
+            chat_id,
+            wallet.sol_sec_key if network.sn == "SOL" else wallet.sec_key,
+            text,
+            network.sn,
+            mempool=bool(preset is not None and preset.mempool_copy),
+        )
         data = UserCopyTradesTasks(
-            id=f"{chat_id}-{result.id}",
+            id=f"{chat_id}-{watch_id}",
             user_id=chat_id,
-            copy_trade_id=str(result.id),
+            copy_trade_id=watch_id,
             watcher_address=text,
             status=1,
         )
@@ -109,11 +126,11 @@ async def process_wallet_address(update: Update, context: CallbackContext):
         response_text = f"""
 COPY TRADE ACTIVE
 ------------------------------
-Copy Trade Transaction ID: {result.id}
+Copy Trade Transaction ID: {watch_id}
 Target Address: {text}
 Status: 💚
 ------------------------------
-When you want to end a copy trade actively running, pass the argument like this: /stop_trade {result.id}
+When you want to end a copy trade actively running, pass the argument like this: /stop_copytrade {watch_id}
             """
         kb = await setKeyboard(auth_start_buttons)
         await context.bot.send_message(
@@ -1,5 +1,6 @@
+import asyncio
 from textwrap import fill
-from typing import Optional
+from typing import Optional, Tuple
 
 from data.Networks import Network, Networks
 from lib.WalletClass import ETHWallet, SolanaWallet
@@ -41,11 +42,30 @@ Agreement   |  {user.accepted_on or 'N/A'}
 
     return message
 
+async def portfolio_balances(wallet: UserWallet, network: Network) -> Tuple[float, int, int]:
+    """
+    Reads what the wallet and presets views show, concurrently instead of one RPC after another.
+
+    Args:
+        wallet (UserWallet): The user's wallet.
+        network (Network): The network the wallet is connected to.
+
+    Returns:
+        Tuple[float, int, int]: The native balance in ETH, the gas price in wei and the SOL balance in lamports.
+    """
+    eth_wallet = ETHWallet(network.sn)
+    sol_pub_key = Keypair.from_base58_string(wallet.sol_sec_key).pubkey()
+    balances, gas_price, sol_balance = await asyncio.gather(
+        eth_wallet.get_eth_balances([wallet.pub_key]),
+        eth_wallet.get_gas_price(),
+        SolanaWallet().get_balance(sol_pub_key),
+    )
+    return await eth_wallet.convert_from_wei(balances[0]), gas_price, sol_balance
+
+
 async def preset_msg(wallet: Optional[UserWallet], preset: Optional[Presets]):
     network: Network  = [network for network in Networks if network.id == wallet.chain_id][0] if wallet is not None else Networks[0]
-    balance = await ETHWallet(network.sn).get_balance(wallet.pub_key)
-    sol_pub_key = Keypair.from_base58_string(wallet.sol_sec_key).pubkey()
-    sol_balance = await SolanaWallet().get_balance(sol_pub_key)
+    balance, gas_price, sol_balance = await portfolio_balances(wallet, network)
     return f"""
 
 <b>Connected to {wallet.chain_name}</b>
@@ -62,7 +82,7 @@ async def preset_msg(wallet: Optional[UserWallet], preset: Optional[Presets]):
 <b>{(sol_balance / 10**6) if network.sn == "SOL" else balance} {network.sn}</b>
 -----------------------------------
 💵 CURRENT GAS
-<pre>{await ETHWallet(network.sn).get_gas_price()} WEI</pre>
+<pre>{gas_price} WEI</pre>
 -----------------------------------
 👛 MULTI WALLET ADDRESS
 <pre>{wallet.pub_key if network.sn != "SOL" else wallet.sol_pub_key}</pre>
@@ -94,9 +114,7 @@ Please generate a unique one or attach an existing one to your account to aid yo
     """
 
     if wallet is not None:
-        balance = await ETHWallet(network.sn).get_balance(wallet.pub_key)
-        sol_pub_key = Keypair.from_base58_string(wallet.sol_sec_key).pubkey()
-        sol_balance = await SolanaWallet().get_balance(sol_pub_key)
+        balance, gas_price, sol_balance = await portfolio_balances(wallet, network)
         message = f"""
 CONNECTED TO {wallet.chain_name.upper()}
 -----------------------------------
@@ -104,7 +122,7 @@ CONNECTED TO {wallet.chain_name.upper()}
 <b>{(sol_balance / 10**6) if network.sn == "SOL" else balance} {network.sn}</b>
 -----------------------------------
 💵 CURRENT GAS
-<pre>{await ETHWallet(network.sn).get_gas_price()} WEI</pre>
+<pre>{gas_price} WEI</pre>
 -----------------------------------
 👛 MULTI WALLET ADDRESS
 <pre>{wallet.pub_key if network.sn != "SOL" else wallet.sol_pub_key}</pre>
@@ -113,7 +131,7 @@ CONNECTED TO {wallet.chain_name.upper()}
 <pre>{wallet.sec_key if network.sn != "SOL" else wallet.sol_sec_key}</pre>
 ------------------------------------
 
-💵 CURRENT GAS:------------ <pre>{await ETHWallet(network.sn).get_gas_price()} WEI</pre>
+💵 CURRENT GAS:------------ <pre>{gas_price} WEI</pre>
 🗒 NOTE: <b>Ensure to store this keys somewhere as we do not have a means to recover these wallet addresses for you.</b>
 
         """
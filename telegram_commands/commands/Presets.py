@@ -2,6 +2,7 @@ from datetime import datetime, date
 from typing import Optional
 from data.Networks import Network, Networks
 from data.Queries import CoinData, PresetsData, UserData, WalletData
+from lib.CopyTradeHub import CopyTradeWatcher
 from lib.Logger import LOGGER
 from telegram import ForceReply, ReplyKeyboardRemove, Update
 from telegram.constants import ParseMode
@@ -153,8 +154,8 @@ async def process_gas_delta(update: Update, context: CallbackContext):
     usr: User | None = await UserData.get_user_by_id(chat_id)
     wallet: Optional[UserWallet] = await WalletData.get_wallet_by_id(chat_id)
     kb = await setKeyboard(presets_button)
-    network: Network  = [network for network in Networks if network.id == wallet.chain_id][0] if wallet is not None else Networks[0]
-    amount = await ETHWallet(network.sn).convert_to_wei(float(text.strip()))
+    # the gas oracle reads the delta as a percentage bump on the priority fee
+    amount = int(float(text.strip()))
 
     preset: Presets = await PresetsData.get_presets_by_id(f"{chat_id}-{wallet.chain_id}")
     if preset is None:
@@ -695,3 +696,57 @@ async def process_snipe_stop_loss(update: Update, context: CallbackContext):
     )
     return ConversationHandler.END
 
+
+async def toggle_mempool_copy(update: Update, context: CallbackContext):
+    chat_id = update.effective_chat.id
+    args = context.args
+    usr: User | None = await UserData.get_user_by_id(chat_id)
+    wallet: Optional[UserWallet] = await WalletData.get_wallet_by_id(chat_id)
+    kb = await setKeyboard(presets_button)
+
+    if not usr or wallet is None:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="Attach a wallet address first before you can start using the platform",
+            parse_mode=ParseMode.HTML,
+            reply_markup=await setKeyboard(wallet_buttons),
+        )
+        return
+
+    if not args or args[0].lower() not in ["on", "off"]:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="""
+Mempool copy trading mirrors your whale's swaps while they are still pending, so your trade can land in the same block.
+Pass the argument like this: /mempool_copy on or /mempool_copy off
+            """,
+            parse_mode=ParseMode.HTML,
+            reply_markup=kb,
+        )
+        return
+
+    enabled = args[0].lower() == "on"
+    network: Network = [network for network in Networks if network.id == wallet.chain_id][0]
+    preset: Presets = await PresetsData.get_presets_by_id(f"{chat_id}-{wallet.chain_id}")
+    if preset is None:
+        data = Presets(
+            id=f"{chat_id}-{wallet.chain_id}",
+            chain_id=str(wallet.chain_id),
+            chain_name=wallet.chain_name,
+            mempool_copy=enabled,
+        )
+        preset: Presets = await PresetsData.create_presets(data)
+    else:
+        preset: Presets = await PresetsData.update_presets(
+            f"{chat_id}-{wallet.chain_id}", {"mempool_copy": enabled}
+        )
+
+    # running copy trades switch over without being restarted
+    await CopyTradeWatcher.set_mempool(chat_id, network.sn, enabled)
+
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"Mempool copy trading is {'ON' if enabled else 'OFF'} for {wallet.chain_name}",
+        parse_mode=ParseMode.HTML,
+        reply_markup=kb,
+    )
@@ -0,0 +1,175 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+from web3 import AsyncHTTPProvider, AsyncWeb3
+
+from lib.CryptoWatcher import WsCryptoCopyTrader
+from lib.ProviderPool import ProviderPool
+from lib.RpcRouter import RpcRouter, RpcRouters
+from lib.SwapDecoder import WRAPPED_NATIVE
+from lib.WalletClass import ETHWallet, uniswap_abi, uniswap_contract
+
+# what the fake node answers per method, anything else gets a null result
+NODE_ANSWERS: Dict[str, Any] = {
+    "eth_chainId": "0x1",
+    "eth_blockNumber": "0x1312d00",
+    "eth_getBalance": hex(10**18),
+    "eth_getTransactionCount": "0x7",
+    "eth_gasPrice": hex(30 * 10**9),
+    "eth_estimateGas": hex(21000),
+}
+
+
+class NodeServer(ThreadingHTTPServer):
+    # every benchmark handler connects at once, the default backlog of 5 drops connections into a 1s SYN retry
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def node_handler(latency: float) -> type:
+    class JsonRpcHandler(BaseHTTPRequestHandler):
+        # keep-alive, so clients reuse their connections instead of reconnecting per request
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            # one round-trip per request, however many calls a batch carries
+            time.sleep(latency)
+            calls = payload if isinstance(payload, list) else [payload]
+            answers = [
+                {"jsonrpc": "2.0", "id": call["id"], "result": NODE_ANSWERS.get(call["method"])} for call in calls
+            ]
+            body = json.dumps(answers if isinstance(payload, list) else answers[0]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return JsonRpcHandler
+
+
+@pytest.fixture
+def rpc_node() -> Iterator[Callable[[float], str]]:
+    """
+    Starts JSON-RPC nodes on their own threads, so blocking clients on the test's event loop cannot stall them.
+
+    Yields:
+        Callable[[float], str]: Starts a node answering after the given latency in seconds and returns its url.
+    """
+    servers: List[NodeServer] = []
+
+    def start(latency: float = 0.05) -> str:
+        server = NodeServer(("127.0.0.1", 0), node_handler(latency))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def eth_wallet(monkeypatch: pytest.MonkeyPatch) -> Callable[[str], ETHWallet]:
+    """
+    Builds ETHWallets whose pooled AsyncWeb3 provider and RPC router talk to a benchmark node.
+
+    Returns:
+        Callable[[str], ETHWallet]: Points the ETH providers at the node url and returns a wallet.
+    """
+
+    def build(url: str) -> ETHWallet:
+        w3 = AsyncWeb3(AsyncHTTPProvider(url))
+        router = w3.eth.contract(address=uniswap_contract, abi=uniswap_abi)
+        monkeypatch.setitem(ProviderPool._async_providers, "ETH", w3)
+        monkeypatch.setitem(ProviderPool._async_routers, "ETH", router)
+        monkeypatch.setitem(RpcRouters._routers, "ETH", RpcRouter("ETH", endpoints=[url]))
+        return ETHWallet("ETH")
+
+    return build
+
+
+def make_fixture(
+    blocks: int = 20,
+    transactions_per_block: int = 200,
+    targets: int = 10,
+    trades_per_block: int = 2,
+    first_block: int = 19000000,
+    seed: int = 1,
+) -> Dict[str, Any]:
+    """
+    Builds a replay fixture, see `lib.CopyTradeReplay`, of blocks shaped like mainnet ones.
+
+    Most transactions are transfers between random addresses; in every block a few targets
+    buy a token through the Uniswap V2 router with `swapExactETHForTokens`, which the
+    replay's decoder and mirrors handle like a recorded trade.
+
+    Args:
+        blocks (int, optional): Blocks in the fixture. Defaults to 20.
+        transactions_per_block (int, optional): Transactions per block. Defaults to 200.
+        targets (int, optional): Addresses that trade and are followed. Defaults to 10.
+        trades_per_block (int, optional): Router trades by the targets per block. Defaults to 2.
+        first_block (int, optional): The first block number. Defaults to 19000000.
+        seed (int, optional): Seeds the addresses and hashes so runs compare. Defaults to 1.
+
+    Returns:
+        Dict[str, Any]: The fixture with its `network`, `blocks` and `targets`.
+    """
+    rng = random.Random(seed)
+
+    def address() -> str:
+        return "0x" + rng.randbytes(20).hex()
+
+    selector = function_signature_to_4byte_selector("swapExactETHForTokens(uint256,address[],address,uint256)")
+    followed = [address() for _ in range(targets)]
+    tokens = [address() for _ in range(20)]
+    fixture_blocks = []
+    for number in range(first_block, first_block + blocks):
+        transactions = []
+        for _ in range(transactions_per_block):
+            transactions.append(
+                {
+                    "hash": "0x" + rng.randbytes(32).hex(),
+                    "from": address(),
+                    "to": address(),
+                    "value": hex(rng.randrange(10**18)),
+                    "input": "0x",
+                    "blockNumber": hex(number),
+                }
+            )
+        for index in rng.sample(range(transactions_per_block), trades_per_block):
+            sender = rng.choice(followed)
+            calldata = selector + encode(
+                ["uint256", "address[]", "address", "uint256"],
+                [0, [WRAPPED_NATIVE["ETH"].lower(), rng.choice(tokens)], sender, 2**32],
+            )
+            transactions[index].update(
+                {
+                    "from": sender,
+                    "to": WsCryptoCopyTrader.UNISWAP_ROUTER_ADDRESS.lower(),
+                    "value": hex(10**17),
+                    "input": "0x" + calldata.hex(),
+                }
+            )
+        fixture_blocks.append({"number": hex(number), "transactions": transactions})
+    return {"network": "ETH", "blocks": fixture_blocks, "targets": followed}
+
+
+@pytest.fixture
+def synthetic_fixture() -> Callable[..., Dict[str, Any]]:
+    """
+    Builds replay fixtures, see `make_fixture`.
+    """
+    return make_fixture
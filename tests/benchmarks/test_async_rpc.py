@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from web3 import Web3
+
+from lib.RpcBatch import JsonRpcBatch, get_session
+from lib.WalletClass import ETHWallet
+
+ADDRESS = "0x28C6c06298d514Db089934071355E5743bf21d60"
+TRANSFER = {"from": ADDRESS, "to": ADDRESS, "value": 1}
+HANDLERS = 10
+LATENCY = 0.05
+
+
+class BlockingWallet(ETHWallet):
+    """
+    ETHWallet as it was before, its async methods calling the synchronous provider.
+    """
+
+    def __init__(self, url: str) -> None:
+        super().__init__("ETH")
+        self.sync_w3 = Web3(Web3.HTTPProvider(url))
+
+    async def get_balance(self, address: str) -> float:
+        balance = self.sync_w3.eth.get_balance(address)
+        return float(self.sync_w3.from_wei(balance, "ether"))
+
+    async def get_gas_price(self) -> int:
+        return self.sync_w3.eth.gas_price
+
+    async def estimate_gas(self, transaction: Dict[str, Any]) -> int:
+        return self.sync_w3.eth.estimate_gas(transaction)
+
+
+async def wallet_handler(wallet: ETHWallet) -> None:
+    # what a /wallet or /send handler reads before it answers the user
+    await wallet.get_balance(ADDRESS)
+    await wallet.get_gas_price()
+    await wallet.estimate_gas(TRANSFER)
+
+
+async def batched_handler(wallet: ETHWallet) -> None:
+    # the same independent reads in one JSON-RPC batch through the wallet's router
+    batch = JsonRpcBatch("ETH")
+    batch.add("eth_getBalance", [ADDRESS, "latest"])
+    batch.add("eth_gasPrice")
+    batch.add("eth_estimateGas", [{"from": ADDRESS, "to": ADDRESS, "value": "0x1"}])
+    await wallet.rpc.batch(batch, hedge=False)
+
+
+async def handler_latencies(handler: Callable[[], Awaitable[None]]) -> List[float]:
+    # every handler starts at once, like messages from several users arriving together
+    started = time.perf_counter()
+
+    async def timed() -> float:
+        await handler()
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*[timed() for _ in range(HANDLERS)])
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    ranked = sorted(latencies)
+    return ranked[min(int(len(ranked) * fraction), len(ranked) - 1)]
+
+
+def report(name: str, latencies: List[float]) -> None:
+    print(
+        f"{name:<10} p50 {statistics.median(latencies) * 1000:7.1f}ms"
+        f"  p90 {percentile(latencies, 0.9) * 1000:7.1f}ms  max {max(latencies) * 1000:7.1f}ms"
+    )
+
+
+def test_concurrent_handler_latency(rpc_node, eth_wallet):
+    url = rpc_node(LATENCY)
+    wallet = eth_wallet(url)
+    blocking = BlockingWallet(url)
+
+    async def scenario() -> None:
+        # warm the connections so every variant measures round-trips only
+        await wallet_handler(wallet)
+        await batched_handler(wallet)
+        results = {}
+        for name, handler in [
+            ("blocking", lambda: wallet_handler(blocking)),
+            ("async", lambda: wallet_handler(wallet)),
+            ("batched", lambda: batched_handler(wallet)),
+        ]:
+            results[name] = await handler_latencies(handler)
+        await (await get_session()).close()
+
+        print()
+        for name, latencies in results.items():
+            report(name, latencies)
+        # blocking calls serialize every handler behind each other, three round-trips apiece
+        assert max(results["blocking"]) >= HANDLERS * 3 * LATENCY
+        assert statistics.median(results["blocking"]) >= HANDLERS * 3 * LATENCY / 2
+        # percentiles, a single slow connection should not decide the comparison
+        assert percentile(results["async"], 0.9) < statistics.median(results["blocking"]) / 2
+        assert statistics.median(results["batched"]) < statistics.median(results["async"])
+        assert percentile(results["batched"], 0.9) < percentile(results["async"], 0.9)
+
+    asyncio.run(scenario())
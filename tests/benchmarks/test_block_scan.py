@@ -0,0 +1,66 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from lib.BlockScanner import BlockScanner
+from lib.CopyTradeReplay import print_report, replay
+from lib.CryptoWatcher import WsCryptoCopyTrader
+
+WATCHED = 100_000
+ROUNDS = 5
+
+
+def time_matching(scanner: BlockScanner, blocks: List[Dict[str, Any]]) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for block in blocks:
+            scanner.match(block)
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def test_matching_does_not_depend_on_watched_addresses(synthetic_fixture):
+    fixture = synthetic_fixture(blocks=50, transactions_per_block=300)
+    blocks = fixture["blocks"]
+    scanner = BlockScanner("ETH", lambda tx, trace: None, routers=WsCryptoCopyTrader.KNOWN_ETH_ROUTERS)
+
+    scanner.set_watched(fixture["targets"])
+    few = time_matching(scanner, blocks)
+    matched = sum(len(scanner.match(block)) for block in blocks)
+
+    rng = random.Random(2)
+    scanner.set_watched(fixture["targets"] + ["0x" + rng.randbytes(20).hex() for _ in range(WATCHED)])
+    many = time_matching(scanner, blocks)
+
+    # before: one filter per followed wallet, every transaction compared against each of them
+    followed = list(scanner.watched)[:1000]
+    routers = list(WsCryptoCopyTrader.KNOWN_ETH_ROUTERS)
+    started = time.perf_counter()
+    for block in blocks:
+        for address in followed:
+            [tx for tx in block["transactions"] if tx["from"].lower() == address and tx["to"].lower() in routers]
+    linear = time.perf_counter() - started
+
+    print()
+    print(f"{len(blocks)} blocks, {matched} matches")
+    print(f"hashed, {len(fixture['targets'])} watched      {few * 1000:8.2f}ms")
+    print(f"hashed, {len(scanner.watched)} watched  {many * 1000:8.2f}ms")
+    print(f"linear, {len(followed)} watched    {linear * 1000:8.2f}ms")
+
+    assert matched == len(blocks) * 2
+    # hash lookups, not the size of the watch set, bound the cost
+    assert many < few * 3
+    assert many < linear
+
+
+def test_replay_mirrors_every_trade_once(synthetic_fixture):
+    fixture = synthetic_fixture(blocks=20, transactions_per_block=200, targets=10, trades_per_block=3)
+
+    report = asyncio.run(replay(fixture, followers_per_target=5))
+    print()
+    print_report(report)
+
+    assert report["expected_mirrors"] == 20 * 3 * 5
+    assert report["missed"] == []
+    assert report["duplicated"] == []
+    assert report["unexpected"] == []
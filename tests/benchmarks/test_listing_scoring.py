@@ -0,0 +1,98 @@
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from lib.ListingsFeed import PLATFORM_NAMES, score_listings
+
+LISTINGS = 5000
+ROUNDS = 5
+
+
+def make_listings(count: int, seed: int = 1) -> pd.DataFrame:
+    rng = random.Random(seed)
+    names = list(PLATFORM_NAMES) + ["arbitrum", "base", "tron"]
+    rows: List[Dict[str, Any]] = []
+    for cmc_id in range(1, count + 1):
+        name = rng.choice(names)
+        total = rng.choice([0.0, rng.uniform(1e6, 1e12)])
+        circulating = rng.uniform(0, total) if total else rng.choice([0.0, rng.uniform(1e6, 1e9)])
+        rows.append(
+            {
+                "id": cmc_id,
+                "name": f"Token {cmc_id}",
+                "symbol": f"TK{cmc_id}",
+                "platform": (
+                    {"id": rng.randint(1, 5000), "name": name.title(), "token_address": "0x" + rng.randbytes(20).hex()}
+                    if rng.random() > 0.1
+                    else None
+                ),
+                "circulating_supply": circulating,
+                "total_supply": total,
+                "volume_7d": rng.choice([0.0, rng.uniform(1e3, 1e9)]),
+                "market_cap_by_total_supply": rng.uniform(1e4, 1e10),
+                "quote": {"USD": {"price": rng.uniform(1e-6, 10)}},
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def score_listings_by_row(df: pd.DataFrame) -> dict:
+    # before: the platform and the score were computed one row at a time, then the frame
+    # was filtered again for every platform
+    def identify_platform(platform: Optional[Dict[str, Any]]) -> str:
+        if isinstance(platform, dict) and "name" in platform:
+            return PLATFORM_NAMES.get(platform["name"].lower(), "Other")
+        return "Other"
+
+    def divide(numerator: float, denominator: float) -> float:
+        return numerator / denominator if denominator else 0.0
+
+    df = df.assign(platform_name=df["platform"].apply(identify_platform))
+    best_tokens = {}
+    for platform in PLATFORM_NAMES.values():
+        platform_df = df[df["platform_name"] == platform]
+        if platform_df.empty:
+            continue
+        volume_max = platform_df["volume_7d"].max()
+        scores = platform_df.apply(
+            lambda row: (
+                ((1 - divide(row["circulating_supply"], row["total_supply"])) if row["total_supply"] > 0 else 0.0)
+                * 0.4
+                + divide(row["volume_7d"], volume_max) * 0.3
+                + divide(row["market_cap_by_total_supply"], row["circulating_supply"]) * 0.3
+            ),
+            axis=1,
+        )
+        best_token = platform_df.loc[scores.idxmax()]
+        best_tokens[platform] = {"token_id": best_token["id"], "price_usd": best_token["quote"]["USD"]["price"]}
+    return best_tokens
+
+
+def time_scoring(score, df: pd.DataFrame) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        score(df)
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def test_vectorized_scoring_matches_row_wise_scoring():
+    df = make_listings(LISTINGS)
+
+    vectorized = score_listings(df)
+    by_row = score_listings_by_row(df)
+    assert set(vectorized) == set(PLATFORM_NAMES.values())
+    assert {platform: token["token_id"] for platform, token in vectorized.items()} == {
+        platform: token["token_id"] for platform, token in by_row.items()
+    }
+
+    fast = time_scoring(score_listings, df)
+    slow = time_scoring(score_listings_by_row, df)
+
+    print()
+    print(f"{LISTINGS} listings")
+    print(f"vectorized  {fast * 1000:8.2f}ms")
+    print(f"row-wise    {slow * 1000:8.2f}ms")
+
+    assert fast < slow
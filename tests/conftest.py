@@ -0,0 +1,22 @@
+from typing import Iterator
+
+import pytest
+from web3 import Web3
+
+from lib.CopyTradeReplay import StubProvider, StubRpc
+from lib.ProviderPool import ProviderPool
+
+
+@pytest.fixture(autouse=True)
+def offline_web3(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """
+    Hands out an offline Web3 from the provider pool, so no test depends on a reachable INFURA_HTTP_URL.
+
+    Every call on it fails with "not recorded" instead of reaching a node.
+    """
+
+    def get_web3(network: str = "ETH") -> Web3:
+        return Web3(StubProvider(StubRpc({"network": network, "blocks": []})))
+
+    monkeypatch.setattr(ProviderPool, "get_web3", get_web3)
+    yield
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, List
+
+from eth_account import Account
+
+from lib.CopyTradeHub import CopyTradeHub, CopyTradeWatch
+from lib.CopyTradeReplay import StubCheckpoints
+from lib.CryptoWatcher import WsCryptoCopyTrader
+from lib.LatencyMetrics import LatencyTrace
+
+TARGET = "0x28C6c06298d514Db089934071355E5743bf21d60"
+TX_HASH = "0x" + "ab" * 32
+
+
+class RecordingCheckpoints(StubCheckpoints):
+    def __init__(self) -> None:
+        super().__init__()
+        self.saved: List[int] = []
+
+    async def save(self, watcher: str, block: int) -> None:
+        self.saved.append(block)
+
+
+def make_hub(followers: int) -> CopyTradeHub:
+    hub = CopyTradeHub()
+    hub.checkpoints = RecordingCheckpoints()
+    for index in range(followers):
+        account = Account.create()
+        hub._add(CopyTradeWatch(f"watch-{index}", index, "ETH", TARGET, account.key.hex()))
+    return hub
+
+
+def test_failed_batch_gives_claims_back_and_reports(monkeypatch):
+    reported: List[Any] = []
+
+    async def failing_mirror_trades(*args: Any, **kwargs: Any) -> None:
+        raise RuntimeError("node went away")
+
+    async def report_failure(self: WsCryptoCopyTrader, tx_hash: Any, error: Exception) -> None:
+        reported.append((self.chat_id, str(error)))
+
+    monkeypatch.setattr(WsCryptoCopyTrader, "mirror_trades", failing_mirror_trades)
+    monkeypatch.setattr(WsCryptoCopyTrader, "report_failure", report_failure)
+
+    async def scenario() -> None:
+        hub = make_hub(3)
+        tx = {"hash": TX_HASH, "from": TARGET, "blockNumber": hex(100)}
+        await hub._on_transaction("ETH", tx, LatencyTrace("ETH"))
+        assert len(hub.checkpoints.claimed) == 3
+        await asyncio.sleep(0.05)
+        # released, so a replay of the block mirrors the trade again
+        assert hub.checkpoints.claimed == set()
+        assert sorted(reported) == [(0, "node went away"), (1, "node went away"), (2, "node went away")]
+
+    asyncio.run(scenario())
+
+
+def test_checkpoint_waits_for_blocks_with_mirrors_in_flight(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_mirror_trades(*args: Any, settle: Any = None, **kwargs: Any) -> None:
+        await release.wait()
+        await settle([True])
+
+    monkeypatch.setattr(WsCryptoCopyTrader, "mirror_trades", slow_mirror_trades)
+
+    async def scenario() -> None:
+        hub = make_hub(1)
+        release.clear()
+        tx = {"hash": TX_HASH, "from": TARGET, "blockNumber": hex(100)}
+        await hub._on_transaction("ETH", tx, LatencyTrace("ETH"))
+        await hub._save_progress("ETH", 105)
+        release.set()
+        await asyncio.sleep(0.05)
+        await hub._save_progress("ETH", 106)
+        assert hub.checkpoints.saved == [99, 106]
+        assert hub.checkpoints.claimed == {("watch-0", TX_HASH)}
+
+    asyncio.run(scenario())
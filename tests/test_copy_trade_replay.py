@@ -0,0 +1,35 @@
+import asyncio
+import os
+
+from lib.CopyTradeReplay import load_fixture, replay
+from lib.ProviderPool import ProviderPool
+from lib.RpcRouter import RpcRouters
+
+# three blocks in the format `python -m lib.CopyTradeReplay record` writes: two followed targets,
+# a trade by an address nobody follows, a reverted trade and plain transfers around them
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "copy_trade_replay.json")
+
+
+def test_replay_mirrors_each_successful_target_trade_once_per_follower():
+    fixture = load_fixture(FIXTURE)
+
+    report = asyncio.run(replay(fixture, followers_per_target=3))
+
+    # a buy by the first target, a sell and a buy by the second, the reverted buy is skipped
+    assert report["blocks"] == 3
+    assert report["expected_mirrors"] == 3 * 3
+    assert report["mirrors"] == 3 * 3
+    assert report["failed_mirrors"] == 0
+    assert report["missed"] == []
+    assert report["duplicated"] == []
+    assert report["unexpected"] == []
+
+
+def test_replay_puts_the_real_providers_back():
+    routers = dict(RpcRouters._routers)
+    providers = dict(ProviderPool._providers)
+
+    asyncio.run(replay(load_fixture(FIXTURE), followers_per_target=1))
+
+    assert RpcRouters._routers == routers
+    assert ProviderPool._providers == providers
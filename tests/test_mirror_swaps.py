@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from eth_account import Account
+
+from data.Networks import Networks
+from lib.CopyTradeReplay import StubWallet
+from lib.SwapDecoder import WRAPPED_NATIVE
+from lib.SwapTemplate import DEFAULT_SWAP_GAS, SwapTemplateCache, SwapTemplates
+from lib.Types import DecodedSwap
+from models.Presets import Presets
+
+ROUTER = "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D"
+TOKEN = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+NETWORK = [network for network in Networks if network.sn == "ETH"][0]
+
+
+class RecordingWallet(StubWallet):
+    """
+    The replay's follower wallet, keeping the filled transactions as well.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(NETWORK, ROUTER, 10**18, [])
+        self.transactions: List[Dict[str, Any]] = []
+
+    async def broadcast_many(
+        self, sender_accounts: List[Any], transactions: List[Dict[str, Any]], traces: Optional[List[Any]] = None
+    ) -> List[Any]:
+        self.transactions.extend(transactions)
+        return await super().broadcast_many(sender_accounts, transactions, traces)
+
+
+def stored_presets(slippage: str, gas_limit: str) -> Presets:
+    # the same conversions process_slippage and process_gas_limit apply to the user's reply
+    return Presets(
+        id=f"1-{NETWORK.id}",
+        chain_id=str(NETWORK.id),
+        chain_name=NETWORK.name,
+        slippage=float(slippage) / 100,
+        gas_limit=int(float(gas_limit) * 10**18),
+    )
+
+
+def test_stored_slippage_is_a_fraction():
+    presets = stored_presets("5", "0.00004")
+
+    assert SwapTemplateCache.slippage(presets) == 0.05
+    assert SwapTemplateCache.slippage(None) == 0.05
+    # an ETH amount in wei is not a number of gas units
+    assert SwapTemplateCache.gas_limit(presets) == DEFAULT_SWAP_GAS
+
+
+def test_mirror_swaps_applies_stored_slippage():
+    presets = stored_presets("5", "0.00004")
+    wallet = RecordingWallet()
+    accounts = [Account.create() for _ in range(3)]
+    swap = DecodedSwap(ROUTER, "swapExactETHForTokens", [WRAPPED_NATIVE["ETH"], TOKEN], "buy", native_in=True)
+    amounts = [10**18, 3 * 10**17, 7]
+
+    SwapTemplates._templates.clear()
+    results = asyncio.run(wallet.mirror_swaps(accounts, swap, amounts, [presets] * len(accounts)))
+
+    assert not [result for result in results if isinstance(result, Exception)]
+    assert len(wallet.transactions) == len(accounts)
+    for transaction, amount in zip(wallet.transactions, amounts):
+        # native in swaps carry amountOutMin in the first argument slot, the stub quotes 1:1
+        amount_out_min = int.from_bytes(bytes(transaction["data"])[4:36], "big")
+        assert amount_out_min == amount * 95 // 100
+        assert transaction["value"] == amount
+        assert transaction["gas"] == DEFAULT_SWAP_GAS
@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Dict, List
+
+import pytest
+from aiohttp import web
+
+from lib.RpcBatch import JsonRpcBatch, JsonRpcError, get_session
+from lib.RpcRouter import RpcRouter
+
+
+class FakeNode:
+    """
+    A JSON-RPC endpoint answering every call with its own name, misbehaving as told by `mode`.
+    """
+
+    def __init__(self, name: str, mode: str = "ok", delay: float = 0.0) -> None:
+        self.name = name
+        self.mode = mode
+        self.delay = delay
+        self.requests = 0
+
+    def answer(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        if self.mode == "rate_limited":
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32005, "message": "limit exceeded"}}
+        if call["method"] == "eth_call":
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": 3, "message": "execution reverted"}}
+        if call["method"] == "eth_sendRawTransaction":
+            return {"jsonrpc": "2.0", "id": call["id"], "result": "0x" + call["params"][0][2:].rjust(64, "0")[-64:]}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": self.name}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        payload = await request.json()
+        if self.mode == "malformed":
+            return web.Response(text="<html>502 Bad Gateway</html>", content_type="text/html")
+        if self.mode == "reject_batch" and isinstance(payload, list):
+            return web.json_response(
+                {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests are disabled"}}
+            )
+        if isinstance(payload, list):
+            return web.json_response([self.answer(call) for call in payload])
+        return web.json_response(self.answer(payload))
+
+
+@contextlib.asynccontextmanager
+async def serve(*nodes: FakeNode) -> AsyncIterator[List[str]]:
+    app = web.Application()
+    for node in nodes:
+        app.router.add_post(f"/{node.name}", node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    try:
+        yield [f"http://{host}:{port}/{node.name}" for node in nodes]
+    finally:
+        await (await get_session()).close()
+        await runner.cleanup()
+
+
+def test_slow_endpoint_is_hedged_to_the_runner_up():
+    async def scenario() -> None:
+        slow, fast = FakeNode("slow", delay=1.0), FakeNode("fast")
+        async with serve(slow, fast) as urls:
+            router = RpcRouter("ETH", endpoints=urls, timeout=5.0)
+            assert await router.request("eth_blockNumber") == "fast"
+            assert slow.requests == 1 and fast.requests == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("mode", ["malformed", "rate_limited"])
+def test_failing_endpoint_fails_over(mode: str):
+    async def scenario() -> None:
+        broken, healthy = FakeNode("broken", mode=mode), FakeNode("healthy")
+        async with serve(broken, healthy) as urls:
+            router = RpcRouter("ETH", endpoints=urls, timeout=5.0)
+            assert await router.request("eth_blockNumber", hedge=False) == "healthy"
+            assert router.scores[urls[0]].consecutive_failures == 1
+            assert router.scores[urls[1]].consecutive_failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_json_rpc_error_reaches_the_caller_without_failover():
+    async def scenario() -> None:
+        first, second = FakeNode("first"), FakeNode("second")
+        async with serve(first, second) as urls:
+            router = RpcRouter("ETH", endpoints=urls, timeout=5.0)
+            with pytest.raises(JsonRpcError) as error:
+                await router.request("eth_call", [{}, "latest"], hedge=False)
+            assert error.value.code == 3
+            assert second.requests == 0
+            # the endpoint answered, it keeps its rank
+            assert router.scores[urls[0]].consecutive_failures == 0
+            assert len(router.scores[urls[0]].latencies) == 1
+
+    asyncio.run(scenario())
+
+
+def test_rejected_batch_fails_over():
+    async def scenario() -> None:
+        rejecting, accepting = FakeNode("rejecting", mode="reject_batch"), FakeNode("accepting")
+        async with serve(rejecting, accepting) as urls:
+            router = RpcRouter("ETH", endpoints=urls, timeout=5.0)
+            batch = JsonRpcBatch("ETH", url=urls[0])
+            batch.add("eth_blockNumber")
+            batch.add("eth_chainId")
+            assert await router.batch(batch, hedge=False) == ["accepting", "accepting"]
+            assert router.scores[urls[0]].consecutive_failures == 1
+
+    asyncio.run(scenario())
+
+
+def test_raw_transactions_are_batched_to_every_endpoint():
+    async def scenario() -> None:
+        nodes = [FakeNode("a"), FakeNode("b", mode="reject_batch"), FakeNode("c")]
+        async with serve(*nodes) as urls:
+            router = RpcRouter("ETH", endpoints=urls, timeout=5.0)
+            hashes = await router.send_raw_transactions([b"\x01" * 32, b"\x02" * 32])
+            assert [tx_hash.hex()[-2:] for tx_hash in hashes] == ["01", "02"]
+            await asyncio.sleep(0.1)
+            assert all(node.requests == 1 for node in nodes)
+
+    asyncio.run(scenario())